@@ -1,5 +1,8 @@
-from project import app
+from project import create_app
+
+
+app = create_app()
 
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True)
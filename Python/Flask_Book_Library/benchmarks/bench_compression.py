@@ -0,0 +1,64 @@
+# Bytes on the wire and response time of the large list endpoints with and without gzip.
+#
+# Every endpoint is fetched plain and gzipped at each level; the time to send the body over
+# a link of --mbps is added to the server time to estimate what a remote branch waits:
+#   python benchmarks/bench_compression.py [--books 20000] [--mbps 10]
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PATHS = ['/books/json', '/books/json?format=ndjson', '/customers/json', '/loans/json', '/books/', '/loans/']
+
+
+def measure(client, path, headers, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        body = client.get(path, headers=headers).get_data()
+        samples.append(time.perf_counter() - start)
+    return len(body), statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Response size and latency with gzip compression')
+    parser.add_argument('--books', type=int, default=20000)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--levels', default='1,6,9', help='gzip levels to compare')
+    parser.add_argument('--mbps', type=float, default=10.0, help='link bandwidth of a remote branch')
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    from project import create_app, db
+    from project.core.cache import response_cache
+    from project.core.seed import seed_database
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(tmp, 'bench.sqlite'),
+                          'LOG_LEVEL': 'OFF', 'METRICS_ENABLED': False, 'SLOW_QUERY_THRESHOLD_MS': 0})
+        with app.app_context():
+            db.create_all(bind_key=None)
+            seed_database(books=args.books, customers=args.books // 10, loans=args.books // 10, seed=0)
+        client = app.test_client()
+
+        print(f"{'path':<28} {'encoding':<9} {'bytes':>11} {'server ms':>10} {f'+{args.mbps:g} Mbit/s ms':>16}")
+        for path in PATHS:
+            variants = [('identity', {})] + [(f'gzip-{level}', {'Accept-Encoding': 'gzip'}) for level in args.levels.split(',')]
+            for name, headers in variants:
+                if headers:
+                    app.config['COMPRESSION_LEVEL'] = int(name.split('-')[1])
+                response_cache.clear()
+                client.get(path, headers=headers)
+                size, seconds = measure(client, path, headers, args.runs)
+                wire_ms = size * 8 / (args.mbps * 1e6) * 1000
+                print(f"{path:<28} {name:<9} {size:>11,} {seconds * 1000:>10.1f} {seconds * 1000 + wire_ms:>16.1f}")
+            with app.app_context():
+                db.session.remove()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,348 @@
+# Latency, throughput and memory of every route against seeded datasets.
+#
+# Each scale is seeded once into benchmarks/.data/ and copied for every run, so write
+# routes never see the previous run's changes. Results can be saved as a baseline and
+# later runs compared against it; a route whose p50 grew beyond the tolerance is
+# reported as a regression. Routes that answered with an error are reported as failures
+# and never saved or compared. Either makes the script exit with status 1:
+#   python benchmarks/bench_endpoints.py --scales 10k,100k --save-baseline
+#   python benchmarks/bench_endpoints.py --scales 10k,100k --compare
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from dataset import SCALES, book_name, customer_name, scale_rows, seed, template_key
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HERE = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(HERE, '.data')
+DEFAULT_BASELINE = os.path.join(HERE, 'results', 'baseline.json')
+
+PERCENTILES = (50, 95, 99)
+
+# Words of seeded titles and author names, from common to rare
+SEARCH_TERMS = ('silent', 'river', 'nowak', 'golden%20sea', 'kraw')
+
+
+# A benchmarked route. `request` builds the (method, path, client kwargs) of the i-th call
+# from the dataset row counts and the ids and names of the available books; `full` marks routes returning whole tables, which run fewer times.
+class Route:
+    def __init__(self, name, request, full=False):
+        self.name = name
+        self.request = request
+        self.full = full
+
+
+def get(path):
+    return lambda i, counts: ('GET', path(i, counts) if callable(path) else path, {})
+
+
+def loan_dates():
+    today = date.today()
+    return today.isoformat(), (today + timedelta(days=5)).isoformat()
+
+
+# Write routes take rows from fixed ranges of the seeded data, so no call depends on another:
+# the first available books are loaned one by one, those from the middle of the list in
+# batches of five, and available books are deleted from the end of the list.
+def create_loan(i, counts):
+    loan_date, return_date = loan_dates()
+    return 'POST', '/loans/create', {'data': {
+        'customer_name': customer_name(i % counts['customers']),
+        'book_name': counts['available'][i][1],
+        'loan_date': loan_date,
+        'return_date': return_date,
+    }}
+
+
+def create_loans_batch(i, counts):
+    loan_date, return_date = loan_dates()
+    first = len(counts['available']) // 2 + i * 5
+    return 'POST', '/loans/batch', {'json': {
+        'customer_name': customer_name(i % counts['customers']),
+        'book_names': [name for _, name in counts['available'][first:first + 5]],
+        'loan_date': loan_date,
+        'return_date': return_date,
+    }}
+
+
+def create_books_bulk(i, counts):
+    return 'POST', '/books/bulk', {'json': [
+        {'name': f'Bulk book {i}-{n}', 'author': 'Bench', 'year_published': 2020, 'book_type': '5days'}
+        for n in range(100)
+    ]}
+
+
+ROUTES = [
+    Route('core.index', get('/')),
+    Route('books.list_books', get('/books/'), full=True),
+    Route('books.list_books_json', get('/books/json'), full=True),
+    Route('books.list_books_json?limit', get('/books/json?limit=100')),
+    Route('books.list_books_json?after', get(lambda i, c: f'/books/json?limit=100&after={c["books"] // 2 + i}')),
+    Route('books.list_books_json?ndjson', get('/books/json?format=ndjson'), full=True),
+    Route('books.search_books_json', get(lambda i, c: f'/books/search?q={SEARCH_TERMS[i % len(SEARCH_TERMS)]}&limit=20')),
+    Route('books.get_book_for_edit', get(lambda i, c: f'/books/{i % c["books"] + 1}/edit-data')),
+    Route('books.get_book_details', get(lambda i, c: f'/books/details/{book_name(i % c["books"])}')),
+    Route('books.get_books_details', get(lambda i, c: '/books/details?names=' + ','.join(
+        book_name((i * 10 + n) % c['books']) for n in range(10)))),
+    Route('customers.list_customers', get('/customers/'), full=True),
+    Route('customers.list_customers_json', get('/customers/json'), full=True),
+    Route('customers.list_customers_json?limit', get('/customers/json?limit=100')),
+    Route('customers.get_customer_for_edit', get(lambda i, c: f'/customers/{i % c["customers"] + 1}/edit-data')),
+    Route('loans.list_loans', get('/loans/'), full=True),
+    Route('loans.list_loans_json', get('/loans/json'), full=True),
+    Route('loans.list_loans_json?limit', get('/loans/json?limit=100')),
+    Route('loans.list_overdue_loans', get('/loans/overdue?limit=100')),
+    Route('loans.list_overdue_loans?group', get('/loans/overdue?group=day')),
+    Route('loans.list_books_json', get('/loans/books/json'), full=True),
+    Route('loans.list_customers_json', get('/loans/customers/json'), full=True),
+    Route('loans.suggest_books', get(lambda i, c: f'/loans/books/suggest?prefix={book_name(i % c["books"])[:4]}&available=1')),
+    Route('loans.suggest_customers', get(lambda i, c: f'/loans/customers/suggest?prefix={customer_name(i % c["customers"])[:3]}')),
+    Route('loans.get_loan_details', get(lambda i, c: f'/loans/{c["loans"] - i % (c["loans"] // 2)}/details')),
+    Route('loans.get_loan_full', get(lambda i, c: f'/loans/{c["loans"] - i % (c["loans"] // 2)}/full')),
+    Route('loans.get_loans_details', get(lambda i, c: '/loans/details?ids=' + ','.join(
+        str(c['loans'] - (i * 10 + n) % (c['loans'] // 2)) for n in range(10)))),
+    Route('loans.get_book_details', get(lambda i, c: f'/loans/books/details/{book_name(i % c["books"])}')),
+    Route('loans.get_customer_details', get(lambda i, c: f'/loans/customers/details/{customer_name(i % c["customers"])}')),
+    Route('core.cache_stats', get('/cache/stats')),
+    Route('core.metrics', get('/metrics')),
+    Route('slow_query_report', get('/debug/slow-queries')),
+    Route('books.create_book', lambda i, c: ('POST', '/books/create', {'json': {
+        'name': f'Bench book {i}', 'author': 'Bench', 'year_published': 2020, 'book_type': '5days'}})),
+    Route('books.create_books_bulk', create_books_bulk),
+    Route('books.edit_book', lambda i, c: ('POST', f'/books/{i % c["books"] + 1}/edit', {'json': {'author': f'Edited {i}'}})),
+    Route('books.delete_book', lambda i, c: ('POST', f'/books/{c["available"][-1 - i][0]}/delete', {})),
+    Route('customers.create_customer', lambda i, c: ('POST', '/customers/create', {'data': {
+        'name': f'Bench customer {i}', 'city': 'Bench', 'age': 30, 'pesel': '90010112345', 'street': 'Bench', 'appNo': '1'}})),
+    Route('customers.edit_customer', lambda i, c: ('POST', f'/customers/{i % c["customers"] + 1}/edit', {'data': {
+        'name': customer_name(i % c['customers']), 'city': f'Edited {i}', 'age': 30}})),
+    Route('customers.delete_customer', lambda i, c: ('POST', f'/customers/{c["customers"] + i + 1}/delete', {})),
+    Route('loans.create_loan', create_loan),
+    Route('loans.create_loans_batch', create_loans_batch),
+    Route('loans.delete_loan', lambda i, c: ('POST', f'/loans/{i + 1}/delete', {})),
+]
+
+
+# Function to pick the value below which p percent of the samples fall (nearest rank)
+def percentile(samples, p):
+    ordered = sorted(samples)
+    rank = max(int(round(p / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def run_seed(args):
+    sys.path.insert(0, ROOT)
+    from project import create_app, db
+
+    app = create_app()
+    start = time.perf_counter()
+    with app.app_context():
+        db.create_all()
+        counts = seed(args.scale, seed=args.seed)
+    print(json.dumps({'counts': counts, 'seconds': time.perf_counter() - start}))
+
+
+def run_child(args):
+    sys.path.insert(0, ROOT)
+    from project import create_app, db
+    from project.books.models import Book
+    from project.core.cache import response_cache
+
+    app = create_app({'WTF_CSRF_ENABLED': False, 'DEBUG_ENDPOINTS': True})
+    client = app.test_client()
+    counts = scale_rows(args.scale)
+    with app.app_context():
+        counts['available'] = db.session.execute(
+            db.select(Book.id, Book.name).where(Book.status == 'available').order_by(Book.id)
+        ).all()
+    results = {}
+
+    for route in ROUTES:
+        if args.routes and not any(part in route.name for part in args.routes):
+            continue
+        iterations = args.full_iterations if route.full else args.iterations
+
+        # One untimed call fills caches and compiles templates, then one call under tracemalloc
+        # records the peak memory allocated while handling the request. Both use request
+        # numbers after the timed ones, so write routes never repeat a row.
+        method, path, kwargs = route.request(iterations, counts)
+        client.open(path, method=method, **kwargs)
+        method, path, kwargs = route.request(iterations + 1, counts)
+        tracemalloc.start()
+        client.open(path, method=method, **kwargs)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        samples = []
+        errors = 0
+        error_status = None
+        for i in range(iterations):
+            if args.cold:
+                response_cache.clear()
+            method, path, kwargs = route.request(i, counts)
+            start = time.perf_counter()
+            response = client.open(path, method=method, **kwargs)
+            response.get_data()
+            samples.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+                error_status = error_status or response.status_code
+
+        result = {f'p{p}_ms': percentile(samples, p) * 1000 for p in PERCENTILES}
+        result.update({
+            'requests': iterations,
+            'errors': errors,
+            'error_status': error_status,
+            'throughput_rps': iterations / sum(samples),
+            'peak_kb': peak / 1024,
+        })
+        results[route.name] = result
+
+    print(json.dumps({'routes': results, 'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}))
+
+
+def run_json(argv, env):
+    output = subprocess.run([sys.executable, __file__] + argv, env=env, cwd=ROOT,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+# Function to seed a scale once and keep the database file as a template for later runs.
+# The file is named after the schema and seed code hash, so a change to either seeds anew.
+def template_path(scale, seed_value, env):
+    path = os.path.join(DATA_DIR, f'{scale}-seed{seed_value}-{template_key(scale, seed_value)}.sqlite')
+    if not os.path.exists(path):
+        os.makedirs(DATA_DIR, exist_ok=True)
+        partial = path + '.partial'
+        if os.path.exists(partial):
+            os.remove(partial)
+        seeded = run_json(['--child-seed', '--scale', scale, '--seed', str(seed_value)],
+                          dict(env, DATABASE_URL='sqlite:///' + partial))
+        os.replace(partial, path)
+        print(f"seeded {scale}: {seeded['counts']} in {seeded['seconds']:.1f} s", file=sys.stderr)
+    return path
+
+
+# Function to find the routes whose timings mean nothing because some of their requests failed
+def failed_routes(results):
+    return [name for name, result in results.items() if result['errors']]
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base or result['errors']:
+            continue
+        result['p50_change'] = result['p50_ms'] / base['p50_ms'] - 1
+        result['p95_change'] = result['p95_ms'] / base['p95_ms'] - 1
+        if result['p50_change'] > tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def print_table(scale, results):
+    print(f'\n{scale}')
+    print(f"{'route':<40} {'n':>4} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9} {'peak KB':>9}  vs baseline")
+    for name, r in results.items():
+        if r['errors']:
+            print(f"{name:<40} {r['requests']:>4} FAILED: {r['errors']}/{r['requests']} errors, status {r['error_status']}")
+            continue
+        change = f"p50 {r['p50_change'] * 100:+.0f}% p95 {r['p95_change'] * 100:+.0f}%" if 'p50_change' in r else ''
+        print(f"{name:<40} {r['requests']:>4} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} "
+              f"{r['throughput_rps']:>9.1f} {r['peak_kb']:>9.0f}  {change}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Latency, throughput and peak memory of every route')
+    parser.add_argument('--scales', default='10k', help=f"comma separated, from: {', '.join(SCALES)}")
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--full-iterations', type=int, default=5, help='iterations of routes returning whole tables')
+    parser.add_argument('--routes', default='', help='comma separated substrings of route names to run')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cold', action='store_true', help='clear the response cache before every request')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--compare', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed p50 growth before a regression')
+    parser.add_argument('--scale', help=argparse.SUPPRESS)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--child-seed', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    args.routes = [part for part in args.routes.split(',') if part]
+
+    if args.child_seed:
+        run_seed(args)
+        return
+    if args.child:
+        run_child(args)
+        return
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    sys.path.insert(0, ROOT)
+    env = dict(os.environ, LOG_LEVEL='OFF')
+    regressions = []
+    failures = []
+    for scale in args.scales.split(','):
+        if scale not in SCALES:
+            parser.error(f"unknown scale '{scale}'")
+        template = template_path(scale, args.seed, env)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'bench.sqlite')
+            shutil.copyfile(template, path)
+            argv = ['--child', '--scale', scale, '--iterations', str(args.iterations),
+                    '--full-iterations', str(args.full_iterations), '--routes', ','.join(args.routes)]
+            if args.cold:
+                argv.append('--cold')
+            run = run_json(argv, dict(env, DATABASE_URL='sqlite:///' + path))
+
+        results = run['routes']
+        if args.compare:
+            regressions += [f'{scale} {name}' for name in
+                            compare(results, baseline.get(scale, {}).get('routes', {}), args.tolerance)]
+        failures += [f'{scale} {name}' for name in failed_routes(results)]
+        print_table(scale, results)
+        print(f"max RSS: {run['max_rss_kb'] / 1024:.0f} MB")
+
+        if args.save_baseline:
+            baseline[scale] = {
+                'routes': {name: {key: value for key, value in result.items() if not key.endswith('_change')}
+                           for name, result in results.items() if not result['errors']},
+                'max_rss_kb': run['max_rss_kb'],
+                'iterations': args.iterations,
+                'cold': args.cold,
+                'saved': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            }
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f'\nbaseline saved to {args.baseline}')
+
+    if failures:
+        print(f'\n{len(failures)} failed route(s), not saved or compared:')
+        for name in failures:
+            print(f'  {name}')
+    if regressions:
+        print(f'\n{len(regressions)} regression(s) over {args.tolerance * 100:.0f}%:')
+        for name in regressions:
+            print(f'  {name}')
+    if failures or regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+# Cold-start cost: time to import the package and to have an app ready to serve requests.
+#
+# Every sample is a fresh interpreter with an empty database file. `--ref` measures the same
+# at an older git revision (extracted with `git archive`), e.g. before the app factory:
+#   python benchmarks/bench_import_time.py --ref HEAD~1
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child interpreter. Older trees build `project.app` at import, newer ones
+# through create_app().
+PROBE = """
+import json, time
+start = time.perf_counter()
+import project
+imported = time.perf_counter()
+app = project.create_app() if hasattr(project, 'create_app') else project.app
+ready = time.perf_counter()
+print(json.dumps({'import_ms': (imported - start) * 1000, 'ready_ms': (ready - start) * 1000}))
+"""
+
+
+def measure(root, runs):
+    samples = []
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, LOG_LEVEL='OFF', DATABASE_URL='sqlite:///' + os.path.join(tmp, 'bench.sqlite'))
+            output = subprocess.run([sys.executable, '-c', PROBE], env=env, cwd=root,
+                                    capture_output=True, text=True, check=True).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {key: statistics.median(sample[key] for sample in samples) for key in ('import_ms', 'ready_ms')}
+
+
+# Function to extract this directory as it was at a git revision
+def checkout(ref, target):
+    toplevel, prefix = subprocess.run(['git', 'rev-parse', '--show-toplevel', '--show-prefix'], cwd=ROOT,
+                                      capture_output=True, text=True, check=True).stdout.splitlines()
+    archive = subprocess.run(['git', 'archive', '--format=tar', f'{ref}:{prefix}'], cwd=toplevel,
+                             capture_output=True, check=True).stdout
+    archive_path = os.path.join(target, 'tree.tar')
+    with open(archive_path, 'wb') as f:
+        f.write(archive)
+    with tarfile.open(archive_path) as tar:
+        tar.extractall(target)
+    return target
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Package import and app creation time in a fresh interpreter')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--ref', help='git revision to compare with')
+    args = parser.parse_args()
+
+    results = {'working tree': measure(ROOT, args.runs)}
+    if args.ref:
+        with tempfile.TemporaryDirectory() as tmp:
+            results[args.ref] = measure(checkout(args.ref, tmp), args.runs)
+
+    print(f"{'':<16} {'import ms':>10} {'app ready ms':>13}")
+    for name, result in results.items():
+        print(f"{name:<16} {result['import_ms']:>10.1f} {result['ready_ms']:>13.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+# Time to build and serialise the full JSON lists, and their size, as a list of objects
+# (the default) and with ?shape=columnar. The response cache is cleared before every call:
+#   python benchmarks/bench_json_shape.py [--books 20000]
+import argparse
+import gzip
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PATHS = ['/books/json', '/customers/json', '/loans/json', '/books/json?limit=1000']
+
+
+def measure(client, path, runs):
+    from project.core.cache import response_cache
+
+    samples = []
+    for _ in range(runs):
+        response_cache.clear()
+        start = time.perf_counter()
+        body = client.get(path).get_data()
+        samples.append(time.perf_counter() - start)
+    return body, statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Objects vs columnar JSON: serialisation time and payload size')
+    parser.add_argument('--books', type=int, default=20000)
+    parser.add_argument('--runs', type=int, default=7)
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    from project import create_app, db
+    from project.core.seed import seed_database
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(tmp, 'bench.sqlite'), 'LOG_LEVEL': 'OFF',
+                          'METRICS_ENABLED': False, 'SLOW_QUERY_THRESHOLD_MS': 0, 'COMPRESSION_ENABLED': False})
+        with app.app_context():
+            db.create_all(bind_key=None)
+            seed_database(books=args.books, customers=args.books // 10, loans=args.books // 10, seed=0)
+        client = app.test_client()
+
+        print(f"{'path':<24} {'shape':<9} {'ms':>8} {'bytes':>11} {'gzip bytes':>11}")
+        for path in PATHS:
+            for shape in ('objects', 'columnar'):
+                url = path if shape == 'objects' else path + ('&' if '?' in path else '?') + 'shape=columnar'
+                client.get(url)
+                body, seconds = measure(client, url, args.runs)
+                print(f"{path:<24} {shape:<9} {seconds * 1000:>8.1f} {len(body):>11,} {len(gzip.compress(body, 6)):>11,}")
+
+
+if __name__ == '__main__':
+    main()
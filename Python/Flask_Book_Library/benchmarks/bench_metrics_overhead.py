@@ -0,0 +1,72 @@
+# Per-request cost of the /metrics instrumentation (request hooks + SQL engine events).
+#
+# Runs the same request mix with METRICS_ENABLED=0 and =1, each in its own process:
+#   python benchmarks/bench_metrics_overhead.py [--requests 3000]
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Requests repeated in order; a mix of cached, uncached and multi-statement endpoints
+PATHS = ['/books/json?limit=20', '/customers/json?limit=20', '/loans/json?limit=20', '/books/1/edit-data']
+
+
+def run_child(args):
+    sys.path.insert(0, ROOT)
+    from project import create_app, db
+    from project.books.models import Book
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        db.session.execute(db.insert(Book), [
+            {'name': f'Book {i}', 'author': 'Author', 'year_published': 2000, 'book_type': '5days'} for i in range(200)
+        ])
+        db.session.commit()
+
+    client = app.test_client()
+    for path in PATHS:
+        client.get(path)
+
+    start = time.perf_counter()
+    for i in range(args.requests):
+        client.get(PATHS[i % len(PATHS)])
+    elapsed = time.perf_counter() - start
+    print(json.dumps({'us_per_request': elapsed / args.requests * 1e6}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-request overhead of request and SQL metrics')
+    parser.add_argument('--requests', type=int, default=3000)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    results = {}
+    for enabled in ('0', '1'):
+        samples = []
+        for _ in range(args.rounds):
+            with tempfile.TemporaryDirectory() as tmp:
+                env = dict(os.environ, METRICS_ENABLED=enabled, LOG_LEVEL='OFF',
+                           DATABASE_URL='sqlite:///' + os.path.join(tmp, 'bench.sqlite'))
+                output = subprocess.run([sys.executable, __file__, '--child', '--requests', str(args.requests)],
+                                        env=env, cwd=ROOT, capture_output=True, text=True, check=True).stdout
+            samples.append(json.loads(output.strip().splitlines()[-1])['us_per_request'])
+        results[enabled] = min(samples)
+
+    print(f"metrics off: {results['0']:.1f} us/request")
+    print(f"metrics on:  {results['1']:.1f} us/request")
+    print(f"overhead:    {results['1'] - results['0']:.1f} us/request ({(results['1'] / results['0'] - 1) * 100:.1f}%)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+# Benchmark of concurrent readers during write bursts for each SQLite engine profile.
+#
+# Every profile runs in its own process against a fresh temporary database:
+#   python benchmarks/bench_read_write.py [--books 5000] [--readers 8] [--writes 300]
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# Function to run one profile inside this process (called in a child process)
+def run_profile(args):
+    sys.path.insert(0, ROOT)
+    from project import create_app, db
+    from project.books.models import Book
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        db.session.execute(db.insert(Book), [
+            {'name': f'Book {i}', 'author': f'Author {i % 500}', 'year_published': 1900 + i % 120, 'book_type': '5days'}
+            for i in range(args.books)
+        ])
+        db.session.commit()
+
+    read_latencies = []
+    lock = threading.Lock()
+    writing = threading.Event()
+    writing.set()
+
+    def reader():
+        client = app.test_client()
+        while writing.is_set():
+            start = time.perf_counter()
+            client.get('/books/json?limit=100&sort=name', headers={'Cache-Control': 'no-cache'})
+            with lock:
+                read_latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=reader) for _ in range(args.readers)]
+    for thread in threads:
+        thread.start()
+
+    client = app.test_client()
+    write_start = time.perf_counter()
+    for i in range(args.writes):
+        client.post('/books/create', json={'name': f'New Book {i}', 'author': 'Author', 'year_published': 2024, 'book_type': '2days'})
+    write_seconds = time.perf_counter() - write_start
+
+    writing.clear()
+    for thread in threads:
+        thread.join()
+
+    quantiles = statistics.quantiles(read_latencies, n=100)
+    print(json.dumps({
+        'reads': len(read_latencies),
+        'read_p50_ms': quantiles[49] * 1000,
+        'read_p95_ms': quantiles[94] * 1000,
+        'read_max_ms': max(read_latencies) * 1000,
+        'writes_per_s': args.writes / write_seconds,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent read latency during write bursts per SQLite profile')
+    parser.add_argument('--books', type=int, default=5000)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writes', type=int, default=300)
+    parser.add_argument('--profiles', default='default,production')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_profile(args)
+        return
+
+    print(f"{'profile':<12}{'routing':<9}{'reads':>8}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}{'writes/s':>10}")
+    for profile in args.profiles.split(','):
+        for routing in ('0', '1'):
+            with tempfile.TemporaryDirectory() as tmp:
+                env = dict(os.environ, SQLITE_PROFILE=profile, DB_READ_ROUTING=routing,
+                           DATABASE_URL='sqlite:///' + os.path.join(tmp, 'bench.sqlite'))
+                output = subprocess.run(
+                    [sys.executable, __file__, '--child', '--books', str(args.books),
+                     '--readers', str(args.readers), '--writes', str(args.writes)],
+                    env=env, cwd=ROOT, capture_output=True, text=True, check=True
+                ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{profile:<12}{'on' if routing == '1' else 'off':<9}{result['reads']:>8}{result['read_p50_ms']:>9.2f}"
+                  f"{result['read_p95_ms']:>9.2f}{result['read_max_ms']:>9.2f}{result['writes_per_s']:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
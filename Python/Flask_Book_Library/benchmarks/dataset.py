@@ -0,0 +1,49 @@
+# Seeded datasets for the benchmarks, generated by the same code as `flask seed`.
+import hashlib
+import importlib
+
+
+# Named scales: number of books; customers and loans are a tenth of that
+SCALES = {'1k': 1_000, '10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+
+
+def scale_rows(scale):
+    books = SCALES[scale]
+    return {'books': books, 'customers': max(books // 10, 1), 'loans': max(books // 10, 1)}
+
+
+# The project is imported inside the functions, because the benchmark scripts put the repository
+# root on sys.path only after importing this module. Importing it builds no app and opens no
+# database; seed() works on the app context the caller has pushed.
+def book_name(index):
+    from project.core.seed import book_name
+    return book_name(index)
+
+
+def customer_name(index):
+    from project.core.seed import customer_name
+    return customer_name(index)
+
+
+# Function to name a seeded template after everything its contents depend on: the schema,
+# the generator, the row counts and the seed, so a template built by an older revision of
+# the models or of project/core/seed.py is never reused
+def template_key(scale, seed=0):
+    from sqlalchemy.schema import CreateTable
+    from project import db
+    from project.core import seed as seed_module
+
+    for package in ('books', 'customers', 'loans', 'core'):
+        importlib.import_module(f'project.{package}.models')
+    key = hashlib.md5(repr((sorted(scale_rows(scale).items()), seed)).encode())
+    for table in db.metadata.sorted_tables:
+        key.update(str(CreateTable(table)).encode())
+    with open(seed_module.__file__, 'rb') as f:
+        key.update(f.read())
+    return key.hexdigest()[:12]
+
+
+# Function to fill the database of the current app context with a scale's rows
+def seed(scale, seed=0):
+    from project.core.seed import seed_database
+    return seed_database(**scale_rows(scale), seed=seed)
@@ -0,0 +1,93 @@
+"""reference customers and books from loans by id
+
+Loans used to copy the customer name, the book name and the book columns
+into unindexed strings, and the book row itself was deleted while it was
+on loan. Loans now point at customers.id / books.id and the book stays in
+the books table with status 'loaned'.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 15:35:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('Loans', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('customer_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('book_id', sa.Integer(), nullable=True))
+
+    # Books on loan were removed from the books table, put them back as 'loaned'
+    op.execute("""
+        INSERT INTO books (name, author, year_published, book_type, status)
+        SELECT book_name, original_author, original_year_published, original_book_type, 'loaned'
+        FROM Loans
+        WHERE book_name NOT IN (SELECT name FROM books WHERE name IS NOT NULL)
+        GROUP BY book_name
+    """)
+    # Loans could name customers that no longer exist, keep them as bare name-only rows
+    op.execute("""
+        INSERT INTO customers (name)
+        SELECT DISTINCT customer_name
+        FROM Loans
+        WHERE customer_name NOT IN (SELECT name FROM customers WHERE name IS NOT NULL)
+    """)
+    op.execute("UPDATE Loans SET book_id = (SELECT id FROM books WHERE books.name = Loans.book_name)")
+    op.execute("UPDATE Loans SET customer_id = (SELECT id FROM customers WHERE customers.name = Loans.customer_name)")
+
+    with op.batch_alter_table('Loans', schema=None) as batch_op:
+        batch_op.alter_column('customer_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.alter_column('book_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.create_foreign_key('fk_loans_customer_id_customers', 'customers', ['customer_id'], ['id'])
+        batch_op.create_foreign_key('fk_loans_book_id_books', 'books', ['book_id'], ['id'])
+        batch_op.create_index(batch_op.f('ix_Loans_customer_id'), ['customer_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_Loans_book_id'), ['book_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_Loans_return_date'), ['return_date'], unique=False)
+        batch_op.drop_column('customer_name')
+        batch_op.drop_column('book_name')
+        batch_op.drop_column('original_author')
+        batch_op.drop_column('original_year_published')
+        batch_op.drop_column('original_book_type')
+
+
+def downgrade():
+    with op.batch_alter_table('Loans', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('customer_name', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('book_name', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('original_author', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('original_year_published', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('original_book_type', sa.String(length=64), nullable=True))
+
+    op.execute("UPDATE Loans SET customer_name = (SELECT name FROM customers WHERE customers.id = Loans.customer_id)")
+    op.execute("""
+        UPDATE Loans SET
+            book_name = (SELECT name FROM books WHERE books.id = Loans.book_id),
+            original_author = (SELECT author FROM books WHERE books.id = Loans.book_id),
+            original_year_published = (SELECT year_published FROM books WHERE books.id = Loans.book_id),
+            original_book_type = (SELECT book_type FROM books WHERE books.id = Loans.book_id)
+    """)
+    # The old schema keeps books that are out on loan only in the loans table
+    op.execute("DELETE FROM books WHERE id IN (SELECT book_id FROM Loans)")
+
+    with op.batch_alter_table('Loans', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_Loans_return_date'))
+        batch_op.drop_index(batch_op.f('ix_Loans_book_id'))
+        batch_op.drop_index(batch_op.f('ix_Loans_customer_id'))
+        batch_op.drop_constraint('fk_loans_book_id_books', type_='foreignkey')
+        batch_op.drop_constraint('fk_loans_customer_id_customers', type_='foreignkey')
+        batch_op.drop_column('book_id')
+        batch_op.drop_column('customer_id')
+        batch_op.alter_column('customer_name', existing_type=sa.String(length=64), nullable=False)
+        batch_op.alter_column('book_name', existing_type=sa.String(length=64), nullable=False)
+        batch_op.alter_column('original_author', existing_type=sa.String(length=64), nullable=False)
+        batch_op.alter_column('original_year_published', existing_type=sa.Integer(), nullable=False)
+        batch_op.alter_column('original_book_type', existing_type=sa.String(length=64), nullable=False)
@@ -0,0 +1,41 @@
+"""full-text search index over book names and authors
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 16:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""CREATE VIRTUAL TABLE books_fts USING fts5(
+        name, author, content='books', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""")
+    op.execute("""CREATE TRIGGER books_fts_ai AFTER INSERT ON books BEGIN
+        INSERT INTO books_fts(rowid, name, author) VALUES (new.id, new.name, new.author);
+    END""")
+    op.execute("""CREATE TRIGGER books_fts_ad AFTER DELETE ON books BEGIN
+        INSERT INTO books_fts(books_fts, rowid, name, author) VALUES ('delete', old.id, old.name, old.author);
+    END""")
+    op.execute("""CREATE TRIGGER books_fts_au AFTER UPDATE OF name, author ON books BEGIN
+        INSERT INTO books_fts(books_fts, rowid, name, author) VALUES ('delete', old.id, old.name, old.author);
+        INSERT INTO books_fts(rowid, name, author) VALUES (new.id, new.name, new.author);
+    END""")
+    # Index the books that already exist
+    op.execute("INSERT INTO books_fts(books_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    op.execute('DROP TRIGGER IF EXISTS books_fts_au')
+    op.execute('DROP TRIGGER IF EXISTS books_fts_ad')
+    op.execute('DROP TRIGGER IF EXISTS books_fts_ai')
+    op.execute('DROP TABLE IF EXISTS books_fts')
@@ -0,0 +1,32 @@
+"""change counters used to invalidate cached responses
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 16:45:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases created by earlier revisions of the app, which ran db.create_all() on import,
+    # have the table already while still being stamped at an older revision
+    if sa.inspect(op.get_bind()).has_table('table_versions'):
+        return
+    op.create_table('table_versions',
+    sa.Column('name', sa.String(length=32), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('table_versions')
@@ -0,0 +1,37 @@
+"""change timestamps on books, customers, loans and table versions
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 17:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+TABLES = ['books', 'customers', 'Loans', 'table_versions']
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table in TABLES:
+        # Tables created by db.create_all() in earlier revisions of the app, which ran it on
+        # import, have the column already while still being stamped at an older revision
+        if 'updated_at' in [column['name'] for column in inspector.get_columns(table)]:
+            continue
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        op.execute(f'UPDATE "{table}" SET updated_at = CURRENT_TIMESTAMP')
+
+
+def downgrade():
+    for table in reversed(TABLES):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('updated_at')
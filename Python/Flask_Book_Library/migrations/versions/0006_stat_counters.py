@@ -0,0 +1,37 @@
+"""counters behind the /stats dashboard
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 19:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('stat_counters',
+    sa.Column('name', sa.String(length=32), nullable=False),
+    sa.Column('key', sa.String(length=64), nullable=False),
+    sa.Column('value', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name', 'key')
+    )
+    # Count the existing rows; from here on the views keep the counters up to date
+    op.execute("""INSERT INTO stat_counters (name, key, value)
+        SELECT 'books.book_type', coalesce(book_type, ''), count(*) FROM books GROUP BY book_type
+        UNION ALL SELECT 'books.status', coalesce(status, ''), count(*) FROM books GROUP BY status
+        UNION ALL SELECT 'customers.city', coalesce(city, ''), count(*) FROM customers GROUP BY city
+        UNION ALL SELECT 'loans.due', date(return_date), count(*) FROM "Loans" GROUP BY date(return_date)
+        UNION ALL SELECT 'loans.active', '', count(*) FROM "Loans"
+    """)
+
+
+def downgrade():
+    op.drop_table('stat_counters')
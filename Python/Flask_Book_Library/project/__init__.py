@@ -1,30 +1,70 @@
-import os
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
+from project.config import Config
+from project.core.engine import RoutingSession, configure_engines, READER_BIND
 
 
-# Database Setup
-app = Flask(__name__)
+# Database Setup. The extension is bound to an app in create_app(); importing the package
+# builds nothing, opens no database and creates no tables.
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
-app.config['SECRET_KEY'] = 'supersecret' # To allow us to use forms
-app.config["TEMPLATES_AUTO_RELOAD"] = True
 
-basedir = os.path.abspath(os.path.dirname(__file__))
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///'+os.path.join(basedir, 'data.sqlite')
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Function to build the application. `config` is a mapping or object whose settings override
+# the defaults from project.config. The schema is not created here, run `flask db upgrade`.
+def create_app(config=None):
+    from project.core.commands import register_commands
+    from project.core.log import setup_logging
+    from project.core.metrics import setup_metrics
+    from project.core.slow_queries import setup_slow_query_log
+    from project.core.templates import setup_templates
+    from project.core.jobs import setup_job_runner
+    from project.core.compression import setup_compression
 
-db = SQLAlchemy(app)
-Migrate(app, db)
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    if isinstance(config, dict):
+        app.config.from_mapping(config)
+    elif config is not None:
+        app.config.from_object(config)
 
+    setup_logging(app)
 
-# Register Blueprints
-from project.core.views import core
-from project.books.views import books
-from project.customers.views import customers
-from project.loans.views import loans
+    # A separate read-only engine on the same file; an in-memory database cannot be shared between engines
+    if app.config['DB_READ_ROUTING'] and ':memory:' not in app.config['SQLALCHEMY_DATABASE_URI']:
+        app.config['SQLALCHEMY_BINDS'] = {READER_BIND: app.config['SQLALCHEMY_DATABASE_URI']}
 
-app.register_blueprint(core)
-app.register_blueprint(books)
-app.register_blueprint(customers)
-app.register_blueprint(loans)
\ No newline at end of file
+    db.init_app(app)
+
+    with app.app_context():
+        configure_engines(db, app.config['SQLITE_PROFILE'])
+
+    if app.config['METRICS_ENABLED']:
+        setup_metrics(app, db)
+
+    if app.config['SLOW_QUERY_THRESHOLD_MS'] > 0:
+        setup_slow_query_log(app, db)
+
+    # Register Blueprints
+    from project.core.views import core
+    from project.books.views import books
+    from project.customers.views import customers
+    from project.loans.views import loans
+
+    app.register_blueprint(core)
+    app.register_blueprint(books)
+    app.register_blueprint(customers)
+    app.register_blueprint(loans)
+
+    # Debug endpoints expose statement shapes and query plans, so they are off unless asked for
+    if app.debug or app.config['DEBUG_ENDPOINTS']:
+        from project.core.views import slow_query_report
+        app.add_url_rule('/debug/slow-queries', 'slow_query_report', slow_query_report)
+
+    if app.config['COMPRESSION_ENABLED']:
+        setup_compression(app)
+
+    setup_templates(app)
+    register_commands(app)
+    setup_job_runner(app)
+
+    return app
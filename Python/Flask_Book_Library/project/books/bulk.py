@@ -0,0 +1,149 @@
+import csv
+import io
+import json
+from sqlalchemy.exc import IntegrityError
+from project import db
+from project.books.models import Book
+from project.core.cache import bump_version
+from project.core.stats import count_books
+
+
+# Number of rows sent to the database in one executemany() / transaction
+BULK_BATCH_SIZE = 1000
+
+REQUIRED_FIELDS = ('name', 'author', 'year_published', 'book_type')
+
+
+# Raised when the payload cannot be read past some row. Batches before that row are already
+# committed; `inserted` and `errors` report them, the last error names the unreadable row.
+class PayloadError(ValueError):
+    def __init__(self, message, inserted, errors):
+        super().__init__(message)
+        self.inserted = inserted
+        self.errors = errors
+
+
+# Function to yield raw rows from the request body: JSON array, NDJSON or CSV (body or file upload).
+# NDJSON and CSV are read line by line from the request stream.
+def iter_payload_rows(request):
+    if 'file' in request.files:
+        upload = request.files['file']
+        yield from csv.DictReader(io.TextIOWrapper(upload.stream, encoding='utf-8'))
+        return
+
+    mimetype = request.mimetype
+    if mimetype == 'application/json':
+        # Parsed here rather than with get_json(), whose BadRequest would end up as a 500
+        try:
+            data = json.loads(request.get_data())
+        except ValueError as e:
+            raise ValueError(f'Invalid JSON: {e}')
+        if not isinstance(data, list):
+            raise ValueError('Expected a JSON array of books')
+        yield from data
+    elif mimetype in ('application/x-ndjson', 'application/jsonl'):
+        for line in io.TextIOWrapper(request.stream, encoding='utf-8'):
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # Passed on as-is so it is reported as a bad row instead of aborting the upload
+                    yield line
+    elif mimetype == 'text/csv':
+        yield from csv.DictReader(io.TextIOWrapper(request.stream, encoding='utf-8'))
+    else:
+        raise ValueError(f"Unsupported content type '{mimetype}', expected JSON array, NDJSON or CSV")
+
+
+# Function to validate one row and convert it into the column values of a Book
+def clean_row(row):
+    if not isinstance(row, dict):
+        raise ValueError('Row must be a JSON object')
+    missing = [field for field in REQUIRED_FIELDS if row.get(field) in (None, '')]
+    if missing:
+        raise ValueError(f"Missing fields: {', '.join(missing)}")
+    try:
+        year_published = int(row['year_published'])
+    except (TypeError, ValueError):
+        raise ValueError('year_published must be an integer')
+    return {
+        'name': row['name'],
+        'author': row['author'],
+        'year_published': year_published,
+        'book_type': row['book_type'],
+        'status': 'available'
+    }
+
+
+# Function to insert one batch. The whole batch goes in as a single executemany();
+# if it hits a constraint it is retried row by row inside savepoints to find the bad rows.
+def insert_batch(batch, errors):
+    values = [values for _, values in batch]
+    try:
+        with db.session.begin_nested():
+            db.session.execute(db.insert(Book), values)
+            count_books([(row['book_type'], row['status']) for row in values])
+        return len(batch)
+    except IntegrityError:
+        pass
+
+    inserted = 0
+    for row_number, row_values in batch:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(db.insert(Book), [row_values])
+                count_books([(row_values['book_type'], row_values['status'])])
+            inserted += 1
+        except IntegrityError as e:
+            errors.append({'row': row_number, 'error': str(e.orig)})
+    return inserted
+
+
+# Function to insert one batch and commit it as its own transaction
+def commit_batch(batch, errors):
+    inserted = insert_batch(batch, errors)
+    if inserted:
+        bump_version('books')
+    db.session.commit()
+    return inserted
+
+
+# Function to load all rows of the payload in batches, committing once per batch. When the
+# payload cannot be read further (bad encoding, broken CSV), the rows read so far are
+# committed and PayloadError reports them with the number of the row that failed.
+def bulk_insert_books(rows, batch_size=None):
+    batch_size = batch_size or BULK_BATCH_SIZE
+    inserted = 0
+    errors = []
+    batch = []
+    rows = iter(rows)
+    row_number = 0
+
+    while True:
+        try:
+            row = next(rows)
+        except StopIteration:
+            break
+        except (ValueError, csv.Error) as e:
+            if batch:
+                inserted += commit_batch(batch, errors)
+            errors.append({'row': row_number + 1, 'error': str(e)})
+            errors.sort(key=lambda error: error['row'])
+            raise PayloadError(str(e), inserted, errors)
+        row_number += 1
+
+        try:
+            batch.append((row_number, clean_row(row)))
+        except ValueError as e:
+            errors.append({'row': row_number, 'error': str(e)})
+            continue
+        if len(batch) >= batch_size:
+            inserted += commit_batch(batch, errors)
+            batch = []
+
+    if batch:
+        inserted += commit_batch(batch, errors)
+
+    # Rows retried one by one after a failed batch are reported after later invalid rows
+    errors.sort(key=lambda error: error['row'])
+    return inserted, errors
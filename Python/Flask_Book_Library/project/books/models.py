@@ -1,4 +1,6 @@
-from project import db, app
+from datetime import datetime
+from project import db
+from sqlalchemy import DDL, event
 import re
 
 
@@ -11,6 +13,7 @@ class Book(db.Model):
     year_published = db.Column(db.Integer) 
     book_type = db.Column(db.String(20))
     status = db.Column(db.String(20), default='available')
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     def __init__(self, name, author, year_published, book_type, status='available'):
         self.name = name
@@ -23,5 +26,26 @@ class Book(db.Model):
         return f"Book(ID: {self.id}, Name: {self.name}, Author: {self.author}, Year Published: {self.year_published}, Type: {self.book_type}, Status: {self.status})"
 
 
-with app.app_context():
-    db.create_all()
\ No newline at end of file
+
+# Full-text index over book names and authors. It is an external content FTS5 table,
+# so it stores only the index; the triggers keep it in sync with every insert, update
+# and delete on books, including bulk Core inserts that bypass the ORM.
+BOOKS_FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5(
+        name, author, content='books', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS books_fts_ai AFTER INSERT ON books BEGIN
+        INSERT INTO books_fts(rowid, name, author) VALUES (new.id, new.name, new.author);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS books_fts_ad AFTER DELETE ON books BEGIN
+        INSERT INTO books_fts(books_fts, rowid, name, author) VALUES ('delete', old.id, old.name, old.author);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS books_fts_au AFTER UPDATE OF name, author ON books BEGIN
+        INSERT INTO books_fts(books_fts, rowid, name, author) VALUES ('delete', old.id, old.name, old.author);
+        INSERT INTO books_fts(rowid, name, author) VALUES (new.id, new.name, new.author);
+    END""",
+]
+
+for statement in BOOKS_FTS_DDL:
+    event.listen(Book.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+event.listen(Book.__table__, 'before_drop', DDL('DROP TABLE IF EXISTS books_fts').execute_if(dialect='sqlite'))
@@ -0,0 +1,34 @@
+from sqlalchemy import text
+from project import db
+
+
+# bm25() column weights for (name, author): a hit in the title ranks above a hit in the author
+SEARCH_QUERY = text("""
+    SELECT books.id, books.name, books.author, books.year_published, books.book_type
+    FROM books_fts
+    JOIN books ON books.id = books_fts.rowid
+    WHERE books_fts MATCH :match
+    ORDER BY bm25(books_fts, 10.0, 5.0), books.id
+    LIMIT :limit OFFSET :offset
+""")
+
+
+# Function to turn free text into an FTS5 query: every word must match, the last one as a
+# prefix so results show up while the user is still typing. Words are quoted so characters
+# like '-', '*' or ':' in titles are not read as FTS5 syntax.
+def build_match(q):
+    terms = ['"' + term.replace('"', '""') + '"' for term in q.split()]
+    if not terms:
+        return None
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+# Function to fetch one page of ranked matches as lightweight rows (no ORM instances)
+def search_books(q, limit, offset=0):
+    match = build_match(q)
+    if match is None:
+        return [], None
+    rows = db.session.execute(SEARCH_QUERY, {'match': match, 'limit': limit + 1, 'offset': offset}).all()
+    next_offset = offset + limit if len(rows) > limit else None
+    return rows[:limit], next_offset
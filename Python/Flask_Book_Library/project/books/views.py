@@ -1,34 +1,132 @@
+import logging
 from flask import render_template, Blueprint, request, redirect, url_for, jsonify
 from project import db
 from project.books.models import Book
 from project.books.forms import CreateBook
+from project.books.bulk import PayloadError, iter_payload_rows, bulk_insert_books
+from project.books.search import search_books
+from project.core.pagination import (parse_page_args, wants_page, keyset_page, parse_list_args, seek_page, starts_with, parse_key_list,
+                                     DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+from project.core.streaming import requested_format, requested_shape, ndjson_response, columnar_page
+from project.core.cache import cached_by_version, conditional_by_version, bump_version
+from project.core.stats import count_books
 
 
 # Blueprint for books
 books = Blueprint('books', __name__, template_folder='templates', url_prefix='/books')
+logger = logging.getLogger(__name__)
 
 
-# Route to display books in HTML
+# Function to convert a book into the dictionary returned by the JSON endpoints
+def serialize_book(book):
+    return {'id': book.id, 'name': book.name, 'author': book.author, 'year_published': book.year_published, 'book_type': book.book_type}
+
+
+# Columns of serialize_book, read as plain tuples for ?shape=columnar
+BOOK_COLUMNS = (Book.id, Book.name, Book.author, Book.year_published, Book.book_type)
+
+
+# Columns the HTML book list can be sorted by, each one backed by an index
+BOOK_SORT_COLUMNS = {'id': Book.id, 'name': Book.name}
+
+
+# Function to apply the filters of the HTML book list. The name is matched as a prefix on
+# its index; the other filters narrow down the rows read along the sort order.
+def filter_books(query, args):
+    if args.get('name'):
+        query = query.filter(starts_with(Book.name, args['name']))
+    if args.get('author'):
+        query = query.filter(Book.author == args['author'])
+    if args.get('book_type'):
+        query = query.filter(Book.book_type == args['book_type'])
+    if args.get('status'):
+        query = query.filter(Book.status == args['status'])
+    if args.get('year'):
+        try:
+            query = query.filter(Book.year_published == int(args['year']))
+        except ValueError:
+            raise ValueError('year must be an integer')
+    return query
+
+
+# Route to display books in HTML, one page at a time. ?fragment=1 renders only the
+# table body, which the page swaps in when moving between pages, sorts and filters.
 @books.route('/', methods=['GET'])
+@cached_by_version('books')
 def list_books():
-    # Fetch all books from the database
-    books = Book.query.all()
-    print('Books page accessed')
-    return render_template('books.html', books=books)
+    try:
+        sort, columns, descending, limit, after, before = parse_list_args(BOOK_SORT_COLUMNS, Book.id)
+        query = filter_books(Book.query, request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Fetch one page of books, seeking on the sort column's index
+    books, next_cursor, prev_cursor = seek_page(query, columns, limit, descending, after, before)
+    template = 'books_table_body.html' if request.args.get('fragment') else 'books.html'
+    logger.info('Books page accessed')
+    return render_template(template, books=books, sort=sort, descending=descending,
+                           next_cursor=next_cursor, prev_cursor=prev_cursor)
 
 
 # Route to fetch books in JSON format
 @books.route('/json', methods=['GET'])
+@conditional_by_version('books')
+@cached_by_version('books')
 def list_books_json():
-    # Fetch all books from the database and convert to JSON
-    books = Book.query.all()
+    try:
+        fmt = requested_format()
+        shape = requested_shape(fmt)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if fmt == 'ndjson':
+        # Stream the whole table in chunks, one JSON object per line
+        return ndjson_response(Book.query, Book.id, serialize_book)
+
+    if shape == 'columnar':
+        # Column names once and one array per book, read without ORM instances
+        try:
+            column, limit, after = parse_page_args({'id': Book.id, 'name': Book.name}) if wants_page() else (Book.id, None, None)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify(columnar_page(db.select(*BOOK_COLUMNS), column, limit, after))
+
+    if wants_page():
+        # Fetch one page of books, seeking on the primary key or the name index
+        try:
+            column, limit, after = parse_page_args({'id': Book.id, 'name': Book.name})
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        books, next_cursor = keyset_page(Book.query, column, limit, after)
+    else:
+        # Fetch all books from the database and convert to JSON
+        books = Book.query.all()
+        next_cursor = None
     # Create a list of dictionaries representing each book with the required fields
-    book_list = [{'name': book.name, 'author': book.author, 'year_published': book.year_published, 'book_type': book.book_type} for book in books]
-    return jsonify(books=book_list)
+    book_list = [serialize_book(book) for book in books]
+    return jsonify(books=book_list, next_cursor=next_cursor)
+
+
+# Route to search books by name and author, best matches first
+@books.route('/search', methods=['GET'])
+def search_books_json():
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify({'error': 'Query parameter q is required'}), 400
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+        offset = int(request.args.get('offset', 0))
+    except ValueError:
+        return jsonify({'error': 'limit and offset must be integers'}), 400
+    if limit < 1 or limit > MAX_PAGE_SIZE or offset < 0:
+        return jsonify({'error': f'limit must be between 1 and {MAX_PAGE_SIZE} and offset must not be negative'}), 400
+
+    rows, next_offset = search_books(q, limit, offset)
+    return jsonify(books=[serialize_book(row) for row in rows], next_offset=next_offset)
 
 
 # Route to create a new book
-@books.route('/create', methods=['POST', 'GET'])
+@books.route('/create', methods=['POST'])
 def create_book():
     data = request.get_json()
 
@@ -37,16 +135,39 @@ def create_book():
     try:
         # Add the new book to the session and commit to save to the database
         db.session.add(new_book)
+        count_books([(new_book.book_type, new_book.status)])
+        bump_version('books')
         db.session.commit()
-        print('Book added successfully')
+        logger.info('Book added successfully', extra={'entity_id': new_book.id, 'outcome': 'created'})
         return redirect(url_for('books.list_books'))
     except Exception as e:
         # Handle any exceptions, such as database errors
         db.session.rollback()
-        print('Error creating book')
+        logger.exception('Error creating book', extra={'outcome': 'error'})
         return jsonify({'error': f'Error creating book: {str(e)}'}), 500
 
 
+# Route to create many books at once from a JSON array, NDJSON or CSV upload
+@books.route('/bulk', methods=['POST'])
+def create_books_bulk():
+    try:
+        inserted, errors = bulk_insert_books(iter_payload_rows(request))
+    except PayloadError as e:
+        db.session.rollback()
+        logger.warning('Bulk book import stopped: %s', e, extra={'outcome': 'rejected'})
+        return jsonify({'error': str(e), 'inserted': e.inserted, 'failed': len(e.errors), 'errors': e.errors}), 400
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        logger.exception('Error creating books in bulk', extra={'outcome': 'error'})
+        return jsonify({'error': f'Error creating books: {str(e)}'}), 500
+
+    logger.info('Bulk book import finished: %d added, %d failed', inserted, len(errors), extra={'outcome': 'created'})
+    return jsonify({'inserted': inserted, 'failed': len(errors), 'errors': errors})
+
+
 # Route to update an existing book
 @books.route('/<int:book_id>/edit', methods=['POST'])
 def edit_book(book_id):
@@ -55,7 +176,7 @@ def edit_book(book_id):
     
     # Check if the book exists
     if not book:
-        print('Book not found')
+        logger.warning('Book not found', extra={'entity_id': book_id, 'outcome': 'not_found'})
         return jsonify({'error': 'Book not found'}), 404
 
     try:
@@ -63,19 +184,24 @@ def edit_book(book_id):
         data = request.get_json()
         
         # Update book details
+        old_type = book.book_type
         book.name = data.get('name', book.name)  # Update if data exists, otherwise keep the same
         book.author = data.get('author', book.author)
         book.year_published = data.get('year_published', book.year_published)
         book.book_type = data.get('book_type', book.book_type)
+        if book.book_type != old_type:
+            count_books([(old_type, book.status)], -1)
+            count_books([(book.book_type, book.status)])
         
         # Commit the changes to the database
+        bump_version('books')
         db.session.commit()
-        print('Book edited successfully')
+        logger.info('Book edited successfully', extra={'entity_id': book_id, 'outcome': 'updated'})
         return jsonify({'message': 'Book updated successfully'})
     except Exception as e:
         # Handle any exceptions
         db.session.rollback()
-        print('Error updating book')
+        logger.exception('Error updating book', extra={'entity_id': book_id, 'outcome': 'error'})
         return jsonify({'error': f'Error updating book: {str(e)}'}), 500
 
 
@@ -87,7 +213,7 @@ def get_book_for_edit(book_id):
     
     # Check if the book exists
     if not book:
-        print('Book not found')
+        logger.warning('Book not found', extra={'entity_id': book_id, 'outcome': 'not_found'})
         return jsonify({'success': False, 'error': 'Book not found'}), 404
 
     # Create a dictionary representing the book data
@@ -106,22 +232,44 @@ def get_book_for_edit(book_id):
 def delete_book(book_id):
     book = Book.query.get(book_id)
     if not book:
-        print('Book not found')
+        logger.warning('Book not found', extra={'entity_id': book_id, 'outcome': 'not_found'})
         return jsonify({'error': 'Book not found'}), 404
 
+    # Books that are out on loan are referenced by the loan and cannot be deleted
+    if book.status == 'loaned':
+        logger.warning('Book is on loan', extra={'entity_id': book_id, 'outcome': 'rejected'})
+        return jsonify({'error': 'Book is on loan and cannot be deleted'}), 400
+
     try:
         # Delete the book from the database
         db.session.delete(book)
+        count_books([(book.book_type, book.status)], -1)
+        bump_version('books')
         db.session.commit()
-        print('Book deleted successfully')
+        logger.info('Book deleted successfully', extra={'entity_id': book_id, 'outcome': 'deleted'})
         return redirect(url_for('books.list_books'))
     except Exception as e:
         # Handle any exceptions, such as database errors
         db.session.rollback()
-        print('Error deleting book')
+        logger.exception('Error deleting book', extra={'entity_id': book_id, 'outcome': 'error'})
         return jsonify({'error': f'Error deleting book: {str(e)}'}), 500
 
 
+# Route to get the details of many books by name with one IN query, e.g. ?names=a,b,c.
+# Books are returned in the requested order; names that do not exist are listed in `missing`.
+@books.route('/details', methods=['GET'])
+@cached_by_version('books')
+def get_books_details():
+    try:
+        names = parse_key_list('names')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    found = {book.name: book for book in Book.query.filter(Book.name.in_(names))}
+    return jsonify(books=[serialize_book(found[name]) for name in names if name in found],
+                   missing=[name for name in names if name not in found])
+
+
 # Route to get book details based on book name
 @books.route('/details/<string:book_name>', methods=['GET'])
 def get_book_details(book_name):
@@ -137,5 +285,5 @@ def get_book_details(book_name):
             }
             return jsonify(book=book_data)
         else:
-            print('Book not found')
+            logger.warning('Book not found', extra={'entity_id': book_name, 'outcome': 'not_found'})
             return jsonify({'error': 'Book not found'}), 404
\ No newline at end of file
@@ -0,0 +1,35 @@
+import os
+
+
+basedir = os.path.abspath(os.path.dirname(__file__))
+
+
+# Default settings, read from the environment. create_app() applies them first and then
+# the config it was given, so tests and scripts only pass what they change.
+class Config:
+    SECRET_KEY = 'supersecret' # To allow us to use forms
+    TEMPLATE_MODE = os.environ.get('TEMPLATE_MODE', 'development') # development or production
+    TEMPLATES_AUTO_RELOAD = None # Reload edited templates; follows TEMPLATE_MODE unless set
+    TEMPLATE_CACHE_DIR = os.environ.get('TEMPLATE_CACHE_DIR', os.path.join(basedir, '.template_cache')) # Compiled templates in production mode
+    ROW_FRAGMENT_CACHE = None # Cache rendered table rows; follows TEMPLATE_MODE unless set
+    ROW_FRAGMENT_CACHE_SIZE = 20000 # Rendered table rows kept per worker
+    JOB_RUNNER = os.environ.get('JOB_RUNNER', 'off') # off, thread or process: run background jobs inside the web process
+    JOB_EXECUTOR = os.environ.get('JOB_EXECUTOR', 'thread') # Pool used by `flask run-jobs`: thread or process
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2)) # Jobs run at the same time per runner
+    JOB_RESULTS_DIR = os.environ.get('JOB_RESULTS_DIR', os.path.join(basedir, 'job_results')) # Result files of finished jobs
+    JOB_POLL_INTERVAL_S = 1.0 # How often a runner looks for queued jobs and sends heartbeats
+    JOB_STALE_AFTER_S = 60 # A running job without a heartbeat for this long is resumed or failed
+    JOB_MAX_ATTEMPTS = 3 # Runs of a job before a crash marks it failed instead of resuming it
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///'+os.path.join(basedir, 'data.sqlite'))
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLITE_PROFILE = os.environ.get('SQLITE_PROFILE', 'default') # default, production or testing
+    DB_READ_ROUTING = os.environ.get('DB_READ_ROUTING', '1') == '1' # Serve GET requests from a read-only engine
+    RESPONSE_CACHE_MAX_BYTES = 32 * 1024 * 1024 # Memory budget of the catalogue response cache per worker
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO') # DEBUG, INFO, WARNING, ERROR or OFF
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1' # Request and SQL metrics served at /metrics
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', '1') == '1' # gzip responses for clients that accept it
+    COMPRESSION_LEVEL = int(os.environ.get('COMPRESSION_LEVEL', 6)) # gzip level, 1 (fastest) to 9 (smallest)
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024)) # Smaller bodies are sent uncompressed
+    GZIP_CACHE_MAX_BYTES = 16 * 1024 * 1024 # Memory budget of the gzipped list bodies kept per worker
+    SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 100)) # 0 turns the slow query log off
+    DEBUG_ENDPOINTS = os.environ.get('DEBUG_ENDPOINTS', '0') == '1' # Serve /debug/slow-queries outside debug mode
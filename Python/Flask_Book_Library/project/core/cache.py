@@ -0,0 +1,168 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+from flask import current_app, request, make_response
+from sqlalchemy.dialects.sqlite import insert
+from project import db
+from project.core.models import TableVersion
+
+
+# Default memory budget of the response cache of one worker process
+DEFAULT_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+
+# Function to bump the versions of the given tables inside the current transaction
+def bump_version(*names):
+    now = datetime.utcnow()
+    for name in names:
+        statement = insert(TableVersion).values(name=name, version=1, updated_at=now)
+        statement = statement.on_conflict_do_update(
+            index_elements=[TableVersion.name],
+            set_={'version': TableVersion.version + 1, 'updated_at': now}
+        )
+        db.session.execute(statement)
+
+
+# Function to read the current version of a table (0 if it was never changed)
+def current_version(name):
+    version = db.session.execute(db.select(TableVersion.version).where(TableVersion.name == name)).scalar()
+    return version or 0
+
+
+# Function to read the versions and change times of several tables with one query.
+# Returns ({name: version}, time of the latest change or None).
+def current_versions(names):
+    rows = db.session.execute(
+        db.select(TableVersion.name, TableVersion.version, TableVersion.updated_at).where(TableVersion.name.in_(names))
+    ).all()
+    versions = {name: 0 for name in names}
+    last_modified = None
+    for name, version, updated_at in rows:
+        versions[name] = version
+        if updated_at and (last_modified is None or updated_at > last_modified):
+            last_modified = updated_at
+    return versions, last_modified
+
+
+# In-process LRU cache of rendered responses, bounded by the total size of the bodies.
+# Each entry remembers the table version it was built from and is only served while
+# that version is still current.
+class ResponseCache:
+    def __init__(self, max_bytes=DEFAULT_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, version, body, mimetype):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (version, body, mimetype)
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key):
+        _, body, _ = self._entries.pop(key)
+        self._size -= len(body)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'size_bytes': self._size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': self.hits / total if total else 0.0
+            }
+
+
+response_cache = ResponseCache()
+
+
+# Decorator to serve a GET view from the response cache while the given table is unchanged.
+# The key is the endpoint plus its query string; streamed and non-200 responses are not cached.
+def cached_by_version(table):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            response_cache.max_bytes = current_app.config.get('RESPONSE_CACHE_MAX_BYTES', DEFAULT_CACHE_MAX_BYTES)
+            key = (request.endpoint, tuple(sorted(request.args.items(multi=True))))
+            version = current_version(table)
+
+            entry = response_cache.get(key, version)
+            if entry is not None:
+                _, body, mimetype = entry
+                response = current_app.response_class(body, mimetype=mimetype)
+                response.headers['X-Cache'] = 'HIT'
+                return response
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200 and not response.is_streamed:
+                response_cache.put(key, version, response.get_data(), response.mimetype)
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
+
+
+# Decorator to answer conditional GETs from the table versions alone. The ETag is built
+# from the versions of the tables the response depends on plus the query string, so a
+# matching If-None-Match gets a 304 before any rows are loaded or any body is built.
+# Last-Modified is only informational: at one-second granularity it cannot tell apart two
+# writes in the same second, so If-Modified-Since never produces a 304.
+def conditional_by_version(*tables):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            versions, last_modified = current_versions(tables)
+            query_hash = hashlib.md5(request.query_string).hexdigest()[:12]
+            etag = '-'.join(f'{name}{versions[name]}' for name in tables) + '-' + query_hash
+            if last_modified is not None:
+                last_modified = last_modified.replace(tzinfo=timezone.utc, microsecond=0)
+
+            # Weak comparison: the ETag is sent weak when the body is gzipped
+            if request.if_none_match.contains_weak(etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            return response
+        return wrapper
+    return decorator
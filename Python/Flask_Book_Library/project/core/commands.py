@@ -0,0 +1,42 @@
+import click
+from flask import current_app
+from project import db
+
+
+# Keep autogenerate away from the FTS5 index tables, they are created by hand-written migrations
+def include_object(object, name, type_, reflected, compare_to):
+    return not (type_ == 'table' and name.startswith('books_fts'))
+
+
+# Group standing in for Flask-Migrate's `flask db` commands. Importing Flask-Migrate pulls
+# in Alembic, a large share of the app's start-up time, so it is done only when a `flask db`
+# command actually runs (the CLI has pushed the app context by then).
+class MigrateGroup(click.Group):
+    def load(self):
+        from flask_migrate import Migrate
+        from flask_migrate.cli import db as migrate_group
+
+        app = current_app._get_current_object()
+        if 'migrate' not in app.extensions:
+            Migrate(app, db, render_as_batch=True, include_object=include_object)
+        return migrate_group
+
+    def list_commands(self, ctx):
+        return self.load().list_commands(ctx)
+
+    def get_command(self, ctx, name):
+        return self.load().get_command(ctx, name)
+
+
+# Function to register the app's CLI commands
+def register_commands(app):
+    from project.core.seed import seed_command
+    from project.core.stats import reconcile_stats_command
+    from project.core.jobs import run_jobs_command
+    from project.core.compression import compress_static_command
+
+    app.cli.add_command(MigrateGroup('db', help='Perform database migrations.'))
+    app.cli.add_command(seed_command)
+    app.cli.add_command(reconcile_stats_command)
+    app.cli.add_command(run_jobs_command)
+    app.cli.add_command(compress_static_command)
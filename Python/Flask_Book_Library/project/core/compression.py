@@ -0,0 +1,169 @@
+import gzip
+import mimetypes
+import os
+import zlib
+import click
+from flask import current_app, request, send_from_directory
+from flask.cli import with_appcontext
+from werkzeug.security import safe_join
+from project.core.cache import ResponseCache
+
+
+# Response types worth compressing; images and other binary formats are compressed already
+COMPRESSIBLE_MIMETYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/javascript',
+    'application/javascript', 'application/json', 'application/x-ndjson',
+}
+
+# Static files pre-compressed by `flask compress-static`
+PRECOMPRESSED_STATIC = ('.js', '.css')
+
+# Memory budget of the cache of gzipped bodies per worker
+DEFAULT_GZIP_CACHE_MAX_BYTES = 16 * 1024 * 1024
+
+# zlib window bits for a gzip header and trailer instead of a raw zlib stream
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+# Gzipped bodies of responses with a version ETag (conditional_by_version), keyed by path and
+# ETag, so a list served from the response cache is not compressed again on every hit
+gzip_cache = ResponseCache(DEFAULT_GZIP_CACHE_MAX_BYTES)
+
+
+# Function to check whether the client takes gzip (Accept-Encoding: gzip, or * with q > 0)
+def accepts_gzip():
+    return request.accept_encodings['gzip'] > 0
+
+
+# Function to mark a response as depending on Accept-Encoding, for caches between us and the client
+def add_vary(response):
+    response.vary.add('Accept-Encoding')
+
+
+# The same version of a resource is sent either plain or gzipped, so its ETag can only be
+# a weak one (RFC 9110 8.8.1); If-None-Match is compared weakly.
+def weaken_etag(response):
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+
+# Generator compressing a streamed body chunk by chunk. Every chunk is flushed, so the
+# client still gets each one as soon as it is produced instead of when the stream ends.
+def gzip_stream(chunks, level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, GZIP_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+# after_request hook compressing text responses for clients that accept gzip. Bodies under
+# COMPRESSION_MIN_SIZE are sent as they are, streamed bodies are compressed as they stream.
+# Files sent with send_file (job results, static files) keep their Range support and are
+# left alone; static JS and CSS are served pre-compressed instead.
+def compress_response(response):
+    if (response.mimetype not in COMPRESSIBLE_MIMETYPES or response.direct_passthrough
+            or 'Content-Encoding' in response.headers or response.status_code in (204, 206)
+            or response.status_code < 200):
+        return response
+
+    add_vary(response)
+    if not accepts_gzip():
+        return response
+    if response.status_code == 304:
+        weaken_etag(response)
+        return response
+
+    level = current_app.config['COMPRESSION_LEVEL']
+    if response.is_streamed:
+        chunks = response.response
+        response.response = gzip_stream(response.iter_encoded(), level)
+        if hasattr(chunks, 'close'):
+            response.call_on_close(chunks.close)
+        response.headers.pop('Content-Length', None)
+    else:
+        body = response.get_data()
+        if len(body) < current_app.config['COMPRESSION_MIN_SIZE']:
+            return response
+        etag, weak = response.get_etag()
+        key = (request.path, etag) if etag and not weak else None
+        entry = gzip_cache.get(key, level) if key else None
+        if entry is not None:
+            compressed = entry[1]
+        else:
+            compressed = gzip.compress(body, level, mtime=0)
+            if key:
+                gzip_cache.max_bytes = current_app.config['GZIP_CACHE_MAX_BYTES']
+                gzip_cache.put(key, level, compressed, response.mimetype)
+        response.set_data(compressed)
+
+    response.headers['Content-Encoding'] = 'gzip'
+    weaken_etag(response)
+    return response
+
+
+# Function to check that a pre-compressed file exists and is not older than its source
+def fresh_precompressed(path):
+    compressed = f'{path}.gz'
+    return os.path.isfile(compressed) and os.path.getmtime(compressed) >= os.path.getmtime(path)
+
+
+# Function to compress responses and serve pre-compressed static files (COMPRESSION_ENABLED)
+def setup_compression(app):
+    send_static_file = app.view_functions['static']
+
+    # Static view sending file.js.gz in place of file.js when it is present and up to date
+    def static(filename):
+        if not filename.endswith(PRECOMPRESSED_STATIC):
+            return send_static_file(filename=filename)
+        path = safe_join(app.static_folder, filename)
+        if path is None or not (os.path.isfile(path) and fresh_precompressed(path)):
+            return send_static_file(filename=filename)
+
+        if accepts_gzip():
+            response = send_from_directory(app.static_folder, f'{filename}.gz',
+                                           mimetype=mimetypes.guess_type(filename)[0],
+                                           max_age=app.get_send_file_max_age(filename))
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            response = send_static_file(filename=filename)
+        add_vary(response)
+        return response
+
+    app.view_functions['static'] = static
+    app.after_request(compress_response)
+
+
+# Function to write a .gz copy next to every JS and CSS file that it makes smaller
+def compress_static_files(static_folder, level=9):
+    written = []
+    for directory, _, files in os.walk(static_folder):
+        for name in sorted(files):
+            if not name.endswith(PRECOMPRESSED_STATIC):
+                continue
+            path = os.path.join(directory, name)
+            with open(path, 'rb') as f:
+                data = f.read()
+            # mtime=0 keeps the output identical between builds of the same file
+            compressed = gzip.compress(data, level, mtime=0)
+            if len(compressed) >= len(data):
+                if os.path.exists(f'{path}.gz'):
+                    os.remove(f'{path}.gz')
+                continue
+            with open(f'{path}.gz', 'wb') as f:
+                f.write(compressed)
+            written.append((os.path.relpath(path, static_folder), len(data), len(compressed)))
+    return written
+
+
+# Command to pre-compress the static JS and CSS at build time: flask --app app compress-static
+@click.command('compress-static')
+@click.option('--level', default=9, show_default=True, type=click.IntRange(1, 9), help='gzip compression level.')
+@with_appcontext
+def compress_static_command(level):
+    written = compress_static_files(current_app.static_folder, level)
+    for name, size, compressed in written:
+        click.echo(f'{name}: {size} -> {compressed} bytes')
+    click.echo(f'Pre-compressed {len(written)} static files')
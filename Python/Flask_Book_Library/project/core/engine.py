@@ -0,0 +1,100 @@
+from flask import has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql.dml import UpdateBase
+
+
+# SQLite settings applied to every new connection, selected with SQLITE_PROFILE.
+# 'production' uses WAL so readers do not wait for a writer's commit, a 64 MB page
+# cache, 256 MB of memory-mapped I/O and waits up to 5 s for a lock instead of failing.
+SQLITE_PROFILES = {
+    'default': {
+        'foreign_keys': 'ON',
+        'busy_timeout': 5000,
+    },
+    'production': {
+        'foreign_keys': 'ON',
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -64000,
+        'mmap_size': 268435456,
+        'busy_timeout': 5000,
+        'temp_store': 'MEMORY',
+    },
+    'testing': {
+        'foreign_keys': 'ON',
+        'journal_mode': 'MEMORY',
+        'synchronous': 'OFF',
+    },
+}
+
+# Name of the bind used for the read-only engine
+READER_BIND = 'reader'
+
+# Request methods that never write and can be served by the read-only engine
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+# Function to set the profile's PRAGMAs on each new DBAPI connection of an engine
+def apply_profile(engine, profile, read_only=False):
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"Unknown SQLite profile '{profile}', expected one of: {', '.join(SQLITE_PROFILES)}")
+    pragmas = SQLITE_PROFILES[profile]
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        if read_only:
+            cursor.execute('PRAGMA query_only=ON')
+        cursor.close()
+
+
+# Function to apply the configured profile and real transactions to the writer and, when
+# present, the reader engine
+def configure_engines(db, profile):
+    for key, engine in db.engines.items():
+        if engine.dialect.name == 'sqlite':
+            read_only = key == READER_BIND
+            apply_profile(engine, profile, read_only=read_only)
+            enable_savepoints(engine, immediate=not read_only)
+
+
+# Function to make SQLite SAVEPOINTs nest inside an outer transaction. pysqlite starts its
+# own transactions lazily and ignores SAVEPOINT, so the driver's handling is switched off
+# and SQLAlchemy's BEGIN is emitted explicitly instead. The writer engine begins with
+# BEGIN IMMEDIATE: it takes the write lock up front (waiting up to busy_timeout) instead of
+# failing when a transaction that started by reading tries to write after another commit.
+def enable_savepoints(engine, immediate=False):
+    begin = 'BEGIN IMMEDIATE' if immediate else 'BEGIN'
+
+    @event.listens_for(engine, 'connect')
+    def disable_driver_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, 'begin')
+    def emit_begin(connection):
+        connection.exec_driver_sql(begin)
+
+
+# Session that sends the queries of read-only requests (GET/HEAD) to the reader engine and
+# everything else to the writer engine. Writes always go to the writer, whatever the method:
+# any flush, any INSERT/UPDATE/DELETE statement and any query while changes are pending.
+# A session created with its own bind (tests joining an outer transaction) always uses that bind.
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.bind is not None:
+            return self.bind
+        if (
+            bind is None
+            and not self._flushing
+            and not isinstance(clause, UpdateBase)
+            and not (self.new or self.dirty or self.deleted)
+            and has_request_context()
+            and request.method in READ_METHODS
+        ):
+            reader = self._db.engines.get(READER_BIND)
+            if reader is not None:
+                return reader
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
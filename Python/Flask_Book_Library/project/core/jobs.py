@@ -0,0 +1,355 @@
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import func
+from sqlalchemy.exc import OperationalError
+from project import db
+from project.core.models import Job
+from project.core.streaming import iter_chunks
+from project.core.stats import rebuild_stats
+from project.books.models import Book
+from project.customers.models import Customer
+from project.loans.models import Loan
+
+
+logger = logging.getLogger(__name__)
+
+# Minimum time between two progress writes of one job
+PROGRESS_INTERVAL_S = 0.5
+
+# Attempts at recording how a job ended while another job holds the SQLite write lock
+STATUS_WRITE_ATTEMPTS = 5
+
+
+# What a running job uses to report progress and write its result file
+class JobContext:
+    def __init__(self, job, results_dir):
+        self.job_id = job.id
+        self.kind = job.kind
+        self.results_dir = results_dir
+        self.result_path = None
+        self._last_progress = 0.0
+
+    def progress(self, done, total):
+        now = time.monotonic()
+        if done < total and now - self._last_progress < PROGRESS_INTERVAL_S:
+            return
+        self._last_progress = now
+        # The read snapshot of the last chunk is ended first: in WAL mode a write that upgrades
+        # a snapshot another process has committed past fails at once instead of waiting
+        db.session.commit()
+        try:
+            db.session.execute(db.update(Job).where(Job.id == self.job_id).values(
+                progress=done / total if total else 1.0, heartbeat_at=datetime.utcnow()))
+            db.session.commit()
+        except OperationalError:
+            # Progress is best effort; a long write of another job only delays the next one
+            db.session.rollback()
+            logger.debug('Job progress not saved, the database is locked', extra={'entity_id': self.job_id})
+
+    # Opens the result file for writing. It is written under a temporary name and renamed
+    # when complete, so a job resumed after a crash never leaves half a file behind.
+    @contextmanager
+    def result(self, extension):
+        os.makedirs(self.results_dir, exist_ok=True)
+        path = os.path.join(self.results_dir, f'job-{self.job_id}-{self.kind}.{extension}')
+        partial = f'{path}.{os.getpid()}.part'
+        try:
+            with open(partial, 'w', encoding='utf-8') as f:
+                yield f
+            os.replace(partial, path)
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+        self.result_path = path
+
+    def write_json(self, data):
+        with self.result('json') as f:
+            f.write(current_app.json.dumps(data))
+
+
+# Function to export a whole table as NDJSON, one keyset chunk at a time
+def export_table(context, query, column, serialize):
+    dumps = current_app.json.dumps
+    total = query.count()
+    done = 0
+    with context.result('ndjson') as f:
+        for rows in iter_chunks(query, column):
+            f.write(''.join(dumps(serialize(row)) + '\n' for row in rows))
+            # End the chunk's transaction, so the writer engine's lock is not held between chunks
+            db.session.commit()
+            done += len(rows)
+            context.progress(done, total)
+
+
+def export_books(context, params):
+    from project.books.views import serialize_book
+    export_table(context, Book.query, Book.id, serialize_book)
+
+
+def export_customers(context, params):
+    from project.customers.views import serialize_customer
+    export_table(context, Customer.query, Customer.id, serialize_customer)
+
+
+def export_loans(context, params):
+    from project.loans.views import loans_with_names, serialize_loan
+    export_table(context, loans_with_names(), Loan.id, serialize_loan)
+
+
+def reconcile_stats(context, params):
+    corrected = rebuild_stats()
+    db.session.commit()
+    context.write_json({'corrected': corrected})
+
+
+# Overdue loans per return day as of ?as_of (default: when the job runs)
+def overdue_report(context, params):
+    from project.loans.views import DUE_PERIODS
+    as_of = datetime.fromisoformat(params['as_of']) if params.get('as_of') else datetime.utcnow()
+    period = DUE_PERIODS['day'](Loan.return_date).label('period')
+    rows = db.session.query(period, func.count()).filter(Loan.return_date < as_of).group_by(period).order_by(period).all()
+    counts = [{'period': period, 'loans': count} for period, count in rows]
+    context.write_json({'as_of': as_of.isoformat(), 'counts': counts, 'total': sum(count['loans'] for count in counts)})
+
+
+# Job kinds that can be submitted, with the parameters each one accepts
+JOB_KINDS = {
+    'export_books': (export_books, ()),
+    'export_customers': (export_customers, ()),
+    'export_loans': (export_loans, ()),
+    'reconcile_stats': (reconcile_stats, ()),
+    'overdue_report': (overdue_report, ('as_of',)),
+}
+
+
+# Function to queue a job. This is all a request does; the work happens in a job runner.
+def submit_job(kind, params=None):
+    params = params or {}
+    if kind not in JOB_KINDS:
+        raise ValueError(f"Invalid job kind '{kind}', expected one of: {', '.join(JOB_KINDS)}")
+    if not isinstance(params, dict):
+        raise ValueError('params must be an object')
+    unknown = set(params) - set(JOB_KINDS[kind][1])
+    if unknown:
+        raise ValueError(f"Unknown parameters for {kind}: {', '.join(sorted(unknown))}")
+
+    job = Job(kind, json.dumps(params))
+    db.session.add(job)
+    db.session.commit()
+    logger.info('Job queued', extra={'entity_id': job.id, 'outcome': 'queued'})
+    return job
+
+
+# Function to take the oldest queued job. The claim is one UPDATE, so two runners (threads
+# or processes) never get the same job. Returns the job id or None when the queue is empty.
+def claim_job(worker):
+    now = datetime.utcnow()
+    oldest = db.select(Job.id).where(Job.status == 'queued').order_by(Job.id).limit(1).scalar_subquery()
+    job_id = db.session.execute(
+        db.update(Job).where(Job.id == oldest, Job.status == 'queued')
+        .values(status='running', worker=worker, started_at=now, heartbeat_at=now, attempts=Job.attempts + 1)
+        .returning(Job.id)
+    ).scalar()
+    db.session.commit()
+    return job_id
+
+
+# Function to record how a job ended, retried while another job holds the write lock
+def finish_job(job_id, **values):
+    for attempt in range(1, STATUS_WRITE_ATTEMPTS + 1):
+        try:
+            db.session.execute(db.update(Job).where(Job.id == job_id).values(finished_at=datetime.utcnow(), **values))
+            db.session.commit()
+            return
+        except OperationalError:
+            db.session.rollback()
+            if attempt == STATUS_WRITE_ATTEMPTS:
+                raise
+
+
+# Function to run a claimed job and record how it ended
+def execute_job(job_id):
+    job = db.session.get(Job, job_id)
+    function, _ = JOB_KINDS[job.kind]
+    context = JobContext(job, current_app.config['JOB_RESULTS_DIR'])
+    start = time.perf_counter()
+    try:
+        function(context, json.loads(job.params))
+    except Exception as e:
+        db.session.rollback()
+        finish_job(job_id, status='failed', error=str(e))
+        logger.exception('Job failed', extra={'entity_id': job_id, 'outcome': 'error'})
+        return
+
+    finish_job(job_id, status='succeeded', progress=1.0, result_path=context.result_path)
+    logger.info('Job finished in %.1f s', time.perf_counter() - start, extra={'entity_id': job_id, 'outcome': 'succeeded'})
+
+
+# Function to deal with jobs whose runner stopped sending heartbeats (the process crashed
+# or was killed). They are queued again to be resumed from the start, or failed once they
+# have used up their attempts. Returns the number of jobs requeued and failed.
+def recover_stale_jobs(stale_after_s, max_attempts):
+    stale = datetime.utcnow() - timedelta(seconds=stale_after_s)
+    running = (Job.status == 'running', Job.heartbeat_at < stale)
+    requeued = db.session.execute(db.update(Job).where(*running, Job.attempts < max_attempts).values(
+        status='queued', worker=None, progress=0.0)).rowcount
+    failed = db.session.execute(db.update(Job).where(*running).values(
+        status='failed', error='The worker running the job stopped', finished_at=datetime.utcnow())).rowcount
+    db.session.commit()
+    if requeued or failed:
+        logger.warning('Recovered stale jobs: %d requeued, %d failed', requeued, failed, extra={'outcome': 'recovered'})
+    return requeued, failed
+
+
+# Function to refresh the heartbeat of the jobs a runner is working on
+def touch_jobs(job_ids):
+    if job_ids:
+        db.session.execute(db.update(Job).where(Job.id.in_(job_ids), Job.status == 'running').values(
+            heartbeat_at=datetime.utcnow()))
+        db.session.commit()
+
+
+_process_app = None
+
+
+# Initializer of the pool processes: each one builds its own app on the same database
+def init_job_process(config):
+    global _process_app
+    from project import create_app
+    _process_app = create_app(config)
+
+
+def execute_job_in_process(job_id):
+    with _process_app.app_context():
+        execute_job(job_id)
+
+
+# Runs queued jobs on a thread or process pool. A dispatcher thread claims jobs while the
+# pool has free workers, sends heartbeats for the running ones and recovers stale jobs.
+class JobRunner:
+    def __init__(self, app, workers=None, executor=None, poll_interval_s=None):
+        self.app = app
+        self.workers = workers or app.config['JOB_WORKERS']
+        self.executor_kind = executor or app.config['JOB_EXECUTOR']
+        self.poll_interval_s = poll_interval_s or app.config['JOB_POLL_INTERVAL_S']
+        self.name = f'{socket.gethostname()}:{os.getpid()}'
+        self.running = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self._pool = None
+
+    def _make_pool(self):
+        if self.executor_kind == 'process':
+            config = {key: self.app.config[key] for key in ('SQLALCHEMY_DATABASE_URI', 'SQLITE_PROFILE', 'JOB_RESULTS_DIR')}
+            config.update(JOB_RUNNER='off', METRICS_ENABLED=False)
+            # Spawned, not forked: a forked worker would share the parent's open SQLite connections
+            return ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'),
+                                       initializer=init_job_process, initargs=(config,))
+        return ThreadPoolExecutor(self.workers, thread_name_prefix='job')
+
+    def _run_in_thread(self, job_id):
+        with self.app.app_context():
+            execute_job(job_id)
+
+    def _finished(self, job_id, future):
+        self.running.pop(job_id, None)
+        error = future.exception()
+        if error is not None:
+            # The pool itself failed (e.g. a worker process died), not the job code
+            with self.app.app_context():
+                db.session.execute(db.update(Job).where(Job.id == job_id, Job.status == 'running').values(
+                    status='failed', error=f'Job worker failed: {error}', finished_at=datetime.utcnow()))
+                db.session.commit()
+
+    # Claims queued jobs until the pool is busy or the queue is empty; returns how many were started
+    def dispatch(self):
+        started = 0
+        with self.app.app_context():
+            touch_jobs(list(self.running))
+            recover_stale_jobs(self.app.config['JOB_STALE_AFTER_S'], self.app.config['JOB_MAX_ATTEMPTS'])
+            while len(self.running) < self.workers:
+                job_id = claim_job(self.name)
+                if job_id is None:
+                    break
+                if self.executor_kind == 'process':
+                    future = self._pool.submit(execute_job_in_process, job_id)
+                else:
+                    future = self._pool.submit(self._run_in_thread, job_id)
+                self.running[job_id] = future
+                future.add_done_callback(lambda future, job_id=job_id: self._finished(job_id, future))
+                started += 1
+        return started
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.dispatch()
+            except Exception:
+                logger.exception('Job dispatch failed', extra={'outcome': 'error'})
+            self._stop.wait(self.poll_interval_s)
+
+    def start(self):
+        self._pool = self._make_pool()
+        self._thread = threading.Thread(target=self._loop, name='job-dispatcher', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, wait=True):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+
+    # Runs queued jobs one after another in the calling thread until the queue is empty;
+    # used by `flask run-jobs --once` and the tests. Returns the number of jobs run.
+    def drain(self):
+        count = 0
+        with self.app.app_context():
+            recover_stale_jobs(self.app.config['JOB_STALE_AFTER_S'], self.app.config['JOB_MAX_ATTEMPTS'])
+            while (job_id := claim_job(self.name)) is not None:
+                execute_job(job_id)
+                count += 1
+        return count
+
+
+# Function to start a job runner inside the app process when JOB_RUNNER is thread or process
+def setup_job_runner(app):
+    # Spawned pool workers import the main module again (e.g. `python app.py`); they never run their own
+    if app.config['JOB_RUNNER'] == 'off' or multiprocessing.parent_process() is not None:
+        return None
+    runner = JobRunner(app, executor=app.config['JOB_RUNNER']).start()
+    app.extensions['job_runner'] = runner
+    return runner
+
+
+# Command to run queued jobs in a separate process: flask --app app run-jobs
+@click.command('run-jobs')
+@click.option('--workers', default=None, type=int, help='Jobs run at the same time (default: JOB_WORKERS).')
+@click.option('--executor', type=click.Choice(['thread', 'process']), default=None, help='Pool type (default: JOB_EXECUTOR).')
+@click.option('--once', is_flag=True, help='Run the queued jobs one by one and exit when the queue is empty.')
+@with_appcontext
+def run_jobs_command(workers, executor, once):
+    runner = JobRunner(current_app._get_current_object(), workers=workers, executor=executor)
+    if once:
+        click.echo(f'Ran {runner.drain()} jobs')
+        return
+
+    runner.start()
+    click.echo(f'Running jobs with {runner.workers} {runner.executor_kind} workers, press Ctrl+C to stop')
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        runner.stop()
@@ -0,0 +1,101 @@
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+from flask import g, has_request_context, request
+
+
+# Extra fields copied from a log record into the structured output
+RECORD_FIELDS = ('route', 'method', 'entity_id', 'outcome', 'status', 'duration_ms')
+
+# LOG_LEVEL value that switches application logging off entirely
+LOG_LEVEL_OFF = 'OFF'
+
+
+# Formatter writing one JSON object per line
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for field in RECORD_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                data[field] = value
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data['exception'] = record.exc_text
+        return json.dumps(data, default=str)
+
+
+# Filter adding the route and the time spent in the request so far to every record
+# logged while handling a request. It runs on the request thread, before queueing.
+class RequestContextFilter(logging.Filter):
+    def filter(self, record):
+        if has_request_context():
+            record.route = getattr(record, 'route', None) or request.endpoint
+            record.method = getattr(record, 'method', None) or request.method
+            started = g.get('log_request_started')
+            if started is not None and getattr(record, 'duration_ms', None) is None:
+                record.duration_ms = round((time.perf_counter() - started) * 1000, 3)
+        return True
+
+
+# Queue handler that keeps the exception separate from the message, so the listener
+# thread can still write it as its own field
+class StructuredQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+# Function to set up the 'project' logger. Request threads only put records on an
+# in-memory queue; a background listener thread formats and writes them, so a slow
+# stdout/stderr pipe never blocks a worker.
+def setup_logging(app):
+    logger = logging.getLogger('project')
+    level = str(app.config.get('LOG_LEVEL', 'INFO')).upper()
+
+    logger.propagate = False
+    if level == LOG_LEVEL_OFF:
+        # Above CRITICAL, so every child logger returns from isEnabledFor() without building a record
+        logger.setLevel(logging.CRITICAL + 1)
+        return logger
+    logger.setLevel(level)
+
+    # The logger is shared by every app of the process, only the first one starts a listener
+    if not any(isinstance(handler, StructuredQueueHandler) for handler in logger.handlers):
+        log_queue = queue.SimpleQueue()
+        queue_handler = StructuredQueueHandler(log_queue)
+        queue_handler.addFilter(RequestContextFilter())
+        logger.addHandler(queue_handler)
+
+        stream_handler = logging.StreamHandler(sys.stderr)
+        stream_handler.setFormatter(JsonFormatter())
+        listener = logging.handlers.QueueListener(log_queue, stream_handler)
+        listener.start()
+        atexit.register(listener.stop)
+
+    @app.before_request
+    def start_request_timer():
+        g.log_request_started = time.perf_counter()
+
+    @app.after_request
+    def log_request(response):
+        logging.getLogger('project.request').debug('Request finished', extra={'status': response.status_code})
+        return response
+
+    return logger
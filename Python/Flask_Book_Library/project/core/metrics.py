@@ -0,0 +1,178 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from flask import g, has_app_context, request
+from sqlalchemy import event
+
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Upper bounds of the SQL-statements-per-request histogram buckets
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250)
+
+PROMETHEUS_MIMETYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+# Cumulative histogram with fixed buckets, as used by the Prometheus text format
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            yield bound, total
+
+
+# Per-process metrics of requests and SQL statements. Updates take one lock and a few
+# dictionary operations, so they are cheap enough to leave on in production.
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = defaultdict(int)
+        self.latency = {}
+        self.queries_per_request = {}
+        self.sql_statements = defaultdict(int)
+        self.sql_seconds = defaultdict(float)
+
+    def observe_request(self, endpoint, method, status, duration, sql_count, sql_seconds):
+        with self._lock:
+            self.requests[(endpoint, method, status)] += 1
+            key = (endpoint, method)
+            if key not in self.latency:
+                self.latency[key] = Histogram(LATENCY_BUCKETS)
+                self.queries_per_request[key] = Histogram(QUERY_COUNT_BUCKETS)
+            self.latency[key].observe(duration)
+            self.queries_per_request[key].observe(sql_count)
+            self.sql_statements[endpoint] += sql_count
+            self.sql_seconds[endpoint] += sql_seconds
+
+    def observe_statement(self, duration):
+        # Statements run outside a request (CLI commands, background work)
+        with self._lock:
+            self.sql_statements[None] += 1
+            self.sql_seconds[None] += duration
+
+    def render(self, extra_gauges=None):
+        with self._lock:
+            lines = []
+
+            lines.append('# HELP http_requests_total Requests handled, by endpoint, method and status code.')
+            lines.append('# TYPE http_requests_total counter')
+            for (endpoint, method, status), count in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{labels(endpoint=endpoint, method=method, status=status)} {count}')
+
+            render_histograms(lines, 'http_request_duration_seconds', 'Request latency in seconds.', self.latency)
+            render_histograms(lines, 'http_request_sql_statements', 'SQL statements issued per request.', self.queries_per_request)
+
+            lines.append('# HELP sql_statements_total SQL statements executed, by endpoint.')
+            lines.append('# TYPE sql_statements_total counter')
+            for endpoint, count in sorted(self.sql_statements.items(), key=lambda item: item[0] or ''):
+                lines.append(f'sql_statements_total{labels(endpoint=endpoint or "none")} {count}')
+
+            lines.append('# HELP sql_duration_seconds_total Time spent executing SQL statements, by endpoint.')
+            lines.append('# TYPE sql_duration_seconds_total counter')
+            for endpoint, seconds in sorted(self.sql_seconds.items(), key=lambda item: item[0] or ''):
+                lines.append(f'sql_duration_seconds_total{labels(endpoint=endpoint or "none")} {seconds:.6f}')
+
+        for name, (help_text, value) in (extra_gauges or {}).items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} gauge')
+            lines.append(f'{name} {value}')
+
+        return '\n'.join(lines) + '\n'
+
+
+# Function to format Prometheus labels, escaping backslashes, quotes and newlines
+def labels(**values):
+    parts = []
+    for name, value in values.items():
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{name}="{value}"')
+    return '{' + ','.join(parts) + '}'
+
+
+# Function to append histograms keyed by (endpoint, method) in Prometheus format
+def render_histograms(lines, name, help_text, histograms):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} histogram')
+    for (endpoint, method), histogram in sorted(histograms.items()):
+        for bound, total in histogram.cumulative():
+            le = '+Inf' if bound == float('inf') else repr(float(bound))
+            lines.append(f'{name}_bucket{labels(endpoint=endpoint, method=method, le=le)} {total}')
+        lines.append(f'{name}_sum{labels(endpoint=endpoint, method=method)} {histogram.sum:.6f}')
+        lines.append(f'{name}_count{labels(endpoint=endpoint, method=method)} {histogram.count}')
+
+
+metrics = Metrics()
+
+
+# Function to time every SQL statement of an engine. Inside a request the count and
+# duration are added to the request (flask.g); otherwise straight to the totals.
+def instrument_engine(engine):
+    @event.listens_for(engine, 'before_cursor_execute')
+    def start_statement_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('metrics_statement_started', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def stop_statement_timer(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info['metrics_statement_started'].pop()
+        if has_app_context() and 'metrics_request_started' in g:
+            g.metrics_sql_count += 1
+            g.metrics_sql_seconds += duration
+        else:
+            metrics.observe_statement(duration)
+
+    @event.listens_for(engine, 'handle_error')
+    def drop_statement_timer(context):
+        if context.connection is not None and context.connection.info.get('metrics_statement_started'):
+            context.connection.info['metrics_statement_started'].pop()
+
+
+# Function to register the request hooks and SQL instrumentation on the app
+def setup_metrics(app, db):
+    with app.app_context():
+        for engine in db.engines.values():
+            instrument_engine(engine)
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_request_started = time.perf_counter()
+        g.metrics_sql_count = 0
+        g.metrics_sql_seconds = 0.0
+
+    @app.after_request
+    def keep_response_status(response):
+        g.metrics_status = response.status_code
+        return response
+
+    # Recorded on teardown, which also runs when the view raises and after_request is skipped;
+    # a request that ended in an exception is counted as a 500
+    @app.teardown_request
+    def record_request_metrics(exception):
+        started = g.pop('metrics_request_started', None)
+        if started is not None:
+            metrics.observe_request(
+                request.endpoint or 'unknown',
+                request.method,
+                500 if exception is not None else g.get('metrics_status', 500),
+                time.perf_counter() - started,
+                g.metrics_sql_count,
+                g.metrics_sql_seconds
+            )
@@ -0,0 +1,65 @@
+from datetime import datetime
+from project import db
+
+
+# Change counter per table. Writers bump it in the same transaction as their change,
+# so every worker process sees the same version by reading one row.
+class TableVersion(db.Model):
+    __tablename__ = 'table_versions'
+    name = db.Column(db.String(32), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __init__(self, name, version=0):
+        self.name = name
+        self.version = version
+
+    def __repr__(self):
+        return f"TableVersion(Name: {self.name}, Version: {self.version}, Updated: {self.updated_at})"
+
+
+# Running count of rows per group shown by /stats, e.g. ('books.book_type', '5days'). Writers
+# change it in the same transaction as the rows it counts; `flask reconcile-stats` rebuilds it.
+class StatCounter(db.Model):
+    __tablename__ = 'stat_counters'
+    name = db.Column(db.String(32), primary_key=True)
+    key = db.Column(db.String(64), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+    def __init__(self, name, key, value=0):
+        self.name = name
+        self.key = key
+        self.value = value
+
+    def __repr__(self):
+        return f"StatCounter(Name: {self.name}, Key: {self.key}, Value: {self.value})"
+
+
+# Background job (export, report, reconciliation). Requests only insert queued rows; a job
+# runner claims them, runs them and records progress and the result file here, so status
+# survives restarts and any process can answer a poll.
+class Job(db.Model):
+    __tablename__ = 'jobs'
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(32), nullable=False)
+    params = db.Column(db.Text, nullable=False, default='{}')  # JSON
+    status = db.Column(db.String(16), nullable=False, default='queued', index=True)  # queued, running, succeeded or failed
+    progress = db.Column(db.Float, nullable=False, default=0.0)  # 0 to 1
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    worker = db.Column(db.String(64))
+    result_path = db.Column(db.String(256))
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def __init__(self, kind, params='{}'):
+        self.kind = kind
+        self.params = params
+        self.status = 'queued'
+        self.progress = 0.0
+        self.attempts = 0
+
+    def __repr__(self):
+        return f"Job(ID: {self.id}, Kind: {self.kind}, Status: {self.status}, Progress: {self.progress:.0%})"
@@ -0,0 +1,213 @@
+import base64
+import json
+from datetime import date, datetime
+from flask import request, url_for
+from sqlalchemy import and_, or_, tuple_
+
+
+# Page size limits for keyset (cursor) pagination
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Rows per page of the HTML lists
+LIST_PAGE_SIZE = 50
+
+# Above every character SQLite stores, so [prefix, prefix + PREFIX_END) holds exactly the
+# strings starting with prefix
+PREFIX_END = '\U0010ffff'
+
+# Query arguments describing the page position rather than the list itself
+PAGE_POSITION_ARGS = ('after', 'before', 'fragment')
+
+
+# Function to read ?limit=, ?after= and ?sort= from the query string.
+# sort_columns maps the allowed sort names to indexed columns. The cursor of the primary key
+# is its plain value, any other column pages on (column, id) with an opaque cursor.
+def parse_page_args(sort_columns, default_sort='id'):
+    sort = request.args.get('sort', default_sort)
+    if sort not in sort_columns:
+        raise ValueError(f"Invalid sort column '{sort}', expected one of: {', '.join(sort_columns)}")
+    column = sort_columns[sort]
+
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE)
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise ValueError('limit must be an integer')
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        raise ValueError(f'limit must be between 1 and {MAX_PAGE_SIZE}')
+
+    after = request.args.get('after')
+    if after is not None and not column.primary_key:
+        after = decode_cursor(after, page_columns(column))
+    elif after is not None:
+        try:
+            after = column.type.python_type(after)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid cursor '{after}'")
+
+    return column, limit, after
+
+
+# Function to check whether the client asked for a page instead of the full list
+def wants_page():
+    return 'limit' in request.args or 'after' in request.args
+
+
+# Function to list the columns a page is ordered by: the sort column, then the primary key
+# to order rows with equal or NULL sort values, unless the sort column is the primary key
+def page_columns(column):
+    if column.primary_key:
+        return [column]
+    return [column, list(column.table.primary_key)[0]]
+
+
+# Function to build the condition of the rows after `cursor` in the order of `columns`, or
+# before it with `reverse`. SQLite sorts NULL before every value and a comparison with NULL
+# is never true, so rows with a NULL sort value are matched on their own; the last column
+# is the primary key and never NULL.
+def seek_condition(columns, cursor, reverse=False):
+    if len(columns) == 1:
+        return columns[0] < cursor[0] if reverse else columns[0] > cursor[0]
+
+    column, key = columns
+    value, key_value = cursor
+    if value is None:
+        nulls = and_(column.is_(None), key < key_value if reverse else key > key_value)
+        return nulls if reverse else or_(nulls, column.isnot(None))
+    if reverse:
+        return or_(tuple_(column, key) < tuple_(value, key_value), column.is_(None))
+    return tuple_(column, key) > tuple_(value, key_value)
+
+
+# Function to fetch one page by seeking on the sort column instead of using OFFSET,
+# so every page costs one index range scan no matter how deep the client is.
+# `after` is the cursor as parse_page_args() returns it.
+def keyset_page(query, column, limit, after=None):
+    columns = page_columns(column)
+    if after is not None:
+        query = query.filter(seek_condition(columns, after if len(columns) > 1 else [after]))
+    rows = query.order_by(*columns).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        values = [getattr(rows[-1], column.key) for column in columns]
+        next_cursor = encode_cursor(values) if len(columns) > 1 else values[0]
+    return rows, next_cursor
+
+
+# Function to filter a column on a prefix with a range the column's index can seek, unlike LIKE
+def starts_with(column, prefix):
+    return and_(column >= prefix, column < prefix + PREFIX_END)
+
+
+# Function to turn the sort values of a row into an opaque cursor for the query string
+def encode_cursor(values):
+    data = json.dumps([value.isoformat() if isinstance(value, (date, datetime)) else value for value in values])
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, columns):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError
+        return [
+            None if value is None
+            else column.type.python_type.fromisoformat(value) if column.type.python_type in (date, datetime)
+            else column.type.python_type(value)
+            for column, value in zip(columns, values)
+        ]
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid cursor '{cursor}'")
+
+
+# Function to read ?sort=, ?dir=, ?limit= and ?after= or ?before= of an HTML list.
+# Rows are ordered by the sort column and then the primary key, so a non-unique sort
+# column still pages exactly. Returns the sort name, the ordering columns, whether the
+# order is descending, the page size and the decoded cursors.
+def parse_list_args(sort_columns, id_column, default_sort='id', default_limit=LIST_PAGE_SIZE):
+    sort = request.args.get('sort', default_sort)
+    if sort not in sort_columns:
+        raise ValueError(f"Invalid sort column '{sort}', expected one of: {', '.join(sort_columns)}")
+    column = sort_columns[sort]
+    columns = [column] if column is id_column else [column, id_column]
+
+    direction = request.args.get('dir', 'asc')
+    if direction not in ('asc', 'desc'):
+        raise ValueError("dir must be 'asc' or 'desc'")
+
+    try:
+        limit = int(request.args.get('limit', default_limit))
+    except (TypeError, ValueError):
+        raise ValueError('limit must be an integer')
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        raise ValueError(f'limit must be between 1 and {MAX_PAGE_SIZE}')
+
+    after = request.args.get('after')
+    before = request.args.get('before')
+    if after is not None and before is not None:
+        raise ValueError('Use either after or before, not both')
+    after = decode_cursor(after, columns) if after is not None else None
+    before = decode_cursor(before, columns) if before is not None else None
+
+    return sort, columns, direction == 'desc', limit, after, before
+
+
+# Function to fetch the page following `after` or preceding `before`, seeking on the
+# (sort column, id) index in either direction. Returns the rows and the cursors of the
+# next and previous pages (None at either end of the list).
+def seek_page(query, columns, limit, descending=False, after=None, before=None):
+    forward = before is None
+    cursor = after if forward else before
+    # Walking backwards reads the index the other way, then the page is flipped back
+    reverse = descending if forward else not descending
+
+    if cursor is not None:
+        query = query.filter(seek_condition(columns, cursor, reverse))
+    query = query.order_by(*[column.desc() if reverse else column for column in columns])
+    rows = query.limit(limit + 1).all()
+
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if not forward:
+        rows.reverse()
+    if not rows:
+        return rows, None, None
+
+    def row_cursor(row):
+        return encode_cursor([getattr(row, column.key) for column in columns])
+
+    next_cursor = row_cursor(rows[-1]) if (more if forward else True) else None
+    prev_cursor = row_cursor(rows[0]) if (cursor is not None if forward else more) else None
+    return rows, next_cursor, prev_cursor
+
+
+# Function to build the URL of the current list with some arguments changed; the page
+# position is dropped unless given again
+def list_url(**changes):
+    args = {key: value for key, value in request.args.items() if key not in PAGE_POSITION_ARGS}
+    args.update(changes)
+    return url_for(request.endpoint, **{key: value for key, value in args.items() if value not in (None, '')})
+
+
+# Function to read a comma separated list of keys such as ?ids=1,2,3 for the batch
+# endpoints; the parameter may also be repeated. Duplicates are dropped, order is kept.
+def parse_key_list(name, convert=str):
+    keys = {}
+    for value in request.args.getlist(name):
+        for key in value.split(','):
+            key = key.strip()
+            if not key:
+                continue
+            try:
+                key = convert(key)
+            except ValueError:
+                raise ValueError(f"Invalid value '{key}' in {name}")
+            keys[key] = None
+    if not keys:
+        raise ValueError(f'Query parameter {name} is required')
+    if len(keys) > MAX_PAGE_SIZE:
+        raise ValueError(f'At most {MAX_PAGE_SIZE} values of {name} can be requested at once')
+    return list(keys)
@@ -0,0 +1,264 @@
+import random
+import time
+from itertools import accumulate, islice
+from datetime import date, datetime, timedelta
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import text
+from project import db
+from project.books.models import Book, BOOKS_FTS_DDL
+from project.customers.models import Customer
+from project.loans.models import Loan
+from project.core.cache import bump_version
+from project.core.stats import rebuild_stats
+
+
+# Rows sent to the database per executemany call
+SEED_BATCH_SIZE = 50000
+
+# Columns filled by the generators, in the order of the tuples they yield
+BOOK_COLUMNS = ('id', 'name', 'author', 'year_published', 'book_type', 'status', 'updated_at')
+CUSTOMER_COLUMNS = ('id', 'name', 'city', 'age', 'pesel', 'street', 'appNo', 'updated_at')
+LOAN_COLUMNS = ('id', 'customer_id', 'book_id', 'loan_date', 'return_date', 'updated_at')
+
+# Storage format of SQLAlchemy's SQLite DateTime, so seeded values read back like ORM-written ones
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+
+# Loan period of each book type, and how often each type is generated
+LOAN_DAYS = {'2days': 2, '5days': 5, '10days': 10}
+BOOK_TYPE_WEIGHTS = (('10days', 6), ('5days', 3), ('2days', 1))
+
+ADJECTIVES = ('Silent', 'Hidden', 'Last', 'Golden', 'Broken', 'Forgotten', 'Dark', 'Endless', 'Secret', 'Wild',
+              'Crimson', 'Distant', 'Frozen', 'Lost', 'Burning', 'Quiet', 'Ancient', 'Bright', 'Hollow', 'Northern')
+NOUNS = ('River', 'Garden', 'Kingdom', 'Letter', 'Forest', 'Winter', 'City', 'Shadow', 'Voyage', 'House',
+         'Mountain', 'Island', 'Promise', 'Road', 'Storm', 'Empire', 'Song', 'Harbour', 'Mirror', 'Sea')
+FIRST_NAMES = ('Anna', 'Jan', 'Maria', 'Piotr', 'Katarzyna', 'Andrzej', 'Małgorzata', 'Krzysztof', 'Agnieszka',
+               'Tomasz', 'Barbara', 'Paweł', 'Ewa', 'Michał', 'Zofia', 'Marcin', 'Magdalena', 'Jakub', 'Joanna', 'Adam')
+LAST_NAMES = ('Nowak', 'Kowalski', 'Wiśniewski', 'Wójcik', 'Kowalczyk', 'Kamiński', 'Lewandowski', 'Zieliński',
+              'Szymański', 'Woźniak', 'Dąbrowski', 'Kozłowski', 'Jankowski', 'Mazur', 'Kwiatkowski', 'Krawczyk')
+# Cities with weights roughly following their population
+CITIES = (('Warszawa', 18), ('Kraków', 8), ('Wrocław', 6), ('Łódź', 6), ('Poznań', 5), ('Gdańsk', 5),
+          ('Szczecin', 4), ('Bydgoszcz', 3), ('Lublin', 3), ('Białystok', 3), ('Katowice', 3), ('Gdynia', 2),
+          ('Rzeszów', 2), ('Toruń', 2), ('Kielce', 2), ('Olsztyn', 2), ('Opole', 1), ('Zielona Góra', 1))
+STREETS = ('Długa', 'Krótka', 'Polna', 'Leśna', 'Słoneczna', 'Ogrodowa', 'Lipowa', 'Szkolna', 'Kościuszki',
+           'Mickiewicza', 'Kwiatowa', 'Sienkiewicza', 'Parkowa', 'Kolejowa', 'Piłsudskiego', 'Jana Pawła II')
+
+PESEL_WEIGHTS = (1, 3, 7, 9, 1, 3, 7, 9, 1, 3)
+
+# Skew of the popularity draws: an index is picked as int(n * random() ** skew), so higher
+# values put more of the rows on the first few authors, cities and customers
+AUTHOR_SKEW = 2.0
+BORROWER_SKEW = 2.5
+LOANED_BOOK_SKEW = 3.0
+
+
+# Names depend only on the row index, so callers (benchmarks, tests) can address seeded rows
+def book_name(index):
+    return f'{ADJECTIVES[index % 20]} {NOUNS[index // 20 % 20]} {index + 1}'
+
+
+def customer_name(index):
+    return f'{FIRST_NAMES[index % 20]} {LAST_NAMES[index // 20 % 16]} {index + 1}'
+
+
+def book_type(index):
+    # Cheap deterministic spread over the weights, without keeping a list of generated types
+    slot = (index * 2654435761 >> 7) % 10
+    for name, weight in BOOK_TYPE_WEIGHTS:
+        if slot < weight:
+            return name
+        slot -= weight
+
+
+def skewed(rnd, n, skew):
+    return int(n * rnd.random() ** skew)
+
+
+CITY_NAMES = [city for city, _ in CITIES]
+CITY_CUM_WEIGHTS = list(accumulate(weight for _, weight in CITIES))
+
+
+# Function to build a PESEL for a birth date: the month carries the century (+80 for 1800s,
+# +20 for 2000s), the tenth digit the sex and the last digit the checksum
+def pesel(birth_date, serial, female):
+    month = birth_date.month + {18: 80, 19: 0, 20: 20}[birth_date.year // 100]
+    digits = f'{birth_date.year % 100:02d}{month:02d}{birth_date.day:02d}{serial % 1000:03d}{(serial % 5) * 2 + (0 if female else 1)}'
+    checksum = (10 - sum(int(digit) * weight for digit, weight in zip(digits, PESEL_WEIGHTS)) % 10) % 10
+    return digits + str(checksum)
+
+
+def author_name(index):
+    return f'{FIRST_NAMES[index % 20]} {LAST_NAMES[index // 20 % 16]}{" " + str(index // 320 + 1) if index >= 320 else ""}'
+
+
+def generate_books(rnd, count, authors, loaned, updated_at):
+    author_names = [author_name(index) for index in range(authors)]
+    for i in range(count):
+        yield (
+            i + 1,
+            book_name(i),
+            author_names[skewed(rnd, authors, AUTHOR_SKEW)],
+            min(int(rnd.triangular(1850, 2026, 2015)), 2025),
+            book_type(i),
+            'loaned' if loaned[i] else 'available',
+            updated_at,
+        )
+
+
+def generate_customers(rnd, count, as_of, updated_at):
+    for i in range(count):
+        birth_date = as_of - timedelta(days=rnd.randint(16, 85) * 365 + rnd.randrange(365))
+        yield (
+            i + 1,
+            customer_name(i),
+            rnd.choices(CITY_NAMES, cum_weights=CITY_CUM_WEIGHTS)[0],
+            (as_of - birth_date).days // 365,
+            pesel(birth_date, rnd.randrange(10000), female=i % 2 == 0),
+            f'{STREETS[rnd.randrange(len(STREETS))]} {rnd.randint(1, 200)}',
+            str(rnd.randint(1, 120)),
+            updated_at,
+        )
+
+
+# Function to pick which books are out on loan, favouring low ids (the popular titles).
+# A bytearray with one byte per book keeps this at ~1 MB per million books. A draw that
+# hits a loaned book is retried a few times, then falls back to a uniform pick.
+def pick_loaned_books(rnd, books, loans):
+    loaned = bytearray(books)
+    for _ in range(loans):
+        for _ in range(3):
+            index = skewed(rnd, books, LOANED_BOOK_SKEW)
+            if not loaned[index]:
+                break
+        while loaned[index]:
+            index = rnd.randrange(books)
+        loaned[index] = 1
+    return loaned
+
+
+def generate_loans(rnd, loaned, customers, as_of, updated_at):
+    midnight = datetime.combine(as_of, datetime.min.time())
+    loan_id = 0
+    for index, is_loaned in enumerate(loaned):
+        if not is_loaned:
+            continue
+        loan_id += 1
+        # Most loans are recent, a tail of them is past the return date
+        loan_date = midnight - timedelta(days=min(int(rnd.expovariate(1 / 6)), 120))
+        yield (
+            loan_id,
+            skewed(rnd, customers, BORROWER_SKEW) + 1,
+            index + 1,
+            loan_date.strftime(DATETIME_FORMAT),
+            (loan_date + timedelta(days=LOAN_DAYS[book_type(index)])).strftime(DATETIME_FORMAT),
+            updated_at,
+        )
+
+
+# Function to insert tuples from a generator in batches of executemany calls. The rows go
+# to the driver as they are, skipping SQLAlchemy's per-row parameter and type processing,
+# which otherwise costs more than the inserts themselves.
+def insert_rows(connection, table, columns, rows, batch_size):
+    statement = (f'INSERT INTO "{table.name}" ({", ".join(columns)}) '
+                 f'VALUES ({", ".join("?" for _ in columns)})')
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        connection.exec_driver_sql(statement, batch)
+
+
+# Function to fill empty books, customers and Loans tables with deterministic synthetic data.
+# Everything runs in the session's transaction on its connection, with executemany inserts of explicit
+# ids so loans can reference books and customers without reading anything back. The FTS triggers
+# are dropped while books load and the index is rebuilt once at the end. With `truncate` the
+# existing rows are deleted in the same transaction, so a seed that fails leaves them in place.
+def seed_database(books, customers, loans, seed=0, as_of=None, batch_size=None, truncate=False):
+    if loans > books:
+        raise ValueError('Cannot loan more books than there are')
+    if loans and not customers:
+        raise ValueError('Loans need at least one customer')
+    batch_size = batch_size or SEED_BATCH_SIZE
+    as_of = as_of or date.today()
+    rnd = random.Random(seed)
+    authors = max(books // 15, 1)
+    updated_at = datetime.utcnow().strftime(DATETIME_FORMAT)
+
+    connection = db.session.connection()
+    try:
+        if truncate:
+            delete_rows()
+        for model in (Book, Customer, Loan):
+            if connection.execute(db.select(model.id).limit(1)).first():
+                raise ValueError(f'Table {model.__tablename__} is not empty, run with --truncate to replace its rows')
+
+        has_fts = connection.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'books_fts'")).first() is not None
+        if has_fts:
+            connection.execute(text('DROP TRIGGER IF EXISTS books_fts_ai'))
+
+        # Indexes are built once from the loaded rows, much faster than updating them per insert
+        indexes = [index for model in (Book, Customer, Loan) for index in model.__table__.indexes]
+        for index in indexes:
+            index.drop(connection)
+
+        loaned = pick_loaned_books(rnd, books, loans)
+        insert_rows(connection, Book.__table__, BOOK_COLUMNS,
+                    generate_books(rnd, books, authors, loaned, updated_at), batch_size)
+        insert_rows(connection, Customer.__table__, CUSTOMER_COLUMNS,
+                    generate_customers(rnd, customers, as_of, updated_at), batch_size)
+        insert_rows(connection, Loan.__table__, LOAN_COLUMNS,
+                    generate_loans(rnd, loaned, customers, as_of, updated_at), batch_size)
+
+        for index in indexes:
+            index.create(connection)
+        if has_fts:
+            connection.execute(text(BOOKS_FTS_DDL[1]))
+            connection.execute(text("INSERT INTO books_fts(books_fts) VALUES ('rebuild')"))
+
+        # The bulk inserts bypass the views, so the /stats counters are recounted from the rows
+        rebuild_stats()
+        bump_version('books', 'customers', 'loans')
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return {'books': books, 'customers': customers, 'loans': loans}
+
+
+# Function to delete every book, customer and loan, in the transaction of the session
+def delete_rows():
+    for model in (Loan, Customer, Book):
+        db.session.execute(db.delete(model))
+
+
+# Function to remove every book, customer and loan and zero the /stats counters. The table
+# versions are bumped, so cached lists and ETags of other workers stop serving the old rows.
+def truncate_tables():
+    delete_rows()
+    rebuild_stats()
+    bump_version('books', 'customers', 'loans')
+    db.session.commit()
+
+
+# Command to generate synthetic data: flask --app app seed --books 1000000
+@click.command('seed')
+@click.option('--books', default=10000, show_default=True, help='Number of books.')
+@click.option('--customers', default=None, type=int, help='Number of customers (default: a tenth of the books).')
+@click.option('--loans', default=None, type=int, help='Number of active loans (default: a tenth of the books).')
+@click.option('--seed', 'seed_value', default=0, show_default=True, help='Random seed; the same seed gives the same rows.')
+@click.option('--as-of', type=click.DateTime(formats=['%Y-%m-%d']), default=None, help='Date loans and ages are relative to (default: today).')
+@click.option('--batch-size', default=SEED_BATCH_SIZE, show_default=True, help='Rows per executemany call.')
+@click.option('--truncate', is_flag=True, help='Delete existing books, customers and loans first.')
+@with_appcontext
+def seed_command(books, customers, loans, seed_value, as_of, batch_size, truncate):
+    customers = books // 10 if customers is None else customers
+    loans = books // 10 if loans is None else loans
+
+    start = time.perf_counter()
+    try:
+        counts = seed_database(books, customers, loans, seed=seed_value, as_of=as_of.date() if as_of else None,
+                               batch_size=batch_size, truncate=truncate)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    click.echo(f"Seeded {counts['books']} books, {counts['customers']} customers and {counts['loans']} loans "
+               f"in {time.perf_counter() - start:.1f} s")
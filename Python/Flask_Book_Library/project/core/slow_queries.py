@@ -0,0 +1,139 @@
+import logging
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from flask import has_request_context, request
+from sqlalchemy import event
+
+
+logger = logging.getLogger(__name__)
+
+# Number of slow statements kept in memory for /debug/slow-queries
+DEFAULT_SLOW_QUERY_HISTORY = 200
+
+# Statement kinds SQLite can explain
+EXPLAINABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH')
+
+WHITESPACE = re.compile(r'\s+')
+PLACEHOLDER_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+
+
+# Function to reduce a statement to its shape: whitespace collapsed and expanded
+# IN (?, ?, ...) lists folded, so the same query with different parameters or list
+# lengths is explained only once
+def statement_shape(statement):
+    shape = WHITESPACE.sub(' ', statement).strip()
+    return PLACEHOLDER_LIST.sub('(?, ...)', shape)
+
+
+# Function to hide parameter values, keeping only their type (and length of strings)
+def redact(parameters):
+    if isinstance(parameters, dict):
+        return {key: redact_value(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [redact_value(value) for value in parameters]
+    return redact_value(parameters)
+
+
+def redact_value(value):
+    if value is None:
+        return None
+    if isinstance(value, (str, bytes)):
+        return f'<{type(value).__name__}:{len(value)}>'
+    return f'<{type(value).__name__}>'
+
+
+# Function to tell whether a query plan reads a whole table instead of using an index
+def has_full_scan(plan):
+    return any(detail.startswith('SCAN ') and ' USING ' not in detail for detail in plan)
+
+
+# Collects statements slower than the threshold, with the query plan of each statement shape
+class SlowQueryLog:
+    def __init__(self, threshold_ms, history=DEFAULT_SLOW_QUERY_HISTORY):
+        self.threshold = threshold_ms / 1000
+        self.entries = deque(maxlen=history)
+        self.plans = {}
+        self._lock = threading.Lock()
+
+    def record(self, cursor, statement, parameters, executemany, duration):
+        shape = statement_shape(statement)
+        with self._lock:
+            plan = self.plans.get(shape)
+        if plan is None:
+            plan = self.explain(cursor, statement, parameters, executemany)
+            with self._lock:
+                self.plans[shape] = plan
+
+        entry = {
+            'time': datetime.utcnow().isoformat(timespec='seconds'),
+            'statement': shape,
+            'parameters': redact(parameters[0] if executemany and parameters else parameters),
+            'duration_ms': round(duration * 1000, 3),
+            'view': request.endpoint if has_request_context() else None,
+            'full_scan': has_full_scan(plan),
+        }
+        with self._lock:
+            self.entries.append(entry)
+        logger.warning('Slow query (%.1f ms): %s', entry['duration_ms'], shape,
+                       extra={'route': entry['view'], 'duration_ms': entry['duration_ms']})
+
+    # Runs EXPLAIN QUERY PLAN on the raw DBAPI connection, so it does not go through the
+    # engine events again
+    def explain(self, cursor, statement, parameters, executemany):
+        if not statement.lstrip().upper().startswith(EXPLAINABLE):
+            return []
+        if executemany:
+            parameters = parameters[0] if parameters else ()
+        try:
+            rows = cursor.connection.execute('EXPLAIN QUERY PLAN ' + statement, parameters or ()).fetchall()
+        except Exception as e:
+            return [f'EXPLAIN failed: {e}']
+        return [row[-1] for row in rows]
+
+    def report(self):
+        with self._lock:
+            return {
+                'threshold_ms': self.threshold * 1000,
+                'queries': list(reversed(self.entries)),
+                'plans': [
+                    {'statement': shape, 'plan': plan, 'full_scan': has_full_scan(plan)}
+                    for shape, plan in self.plans.items()
+                ]
+            }
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.plans.clear()
+
+
+slow_query_log = None
+
+
+# Function to time every statement on the app's engines and keep those over SLOW_QUERY_THRESHOLD_MS
+def setup_slow_query_log(app, db):
+    global slow_query_log
+    slow_query_log = SlowQueryLog(app.config['SLOW_QUERY_THRESHOLD_MS'])
+
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('slow_query_started', []).append(time.perf_counter())
+
+    def stop_timer(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info['slow_query_started'].pop()
+        if duration >= slow_query_log.threshold:
+            slow_query_log.record(cursor, statement, parameters, executemany, duration)
+
+    def drop_timer(context):
+        if context.connection is not None and context.connection.info.get('slow_query_started'):
+            context.connection.info['slow_query_started'].pop()
+
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, 'before_cursor_execute', start_timer)
+            event.listen(engine, 'after_cursor_execute', stop_timer)
+            event.listen(engine, 'handle_error', drop_timer)
+
+    return slow_query_log
@@ -0,0 +1,134 @@
+import time
+from collections import Counter
+from datetime import datetime, time as day_start
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import func, literal
+from sqlalchemy.dialects.sqlite import insert
+from project import db
+from project.core.models import StatCounter
+from project.books.models import Book
+from project.customers.models import Customer
+from project.loans.models import Loan
+
+
+# Counter groups
+BOOK_TYPES = 'books.book_type'
+BOOK_STATUSES = 'books.status'
+CUSTOMER_CITIES = 'customers.city'
+LOANS_ACTIVE = 'loans.active'
+LOANS_DUE = 'loans.due'  # active loans per return day, YYYY-MM-DD
+
+
+# Function to add deltas to the counters of one group inside the current transaction,
+# with one upsert statement for all keys
+def change_counters(name, deltas):
+    rows = [{'name': name, 'key': '' if key is None else str(key), 'value': delta}
+            for key, delta in deltas.items() if delta]
+    if not rows:
+        return
+    statement = insert(StatCounter)
+    statement = statement.on_conflict_do_update(
+        index_elements=[StatCounter.name, StatCounter.key],
+        set_={'value': StatCounter.value + statement.excluded.value}
+    )
+    db.session.execute(statement, rows)
+
+
+# Function to count books coming in (delta=1) or going out (delta=-1), given as (book_type, status) pairs
+def count_books(books, delta=1):
+    types = Counter()
+    statuses = Counter()
+    for book_type, status in books:
+        types[book_type] += delta
+        statuses[status] += delta
+    change_counters(BOOK_TYPES, types)
+    change_counters(BOOK_STATUSES, statuses)
+
+
+# Function to move books from one status to another
+def move_book_status(old, new, count=1):
+    change_counters(BOOK_STATUSES, {old: -count, new: count})
+
+
+# Function to count customers coming in or going out, given by city
+def count_customers(cities, delta=1):
+    deltas = Counter()
+    for city in cities:
+        deltas[city] += delta
+    change_counters(CUSTOMER_CITIES, deltas)
+
+
+# Function to count loans being made or ended, given by return date
+def count_loans(return_dates, delta=1):
+    days = Counter()
+    for return_date in return_dates:
+        days[return_date.strftime('%Y-%m-%d')] += delta
+    change_counters(LOANS_ACTIVE, {'': delta * len(return_dates)})
+    change_counters(LOANS_DUE, days)
+
+
+# Function to read the dashboard figures from the counters. Overdue loans are the ones due
+# on an earlier day, summed from the per-day counters, plus those due earlier today, counted
+# on the return_date index.
+def read_stats(now=None):
+    now = now or datetime.utcnow()
+    rows = db.session.execute(
+        db.select(StatCounter.name, StatCounter.key, StatCounter.value)
+        .where(StatCounter.name.in_([BOOK_TYPES, BOOK_STATUSES, CUSTOMER_CITIES, LOANS_ACTIVE]), StatCounter.value != 0)
+    ).all()
+    groups = {BOOK_TYPES: {}, BOOK_STATUSES: {}, CUSTOMER_CITIES: {}, LOANS_ACTIVE: {}}
+    for name, key, value in rows:
+        groups[name][key] = value
+
+    today = datetime.combine(now.date(), day_start.min)
+    overdue = db.session.execute(
+        db.select(func.coalesce(func.sum(StatCounter.value), 0))
+        .where(StatCounter.name == LOANS_DUE, StatCounter.key < today.strftime('%Y-%m-%d'))
+    ).scalar()
+    overdue += db.session.execute(
+        db.select(func.count()).select_from(Loan).where(Loan.return_date >= today, Loan.return_date < now)
+    ).scalar()
+
+    return {
+        'books': {'total': sum(groups[BOOK_TYPES].values()), 'by_type': groups[BOOK_TYPES],
+                  'by_status': groups[BOOK_STATUSES]},
+        'customers': {'total': sum(groups[CUSTOMER_CITIES].values()), 'by_city': groups[CUSTOMER_CITIES]},
+        'loans': {'active': groups[LOANS_ACTIVE].get('', 0), 'overdue': overdue},
+    }
+
+
+# Function to recount every counter from the tables inside the current transaction.
+# Returns the number of counters whose value was wrong.
+def rebuild_stats():
+    # The old values come back from the DELETE itself, so the transaction starts with a write
+    # and never has to upgrade a read snapshot another process may have moved past
+    before = {(name, key): value for name, key, value in
+              db.session.execute(db.delete(StatCounter).returning(StatCounter.name, StatCounter.key, StatCounter.value))}
+
+    columns = [StatCounter.name, StatCounter.key, StatCounter.value]
+    day = func.date(Loan.return_date)
+    for name, key, model in ((BOOK_TYPES, Book.book_type, Book), (BOOK_STATUSES, Book.status, Book),
+                             (CUSTOMER_CITIES, Customer.city, Customer), (LOANS_DUE, day, Loan)):
+        select = db.select(literal(name), func.coalesce(key, ''), func.count()).select_from(model).group_by(key)
+        db.session.execute(insert(StatCounter).from_select(columns, select))
+    db.session.execute(insert(StatCounter).from_select(
+        columns, db.select(literal(LOANS_ACTIVE), literal(''), func.count()).select_from(Loan)))
+
+    after = {(name, key): value for name, key, value in
+             db.session.execute(db.select(StatCounter.name, StatCounter.key, StatCounter.value))}
+    return sum(1 for counter in before.keys() | after.keys() if before.get(counter, 0) != after.get(counter, 0))
+
+
+# Command to rebuild the /stats counters from the tables: flask --app app reconcile-stats
+@click.command('reconcile-stats')
+@with_appcontext
+def reconcile_stats_command():
+    start = time.perf_counter()
+    try:
+        drifted = rebuild_stats()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    click.echo(f'Rebuilt the statistics counters in {time.perf_counter() - start:.1f} s, {drifted} counters corrected')
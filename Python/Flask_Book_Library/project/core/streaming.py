@@ -0,0 +1,76 @@
+from flask import Response, current_app, request, stream_with_context
+from project import db
+from project.core.pagination import decode_cursor, encode_cursor, keyset_page, page_columns, seek_condition
+
+
+# Number of rows read from the database per round trip while streaming
+EXPORT_CHUNK_SIZE = 1000
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+
+# Function to check which output format the client asked for (?format=json|ndjson)
+def requested_format():
+    fmt = request.args.get('format', 'json')
+    if fmt not in ('json', 'ndjson'):
+        raise ValueError(f"Invalid format '{fmt}', expected 'json' or 'ndjson'")
+    return fmt
+
+
+# Function to check which JSON shape the client asked for: a list of objects (default) or
+# ?shape=columnar, the column names once and every row as an array
+def requested_shape(fmt='json'):
+    shape = request.args.get('shape', 'objects')
+    if shape not in ('objects', 'columnar'):
+        raise ValueError(f"Invalid shape '{shape}', expected 'objects' or 'columnar'")
+    if shape == 'columnar' and fmt != 'json':
+        raise ValueError('shape=columnar is only available with format=json')
+    return shape
+
+
+# Function to read a list for ?shape=columnar straight from a Core select. Rows stay plain
+# tuples, so no ORM instances or per-row dictionaries are built. With a limit it returns one
+# keyset page like keyset_page(), otherwise every row in `column` order.
+def columnar_page(select, column, limit=None, after=None):
+    order = page_columns(column)
+    if after is not None:
+        select = select.where(seek_condition(order, after if len(order) > 1 else [after]))
+    select = select.order_by(*order)
+    if limit is not None:
+        select = select.limit(limit + 1)
+    result = db.session.execute(select)
+    columns = list(result.keys())
+    rows = [tuple(row) for row in result]
+
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        values = [rows[-1][columns.index(key.key)] for key in order]
+        next_cursor = encode_cursor(values) if len(order) > 1 else values[0]
+    return {'columns': columns, 'rows': rows, 'next_cursor': next_cursor}
+
+
+# Function to walk a table in keyset chunks, so only one chunk is held in memory at a time
+def iter_chunks(query, column, chunk_size=None):
+    chunk_size = chunk_size or EXPORT_CHUNK_SIZE
+    after = None
+    while True:
+        rows, after = keyset_page(query, column, chunk_size, after)
+        if rows:
+            yield rows
+        if after is None:
+            return
+        if not column.primary_key:
+            after = decode_cursor(after, page_columns(column))
+
+
+# Function to stream rows as newline-delimited JSON (one line per row).
+# Each chunk is written to the response as soon as it is read from the database.
+def ndjson_response(query, column, serialize, chunk_size=None):
+    dumps = current_app.json.dumps
+
+    def generate():
+        for rows in iter_chunks(query, column, chunk_size):
+            yield ''.join(dumps(serialize(row)) + '\n' for row in rows)
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
@@ -0,0 +1,94 @@
+import os
+import threading
+from collections import OrderedDict
+from flask import current_app
+from jinja2 import FileSystemBytecodeCache
+from markupsafe import Markup
+
+
+# Default number of rendered table rows kept per worker in production template mode
+DEFAULT_ROW_CACHE_SIZE = 20000
+
+
+# In-process LRU cache of rendered table rows. Each entry is keyed by the row template and
+# the entity id and remembers the entity version (its updated_at) it was rendered from, so
+# an edited row is rendered again while every unchanged row is a dictionary lookup.
+class RowFragmentCache:
+    def __init__(self, max_entries=DEFAULT_ROW_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, version, html):
+        with self._lock:
+            self._entries[key] = (version, html)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'max_entries': self.max_entries,
+                    'hits': self.hits, 'misses': self.misses}
+
+
+row_cache = RowFragmentCache()
+
+
+# Template global rendering one table row, e.g. {{ render_row('books_row.html', book=book) }}.
+# In production template mode the row comes from the row cache while the entity is unchanged.
+def render_row(template_name, **context):
+    template = current_app.jinja_env.get_template(template_name)
+    if not current_app.config['ROW_FRAGMENT_CACHE']:
+        return Markup(template.render(**context))
+
+    (entity,) = context.values()
+    key = (template_name, entity.id)
+    version = entity.updated_at
+    html = row_cache.get(key, version) if version is not None else None
+    if html is None:
+        html = Markup(template.render(**context))
+        if version is not None:
+            row_cache.put(key, version, html)
+    return html
+
+
+# Function to set up template rendering for TEMPLATE_MODE. In development templates are
+# reloaded when edited. In production they are compiled once at startup, the compiled
+# bytecode is kept in TEMPLATE_CACHE_DIR for the next worker, and table rows are cached.
+def setup_templates(app):
+    production = app.config['TEMPLATE_MODE'] == 'production'
+    if app.config['TEMPLATES_AUTO_RELOAD'] is None:
+        app.config['TEMPLATES_AUTO_RELOAD'] = not production
+    if app.config['ROW_FRAGMENT_CACHE'] is None:
+        app.config['ROW_FRAGMENT_CACHE'] = production
+    row_cache.max_entries = app.config['ROW_FRAGMENT_CACHE_SIZE']
+
+    # The environment may already exist (registering blueprints creates it), so it is updated in place
+    app.jinja_env.auto_reload = app.config['TEMPLATES_AUTO_RELOAD']
+    app.add_template_global(render_row)
+
+    if production:
+        os.makedirs(app.config['TEMPLATE_CACHE_DIR'], exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(app.config['TEMPLATE_CACHE_DIR'])
+        # Compile every template now instead of on the first request that renders it
+        for name in app.jinja_env.list_templates(extensions=['html']):
+            app.jinja_env.get_template(name)
@@ -1,12 +1,111 @@
-from flask import render_template, Blueprint
+import logging
+import os
+from flask import render_template, Blueprint, jsonify, current_app, request, send_file, url_for
+from project import db
+from project.core.cache import response_cache
+from project.core.metrics import metrics, PROMETHEUS_MIMETYPE
+from project.core.pagination import list_url
+from project.core import slow_queries
+from project.core.stats import read_stats
+from project.core.models import Job
+from project.core.jobs import submit_job
+from project.core.streaming import NDJSON_MIMETYPE
 
 
 # Blueprint for core
 core = Blueprint('core', __name__, template_folder='templates', static_folder='static')
+logger = logging.getLogger(__name__)
+
+# Links of the paginated HTML lists keep their sort and filters
+core.add_app_template_global(list_url)
 
 
 # Route to homepage
 @core.route('/')
 def index():
-    print('Homepage accessed')
+    logger.info('Homepage accessed')
     return render_template('index.html')
+
+
+# Route to show the dashboard statistics, read from the counter rows instead of counting the tables
+@core.route('/stats')
+def stats():
+    return jsonify(read_stats())
+
+
+# Route to show hit/miss statistics of the response cache of this worker
+@core.route('/cache/stats')
+def cache_stats():
+    return jsonify(response_cache.stats())
+
+
+# Route to expose request, SQL and cache metrics of this worker in Prometheus text format
+@core.route('/metrics')
+def prometheus_metrics():
+    if not current_app.config.get('METRICS_ENABLED'):
+        return jsonify({'error': 'Metrics are disabled'}), 404
+    cache_stats = response_cache.stats()
+    gauges = {
+        'response_cache_hits': ('Response cache hits since start.', cache_stats['hits']),
+        'response_cache_misses': ('Response cache misses since start.', cache_stats['misses']),
+        'response_cache_evictions': ('Response cache evictions since start.', cache_stats['evictions']),
+        'response_cache_size_bytes': ('Bytes held by the response cache.', cache_stats['size_bytes']),
+    }
+    return current_app.response_class(metrics.render(gauges), mimetype=PROMETHEUS_MIMETYPE)
+
+
+# Route to list the slowest recent SQL statements with their query plans. It shows statement
+# shapes and plans of real traffic, so create_app() only registers it (at /debug/slow-queries)
+# in debug mode or with DEBUG_ENDPOINTS.
+def slow_query_report():
+    if slow_queries.slow_query_log is None:
+        return jsonify({'error': 'Slow query log is disabled'}), 404
+    return jsonify(slow_queries.slow_query_log.report())
+
+
+# Function to convert a job into the dictionary returned by the job endpoints
+def serialize_job(job):
+    data = {'id': job.id, 'kind': job.kind, 'status': job.status, 'progress': round(job.progress, 3),
+            'attempts': job.attempts, 'error': job.error, 'created_at': job.created_at,
+            'started_at': job.started_at, 'finished_at': job.finished_at,
+            'url': url_for('core.job_status', job_id=job.id)}
+    if job.status == 'succeeded':
+        data['result_url'] = url_for('core.job_result', job_id=job.id)
+    return data
+
+
+# Route to queue a background job, e.g. {"kind": "export_books"}. The job is only recorded
+# here; a job runner (JOB_RUNNER or `flask run-jobs`) does the work.
+@core.route('/jobs', methods=['POST'])
+def create_job():
+    data = request.get_json(silent=True) or {}
+    try:
+        job = submit_job(data.get('kind'), data.get('params'))
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    return jsonify(job=serialize_job(job)), 202, {'Location': url_for('core.job_status', job_id=job.id)}
+
+
+# Route to poll the status and progress of a job
+@core.route('/jobs/<int:job_id>', methods=['GET'])
+def job_status(job_id):
+    job = db.session.get(Job, job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job=serialize_job(job))
+
+
+# Route to download the result file of a finished job
+@core.route('/jobs/<int:job_id>/result', methods=['GET'])
+def job_result(job_id):
+    job = db.session.get(Job, job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    if job.status != 'succeeded':
+        return jsonify({'error': f'Job is {job.status}', 'job': serialize_job(job)}), 409
+    if not job.result_path or not os.path.exists(job.result_path):
+        logger.warning('Job result file missing', extra={'entity_id': job_id, 'outcome': 'not_found'})
+        return jsonify({'error': 'Job result is no longer available'}), 410
+    mimetype = NDJSON_MIMETYPE if job.result_path.endswith('.ndjson') else 'application/json'
+    return send_file(job.result_path, mimetype=mimetype, as_attachment=True, download_name=os.path.basename(job.result_path))
@@ -1,4 +1,9 @@
-from project import db, app
+import logging
+from datetime import datetime
+from project import db
+
+
+logger = logging.getLogger(__name__)
 
 
 # Customer model
@@ -11,6 +16,7 @@ class Customer(db.Model):
     pesel = db.Column(db.String(64))
     street = db.Column(db.String(128))
     appNo = db.Column(db.String(10))
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     def __init__(self, name, city, age, pesel, street, appNo):
         self.name = name
@@ -19,11 +25,7 @@ class Customer(db.Model):
         self.pesel = pesel
         self.street = street
         self.appNo = appNo
-        print("Getting: " + str(self),flush=True)
+        logger.debug('Getting: %s', self)
 
     def __repr__(self):
         return f"Customer(ID: {self.id}, Name: {self.name}, City: {self.city}, Age: {self.age}, Pesel: {self.pesel}, Street: {self.street}, AppNo: {self.appNo})"
-
-
-with app.app_context():
-    db.create_all()
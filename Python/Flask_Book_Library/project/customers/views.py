@@ -1,38 +1,103 @@
+import logging
 from flask import render_template, Blueprint, request, redirect, url_for, jsonify
 from project import db
 from project.customers.models import Customer
+from project.loans.models import Loan
+from project.core.pagination import parse_page_args, wants_page, keyset_page, parse_list_args, seek_page, starts_with
+from project.core.streaming import requested_format, requested_shape, ndjson_response, columnar_page
+from project.core.cache import conditional_by_version, bump_version
+from project.core.stats import count_customers
 
 
 # Blueprint for customers
 customers = Blueprint('customers', __name__, template_folder='templates', url_prefix='/customers')
+logger = logging.getLogger(__name__)
 
 
-# Route to display customers in HTML
+# Function to convert a customer into the dictionary returned by the JSON endpoints
+def serialize_customer(customer):
+    return {'id': customer.id, 'name': customer.name, 'city': customer.city, 'age': customer.age}
+
+
+# Columns of serialize_customer, read as plain tuples for ?shape=columnar
+CUSTOMER_COLUMNS = (Customer.id, Customer.name, Customer.city, Customer.age)
+
+
+# Columns the HTML customer list can be sorted by, each one backed by an index
+CUSTOMER_SORT_COLUMNS = {'id': Customer.id, 'name': Customer.name}
+
+
+# Function to apply the filters of the HTML customer list
+def filter_customers(query, args):
+    if args.get('name'):
+        query = query.filter(starts_with(Customer.name, args['name']))
+    if args.get('city'):
+        query = query.filter(Customer.city == args['city'])
+    return query
+
+
+# Route to display customers in HTML, one page at a time; ?fragment=1 renders only the table body
 @customers.route('/', methods=['GET'])
 def list_customers():
-    # Fetch all customers from the database
-    customers = Customer.query.all()
-    print('Customers page accessed')
-    return render_template('customers.html', customers=customers)
+    try:
+        sort, columns, descending, limit, after, before = parse_list_args(CUSTOMER_SORT_COLUMNS, Customer.id)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Fetch one page of customers, seeking on the sort column's index
+    query = filter_customers(Customer.query, request.args)
+    customers, next_cursor, prev_cursor = seek_page(query, columns, limit, descending, after, before)
+    template = 'customers_table_body.html' if request.args.get('fragment') else 'customers.html'
+    logger.info('Customers page accessed')
+    return render_template(template, customers=customers, sort=sort, descending=descending,
+                           next_cursor=next_cursor, prev_cursor=prev_cursor)
 
 
 # Route to fetch customers in JSON format
 @customers.route('/json', methods=['GET'])
+@conditional_by_version('customers')
 def list_customers_json():
-    # Fetch all customers from the database and convert to JSON
-    customers = Customer.query.all()
-    customer_list = [{'name': customer.name, 'city': customer.city, 'age': customer.age} for customer in customers]
-    return jsonify(customers=customer_list)
+    try:
+        fmt = requested_format()
+        shape = requested_shape(fmt)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if fmt == 'ndjson':
+        # Stream the whole table in chunks, one JSON object per line
+        return ndjson_response(Customer.query, Customer.id, serialize_customer)
+
+    if shape == 'columnar':
+        # Column names once and one array per customer, read without ORM instances
+        try:
+            column, limit, after = parse_page_args({'id': Customer.id, 'name': Customer.name}) if wants_page() else (Customer.id, None, None)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify(columnar_page(db.select(*CUSTOMER_COLUMNS), column, limit, after))
+
+    if wants_page():
+        # Fetch one page of customers, seeking on the primary key or the name index
+        try:
+            column, limit, after = parse_page_args({'id': Customer.id, 'name': Customer.name})
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        customers, next_cursor = keyset_page(Customer.query, column, limit, after)
+    else:
+        # Fetch all customers from the database and convert to JSON
+        customers = Customer.query.all()
+        next_cursor = None
+    customer_list = [serialize_customer(customer) for customer in customers]
+    return jsonify(customers=customer_list, next_cursor=next_cursor)
 
 
 # Route to create a new customer
-@customers.route('/create', methods=['POST', 'GET'])
+@customers.route('/create', methods=['POST'])
 def create_customer():
     data = request.form
     # Check if all required fields are in the form data
     required_fields = ['name', 'city', 'age', 'pesel', 'street', 'appNo']
     if not all(field in data for field in required_fields):
-        print('Invalid form data')
+        logger.warning('Invalid form data', extra={'outcome': 'invalid'})
         return jsonify({'error': 'Invalid form data'}), 400
 
     # Create a new customer with all fields
@@ -47,12 +112,14 @@ def create_customer():
 
     try:
         db.session.add(new_customer)
+        count_customers([new_customer.city])
+        bump_version('customers')
         db.session.commit()
-        print('Customer added successfully')
+        logger.info('Customer added successfully', extra={'entity_id': new_customer.id, 'outcome': 'created'})
         return redirect(url_for('customers.list_customers'))
     except Exception as e:
         db.session.rollback()
-        print(f'Error creating customer: {str(e)}')
+        logger.exception('Error creating customer', extra={'outcome': 'error'})
         return jsonify({'error': f'Error creating customer: {str(e)}'}), 500
 
 
@@ -71,7 +138,7 @@ def edit_customer_data(customer_id):
         }
         return jsonify({'success': True, 'customer': customer_data}), 200
     else:
-        print('Customer not found')
+        logger.warning('Customer not found', extra={'entity_id': customer_id, 'outcome': 'not_found'})
         return jsonify({'error': 'Customer not found'}), 404
 
 
@@ -83,7 +150,7 @@ def edit_customer(customer_id):
 
     # Check if the customer exists
     if not customer:
-        print('Customer not found')
+        logger.warning('Customer not found', extra={'entity_id': customer_id, 'outcome': 'not_found'})
         return jsonify({'error': 'Customer not found'}), 404
 
     try:
@@ -91,18 +158,22 @@ def edit_customer(customer_id):
         data = request.form
 
         # Update customer details
+        if data['city'] != customer.city:
+            count_customers([customer.city], -1)
+            count_customers([data['city']])
         customer.name = data['name']
         customer.city = data['city']
         customer.age = data['age']
 
         # Commit the changes to the database
+        bump_version('customers')
         db.session.commit()
-        print('Customer updated succesfully')
+        logger.info('Customer updated successfully', extra={'entity_id': customer_id, 'outcome': 'updated'})
         return redirect(url_for('customers.list_customers'))
     except Exception as e:
         # Handle any exceptions
         db.session.rollback()
-        print('Error updating customer')
+        logger.exception('Error updating customer', extra={'entity_id': customer_id, 'outcome': 'error'})
         return jsonify({'error': f'Error updating customer: {str(e)}'}), 500
 
 
@@ -111,17 +182,24 @@ def edit_customer(customer_id):
 def delete_customer(customer_id):
     customer = Customer.query.get(customer_id)
     if not customer:
-        print('Customer not found')
+        logger.warning('Customer not found', extra={'entity_id': customer_id, 'outcome': 'not_found'})
         return jsonify({'error': 'Customer not found'}), 404
 
+    # Customers with active loans are referenced by them and cannot be deleted
+    if Loan.query.filter_by(customer_id=customer.id).first():
+        logger.warning('Customer has active loans', extra={'entity_id': customer_id, 'outcome': 'rejected'})
+        return jsonify({'error': 'Customer has active loans and cannot be deleted'}), 400
+
     try:
         # Delete the customer from the database
         db.session.delete(customer)
+        count_customers([customer.city], -1)
+        bump_version('customers')
         db.session.commit()
-        print('Customer deleted successfully')
+        logger.info('Customer deleted successfully', extra={'entity_id': customer_id, 'outcome': 'deleted'})
         return redirect(url_for('customers.list_customers'))
     except Exception as e:
         # Handle any exceptions, such as database errors
         db.session.rollback()
-        print('Error deleting customer')
+        logger.exception('Error deleting customer', extra={'entity_id': customer_id, 'outcome': 'error'})
         return jsonify({'error': f'Error deleting customer: {str(e)}'}), 500
@@ -1,6 +1,6 @@
 # Form imports
 from flask_wtf import FlaskForm
-from wtforms import StringField, SubmitField, IntegerField
+from wtforms import StringField, SubmitField
 from wtforms.fields import DateField
 from wtforms.validators import DataRequired
 
@@ -12,10 +12,5 @@ class CreateLoan(FlaskForm):
     loan_date = DateField('Loan Date', format='%Y-%m-%d', validators=[DataRequired()])
     return_date = DateField('Return Date', format='%Y-%m-%d', validators=[DataRequired()])
 
-    # Fields for capturing original book details
-    original_author = StringField('Original Author', validators=[DataRequired()])
-    original_year_published = IntegerField('Original Year Published', validators=[DataRequired()])
-    original_book_type = StringField('Original Book Type', validators=[DataRequired()])
-
     submit = SubmitField('Create Loan')
 
@@ -1,4 +1,5 @@
-from project import db , app
+from datetime import datetime
+from project import db
 
 
 # Loan model
@@ -6,26 +7,29 @@ class Loan(db.Model):
     __tablename__ = 'Loans'
 
     id = db.Column(db.Integer, primary_key=True)
-    customer_name = db.Column(db.String(64), nullable=False)
-    book_name = db.Column(db.String(64), nullable=False)
+    customer_id = db.Column(db.Integer, db.ForeignKey('customers.id', name='fk_loans_customer_id_customers'), nullable=False, index=True)
+    book_id = db.Column(db.Integer, db.ForeignKey('books.id', name='fk_loans_book_id_books'), nullable=False, index=True)
     loan_date = db.Column(db.DateTime, nullable=False)
-    return_date = db.Column(db.DateTime, nullable=False)
-    original_author = db.Column(db.String(64), nullable=False)
-    original_year_published = db.Column(db.Integer, nullable=False)
-    original_book_type = db.Column(db.String(64), nullable=False)
-
-    def __init__(self, customer_name, book_name, loan_date, return_date, original_author, original_year_published, original_book_type):
-        self.customer_name = customer_name
-        self.book_name = book_name
+    return_date = db.Column(db.DateTime, nullable=False, index=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    customer = db.relationship('Customer')
+    book = db.relationship('Book')
+
+    def __init__(self, customer, book, loan_date, return_date):
+        self.customer = customer
+        self.book = book
         self.loan_date = loan_date
         self.return_date = return_date
-        self.original_author = original_author
-        self.original_year_published = original_year_published
-        self.original_book_type = original_book_type
 
-    def __repr__(self):
-        return f"Customer: {self.customer_name}, Book: {self.book_name}, Loan Date: {self.loan_date}, Return Date: {self.return_date}"
+    # Names are read through the relationships, load them with joinedload() when listing loans
+    @property
+    def customer_name(self):
+        return self.customer.name
 
+    @property
+    def book_name(self):
+        return self.book.name
 
-with app.app_context():
-    db.create_all()
\ No newline at end of file
+    def __repr__(self):
+        return f"Customer: {self.customer_name}, Book: {self.book_name}, Loan Date: {self.loan_date}, Return Date: {self.return_date}"
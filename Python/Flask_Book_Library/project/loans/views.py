@@ -1,20 +1,62 @@
+import logging
+from datetime import date, datetime, timedelta
 from flask import render_template, Blueprint, request, redirect, url_for, jsonify
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
 from project import db
 from project.loans.models import Loan
 from project.loans.forms import CreateLoan
 from project.books.models import Book
 from project.customers.models import Customer
+from project.core.pagination import (parse_page_args, wants_page, keyset_page, parse_list_args, seek_page, starts_with,
+                                     parse_key_list, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+from project.core.streaming import requested_format, requested_shape, ndjson_response, columnar_page
+from project.core.cache import cached_by_version, conditional_by_version, bump_version
+from project.core.stats import count_loans, move_book_status
 
 
 # Blueprint for loans
 loans = Blueprint('loans', __name__, template_folder='templates', url_prefix='/loans')
+logger = logging.getLogger(__name__)
+
+
+# Function to build the loan query with customer and book joined in, so listing loans
+# does not issue one extra query per row for the names
+def loans_with_names():
+    return Loan.query.options(joinedload(Loan.customer), joinedload(Loan.book))
+
+
+# Function to convert a loan into the dictionary returned by the JSON endpoints
+def serialize_loan(loan):
+    return {'id': loan.id, 'customer_id': loan.customer_id, 'book_id': loan.book_id,
+            'customer_name': loan.customer_name, 'book_name': loan.book_name,
+            'loan_date': loan.loan_date, 'return_date': loan.return_date}
+
+
+# Core select of the columns of serialize_loan, names joined in, for ?shape=columnar
+def loan_columns():
+    return (db.select(Loan.id, Loan.customer_id, Loan.book_id, Customer.name.label('customer_name'),
+                      Book.name.label('book_name'), Loan.loan_date, Loan.return_date)
+            .join(Loan.customer).join(Loan.book))
+
+
+# Function to convert a book into the dictionary returned by the loan detail endpoints
+def serialize_book_details(book):
+    return {'id': book.id, 'name': book.name, 'author': book.author, 'year_published': book.year_published,
+            'book_type': book.book_type, 'status': book.status}
+
+
+# Function to convert a customer into the dictionary returned by the loan detail endpoints
+def serialize_customer_details(customer):
+    return {'id': customer.id, 'name': customer.name, 'city': customer.city, 'age': customer.age}
 
 
 # Route to provide book and customer data in JSON format
 @loans.route('/books/json', methods=['GET'])
+@cached_by_version('books')
 def list_books_json():
-    # Fetch all books from the database
-    books = Book.query.all()
+    # Fetch all books that can be loaned from the database
+    books = Book.query.filter_by(status='available').all()
     # Create a list of book names
     book_list = [{'name': book.name} for book in books]
     # Return book data in JSON format
@@ -33,14 +75,88 @@ def list_customers_json():
     return jsonify({'customers': customer_list})
 
 
-# Route to list all loans
+# Default and largest number of names returned by the typeahead endpoints
+SUGGEST_LIMIT = 10
+MAX_SUGGEST_LIMIT = 50
+
+
+# Function to read ?prefix= and ?limit= of the typeahead endpoints
+def parse_suggest_args():
+    prefix = request.args.get('prefix', '')
+    try:
+        limit = int(request.args.get('limit', SUGGEST_LIMIT))
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    if limit < 1 or limit > MAX_SUGGEST_LIMIT:
+        raise ValueError(f'limit must be between 1 and {MAX_SUGGEST_LIMIT}')
+    return prefix, limit
+
+
+# Route to suggest book names starting with ?prefix= for the loan form, read as a range
+# scan of the unique name index; ?available=1 skips books that are already loaned
+@loans.route('/books/suggest', methods=['GET'])
+@cached_by_version('books')
+def suggest_books():
+    try:
+        prefix, limit = parse_suggest_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    query = db.session.query(Book.name).filter(starts_with(Book.name, prefix))
+    if request.args.get('available') == '1':
+        query = query.filter(Book.status == 'available')
+    names = query.order_by(Book.name).limit(limit).all()
+    return jsonify({'books': [{'name': name} for (name,) in names]})
+
+
+# Route to suggest customer names starting with ?prefix= for the loan form
+@loans.route('/customers/suggest', methods=['GET'])
+@cached_by_version('customers')
+def suggest_customers():
+    try:
+        prefix, limit = parse_suggest_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    names = db.session.query(Customer.name).filter(starts_with(Customer.name, prefix)).order_by(Customer.name).limit(limit).all()
+    return jsonify({'customers': [{'name': name} for (name,) in names]})
+
+
+# Columns the HTML loan list can be sorted by, each one backed by an index
+LOAN_SORT_COLUMNS = {'id': Loan.id, 'return_date': Loan.return_date}
+
+
+# Function to apply the filters of the HTML loan list. Customer and book names are matched
+# as prefixes on their own indexes, then the loans are found through the foreign key indexes.
+def filter_loans(query, args):
+    if args.get('customer'):
+        customer_ids = db.session.query(Customer.id).filter(starts_with(Customer.name, args['customer']))
+        query = query.filter(Loan.customer_id.in_(customer_ids))
+    if args.get('book'):
+        book_ids = db.session.query(Book.id).filter(starts_with(Book.name, args['book']))
+        query = query.filter(Loan.book_id.in_(book_ids))
+    if args.get('overdue'):
+        query = query.filter(Loan.return_date < datetime.utcnow())
+    return query
+
+
+# Route to list loans, one page at a time; ?fragment=1 renders only the table body
 @loans.route('/', methods=['GET'])
 def list_loans():
-    # Fetch all loans from the database
-    loans = Loan.query.all()
+    try:
+        sort, columns, descending, limit, after, before = parse_list_args(LOAN_SORT_COLUMNS, Loan.id)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Fetch one page of loans, seeking on the sort column's index
+    query = filter_loans(loans_with_names(), request.args)
+    loans, next_cursor, prev_cursor = seek_page(query, columns, limit, descending, after, before)
+    page = dict(loans=loans, sort=sort, descending=descending, next_cursor=next_cursor, prev_cursor=prev_cursor)
+    if request.args.get('fragment'):
+        return render_template('loans_table_body.html', **page)
     # Render the loans.html template with the loans
-    print('Loans page accessed')
-    return render_template('loans.html', loans=loans, form=CreateLoan())
+    logger.info('Loans page accessed')
+    return render_template('loans.html', form=CreateLoan(), **page)
 
 
 # Route to handle loan creation form
@@ -56,32 +172,33 @@ def create_loan():
         loan_date = form.loan_date.data
         return_date = form.return_date.data
 
+        customer = Customer.query.filter_by(name=customer_name).first()
+        if not customer:
+            logger.warning('Customer not found', extra={'entity_id': customer_name, 'outcome': 'not_found'})
+            return jsonify({'error': 'Customer not found'}), 404
+
         # Check if the book is available
         book = Book.query.filter_by(name=book_name, status='available').first()
         if not book:
-            print('Error. Book not available for loan.')
+            logger.warning('Book not available for loan', extra={'entity_id': book_name, 'outcome': 'rejected'})
             return jsonify({'error': 'Book not available for loan.'}), 400
 
         try:
-            # Create a new loan and store original book details
+            # Create a new loan and mark the book as loaned in one transaction
             new_loan = Loan(
-                customer_name=customer_name,
-                book_name=book_name,
+                customer=customer,
+                book=book,
                 loan_date=loan_date,
-                return_date=return_date,
-                original_author=book.author,
-                original_year_published=book.year_published,
-                original_book_type=book.book_type
+                return_date=return_date
             )
+            book.status = 'loaned'
 
-            # Add the new loan to the database
             db.session.add(new_loan)
+            move_book_status('available', 'loaned')
+            count_loans([return_date])
+            bump_version('books', 'loans')
             db.session.commit()
-            print('Loan added successfully')
-
-            # Remove the book from the database
-            db.session.delete(book)
-            db.session.commit()
+            logger.info('Loan added successfully', extra={'entity_id': new_loan.id, 'outcome': 'created'})
 
             # Redirect to the list of loans
             return redirect(url_for('loans.list_loans'))
@@ -89,24 +206,221 @@ def create_loan():
             db.session.rollback()
             error_message = f'Error creating loan: {str(e)}'
             # Log the error message
-            print('Error creating loan:', error_message)
+            logger.exception('Error creating loan', extra={'outcome': 'error'})
             return jsonify({'error': error_message}), 500
 
     # GET request, render the form
-    print('GET request, render the form')
+    logger.debug('GET request, render the form')
     return render_template('loans.html', form=form)
 
 
+# Route to loan many books to one customer in a single request and transaction
+@loans.route('/batch', methods=['POST'])
+def create_loans_batch():
+    data = request.get_json(silent=True) or {}
+    customer_name = data.get('customer_name')
+    book_names = data.get('book_names')
+    if not customer_name or not isinstance(book_names, list) or not book_names:
+        return jsonify({'error': 'customer_name and a non-empty book_names list are required'}), 400
+    if not all(isinstance(name, str) for name in book_names):
+        return jsonify({'error': 'book_names must be a list of strings'}), 400
+    if len(book_names) > MAX_PAGE_SIZE:
+        return jsonify({'error': f'At most {MAX_PAGE_SIZE} books can be loaned at once'}), 400
+
+    try:
+        loan_date = date.fromisoformat(str(data.get('loan_date'))[:10])
+        return_date = date.fromisoformat(str(data.get('return_date'))[:10])
+    except ValueError:
+        return jsonify({'error': 'loan_date and return_date must be dates in YYYY-MM-DD format'}), 400
+
+    # Drop repeated titles, keeping the order they were requested in
+    book_names = list(dict.fromkeys(book_names))
+
+    customer = Customer.query.filter_by(name=customer_name).first()
+    if not customer:
+        logger.warning('Customer not found', extra={'entity_id': customer_name, 'outcome': 'not_found'})
+        return jsonify({'error': 'Customer not found'}), 404
+
+    # Check availability of all requested books with a single query
+    available = {book.name: book for book in Book.query.filter(Book.name.in_(book_names), Book.status == 'available')}
+    unavailable = [name for name in book_names if name not in available]
+    if unavailable:
+        logger.warning('Books not available for loan: %s', ', '.join(unavailable), extra={'outcome': 'rejected'})
+        return jsonify({'error': 'Books not available for loan.', 'unavailable': unavailable}), 400
+
+    try:
+        new_loans = [
+            Loan(
+                customer=customer,
+                book=book,
+                loan_date=loan_date,
+                return_date=return_date
+            )
+            for book in available.values()
+        ]
+        db.session.add_all(new_loans)
+
+        # Mark all loaned books with one statement; if another checkout took one of them
+        # in the meantime the row count will not match and nothing is applied
+        book_ids = [book.id for book in available.values()]
+        result = db.session.execute(
+            db.update(Book).where(Book.id.in_(book_ids), Book.status == 'available').values(status='loaned'),
+            execution_options={'synchronize_session': False}
+        )
+        if result.rowcount != len(book_ids):
+            db.session.rollback()
+            logger.warning('Books were loaned by another request', extra={'outcome': 'conflict'})
+            return jsonify({'error': 'Some books are no longer available for loan.'}), 409
+
+        move_book_status('available', 'loaned', len(new_loans))
+        count_loans([loan.return_date for loan in new_loans])
+        bump_version('books', 'loans')
+        db.session.commit()
+        logger.info('%d loans added successfully', len(new_loans), extra={'entity_id': [loan.id for loan in new_loans], 'outcome': 'created'})
+        return jsonify({'loans': [serialize_loan(loan) for loan in new_loans]}), 201
+    except Exception as e:
+        db.session.rollback()
+        error_message = f'Error creating loans: {str(e)}'
+        logger.exception('Error creating loans', extra={'outcome': 'error'})
+        return jsonify({'error': error_message}), 500
+
+
 # Route to get loan data in JSON format
 @loans.route('/json', methods=['GET'])
+@conditional_by_version('loans', 'customers', 'books')
 def list_loans_json():
-    # Fetch all loans from the database
-    loans = Loan.query.all()
+    try:
+        fmt = requested_format()
+        shape = requested_shape(fmt)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if fmt == 'ndjson':
+        # Stream the whole table in chunks, one JSON object per line
+        return ndjson_response(loans_with_names(), Loan.id, serialize_loan)
+
+    if shape == 'columnar':
+        # Column names once and one array per loan, read without ORM instances
+        try:
+            column, limit, after = parse_page_args({'id': Loan.id}) if wants_page() else (Loan.id, None, None)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify(columnar_page(loan_columns(), column, limit, after))
+
+    if wants_page():
+        # Fetch one page of loans, seeking on the primary key
+        try:
+            column, limit, after = parse_page_args({'id': Loan.id})
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        loans, next_cursor = keyset_page(loans_with_names(), column, limit, after)
+    else:
+        # Fetch all loans from the database
+        loans = loans_with_names().all()
+        next_cursor = None
     # Create a list of loan details
-    loan_list = [{'customer_name': loan.customer_name, 'book_name': loan.book_name,
-                  'loan_date': loan.loan_date, 'return_date': loan.return_date} for loan in loans]
+    loan_list = [serialize_loan(loan) for loan in loans]
     # Return loan data in JSON format
-    return jsonify(loans=loan_list)
+    return jsonify(loans=loan_list, next_cursor=next_cursor)
+
+
+# Route to fetch a loan together with its book and customer, read with one joined query
+@loans.route('/<int:loan_id>/full', methods=['GET'])
+def get_loan_full(loan_id):
+    loan = loans_with_names().filter(Loan.id == loan_id).first()
+
+    if loan:
+        loan_data = serialize_loan(loan)
+        loan_data['book'] = serialize_book_details(loan.book)
+        loan_data['customer'] = serialize_customer_details(loan.customer)
+        return jsonify(loan=loan_data)
+    else:
+        logger.warning('Loan not found', extra={'entity_id': loan_id, 'outcome': 'not_found'})
+        return jsonify({'error': 'Loan not found'}), 404
+
+
+# Route to fetch many loans by ID with one IN query, e.g. ?ids=1,2,3. Loans are returned in
+# the requested order; IDs that do not exist are listed in `missing`.
+@loans.route('/details', methods=['GET'])
+@conditional_by_version('loans', 'customers', 'books')
+def get_loans_details():
+    try:
+        ids = parse_key_list('ids', int)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    found = {loan.id: loan for loan in loans_with_names().filter(Loan.id.in_(ids))}
+    return jsonify(loans=[serialize_loan(found[loan_id]) for loan_id in ids if loan_id in found],
+                   missing=[loan_id for loan_id in ids if loan_id not in found])
+
+
+# Periods the due date reports can count loans by, as SQLite expressions on the return date.
+# A week is labelled with the date of its Monday.
+DUE_PERIODS = {
+    'day': lambda column: func.date(column),
+    'week': lambda column: func.date(column, 'weekday 0', '-6 days'),
+}
+
+
+# Function to read a date or date and time from the query string
+def parse_datetime_arg(name, default=None):
+    value = request.args.get(name)
+    if not value:
+        if default is None:
+            raise ValueError(f'Query parameter {name} is required')
+        return default
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid date '{value}' in {name}, expected YYYY-MM-DD")
+
+
+# Function to answer a due date report over the loans matching the conditions, which must
+# bound Loan.return_date so the range is read from its index. ?group=day or ?group=week
+# returns the number of loans per period counted in SQL, otherwise the loans are returned
+# a page at a time in return date order.
+def due_report(*conditions):
+    group = request.args.get('group')
+    if group is not None:
+        if group not in DUE_PERIODS:
+            raise ValueError(f"Invalid group '{group}', expected one of: {', '.join(DUE_PERIODS)}")
+        period = DUE_PERIODS[group](Loan.return_date).label('period')
+        rows = db.session.query(period, func.count()).filter(*conditions).group_by(period).order_by(period).all()
+        counts = [{'period': period, 'loans': count} for period, count in rows]
+        return jsonify(group=group, counts=counts, total=sum(count['loans'] for count in counts))
+
+    sort, columns, descending, limit, after, before = parse_list_args(
+        {'return_date': Loan.return_date}, Loan.id, default_sort='return_date', default_limit=DEFAULT_PAGE_SIZE)
+    loans, next_cursor, prev_cursor = seek_page(loans_with_names().filter(*conditions), columns, limit, descending, after, before)
+    return jsonify(loans=[serialize_loan(loan) for loan in loans], next_cursor=next_cursor, prev_cursor=prev_cursor)
+
+
+# Route to list loans past their return date, as of now or ?as_of=. Not cached, as loans
+# become overdue without any table changing.
+@loans.route('/overdue', methods=['GET'])
+def list_overdue_loans():
+    try:
+        as_of = parse_datetime_arg('as_of', datetime.utcnow())
+        return due_report(Loan.return_date < as_of)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+
+# Route to list loans due between ?from= and ?to=, both days included
+@loans.route('/due', methods=['GET'])
+@conditional_by_version('loans', 'customers', 'books')
+def list_due_loans():
+    try:
+        start = parse_datetime_arg('from')
+        end = parse_datetime_arg('to')
+        if end < start:
+            raise ValueError('to must not be before from')
+        # A bare date as the end means the whole of that day
+        if len(request.args['to']) == len('YYYY-MM-DD'):
+            end += timedelta(days=1)
+        return due_report(Loan.return_date >= start, Loan.return_date < end)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
 
 # Route to get customer data by name in JSON format
@@ -116,17 +430,10 @@ def get_customer_details(customer_name):
     customer = Customer.query.filter_by(name=customer_name).first()
 
     if customer:
-        # Create a dictionary with customer details
-        customer_data = {
-            'id': customer.id,
-            'name': customer.name,
-            'city': customer.city,
-            'age': customer.age
-        }
         # Return customer data in JSON format
-        return jsonify(customer=customer_data)
+        return jsonify(customer=serialize_customer_details(customer))
     else:
-        print('Customer not found')
+        logger.warning('Customer not found', extra={'entity_id': customer_name, 'outcome': 'not_found'})
         return jsonify({'error': 'Customer not found'}), 404
 
 
@@ -135,32 +442,26 @@ def get_customer_details(customer_name):
 def delete_loan(loan_id):
     loan = Loan.query.get(loan_id)
     if not loan:
-        print('Loan not found')
+        logger.warning('Loan not found', extra={'entity_id': loan_id, 'outcome': 'not_found'})
         return jsonify({'error': 'Loan not found'}), 404
 
     try:
-        # Retrieve the book associated with the loan
-        book = Book(
-            name=loan.book_name,
-            author=loan.original_author,
-            year_published=loan.original_year_published,
-            book_type=loan.original_book_type,
-            status='available'  
-        )
-
-        # Add the book to the database
-        db.session.add(book)
+        # Make the book associated with the loan available again
+        loan.book.status = 'available'
 
         # Delete the loan from the database
         db.session.delete(loan)
+        move_book_status('loaned', 'available')
+        count_loans([loan.return_date], -1)
+        bump_version('books', 'loans')
         db.session.commit()
-        print('Loan deleted successfully')
+        logger.info('Loan deleted successfully', extra={'entity_id': loan_id, 'outcome': 'deleted'})
         # Redirect to the list of loans
         return redirect(url_for('loans.list_loans'))
     except Exception as e:
         db.session.rollback()
         error_message = f'Error deleting loan: {str(e)}'
-        print('Error deleting loan:', error_message)  # Log the error message
+        logger.exception('Error deleting loan', extra={'entity_id': loan_id, 'outcome': 'error'})
         return jsonify({'error': error_message}), 500
 
 
@@ -172,51 +473,22 @@ def get_loan_details(loan_id):
 
     if loan:
         # Create a dictionary with loan details
-        loan_data = {
-            'id': loan.id,
-            'customer_name': loan.customer_name,
-            'book_name': loan.book_name,
-            'loan_date': loan.loan_date,
-            'return_date': loan.return_date
-        }
+        loan_data = serialize_loan(loan)
         # Return loan data in JSON format
         return jsonify(loan=loan_data)
     else:
-        print('Loan not found')
+        logger.warning('Loan not found', extra={'entity_id': loan_id, 'outcome': 'not_found'})
         return jsonify({'error': 'Loan not found'}), 404
 
 
 # Route to get book details by name in JSON format
 @loans.route('/books/details/<string:book_name>', methods=['GET'])
 def get_book_details(book_name):
-    # Check if the book is in the "loans" database
-    loaned_book = Loan.query.filter_by(book_name=book_name).first()
-
-    if loaned_book:
-        # Book is in "loans" database, return its details
-        book_data = {
-            'id': loaned_book.id,
-            'name': loaned_book.book_name,
-            'author': loaned_book.original_author,
-            'year_published': loaned_book.original_year_published,
-            'book_type': loaned_book.original_book_type
-        }
-        return jsonify(book=book_data)
+    # Loaned books stay in the "books" table, so one lookup on the name index is enough
+    book = Book.query.filter_by(name=book_name).first()
+
+    if book:
+        return jsonify(book=serialize_book_details(book))
     else:
-        # Book not found in "loans" database, proceed to check "books" database
-        book = Book.query.filter_by(name=book_name).first()
-
-        if book:
-            # Book found in "books" database, return its details
-            book_data = {
-                'id': book.id,
-                'name': book.name,
-                'author': book.author,
-                'year_published': book.year_published,
-                'book_type': book.book_type
-            }
-            return jsonify(book=book_data)
-        else:
-            # Book not found in both "loans" and "books" databases
-            print('Book not found')
-            return jsonify({'error': 'Book not found'}), 404
+        logger.warning('Book not found', extra={'entity_id': book_name, 'outcome': 'not_found'})
+        return jsonify({'error': 'Book not found'}), 404
@@ -1,29 +1,5 @@
 document.addEventListener("DOMContentLoaded", () => {
 
-    // Function to handle search
-    const searchBooks = () => {
-        const input = document.getElementById("searchInput");
-        const filter = input.value.toLowerCase();
-        const table = document.querySelector(".table");
-        const tr = table.getElementsByTagName("tr");
-
-        for (let i = 1; i < tr.length; i++) {
-            const tdName = tr[i].getElementsByTagName("td")[0]; // Assuming name is the first column
-            if (tdName) {
-                const txtValue = tdName.textContent || tdName.innerText;
-                const rowDisplay = txtValue.toLowerCase().includes(filter);
-                tr[i].style.display = rowDisplay ? "" : "none";
-            }
-        }
-    };
-
-    const searchInput = document.getElementById("searchInput");
-    if (searchInput) {
-        searchInput.addEventListener("input", searchBooks);
-    } else {
-        console.error("Element with ID 'searchInput' not found.");
-    }
-
     // Function to handle hiding the add book modal
     const hideAddBookModal = () => {
         $('#addBookModal').modal('hide');
@@ -1,24 +1,3 @@
-// Function to handle search
-const searchCustomers = () => {
-    let input, filter, table, tr, td, i, txtValue;
-    input = document.getElementById("searchInput");
-    filter = input.value.toLowerCase();
-    table = document.querySelector(".table");
-    tr = table.getElementsByTagName("tr");
-    for (i = 1; i < tr.length; i++) {
-        td = tr[i].getElementsByTagName("td")[0]; // Use only the first column (names)
-        if (td) {
-            txtValue = td.textContent || td.innerText;
-            // Check if the text contains the search filter
-            tr[i].style.display = txtValue.toLowerCase().includes(filter) ? "" : "none";
-        }
-    }
-};
-
-
-// Event listener for search input
-document.getElementById("searchInput").addEventListener("input", searchCustomers);
-
 $(document).ready(() => {
     $('#addCustomerForm').submit(event => {
         event.preventDefault();  // Prevent the default form submission
@@ -0,0 +1,90 @@
+// Server-side paginated lists: the sort links, the pager and the filter form fetch only
+// the table body (?fragment=1) and swap it in place; the address bar follows along
+document.addEventListener("DOMContentLoaded", () => {
+    const table = document.querySelector("table[data-list]");
+    if (!table) {
+        return;
+    }
+    const filters = document.querySelector("form.list-filters");
+    const pager = document.querySelector(".list-pager");
+
+    // Function to point the sort links, the sort indicators, the pager and the hidden
+    // sort fields of the filter form at the list currently shown
+    const updateControls = (url) => {
+        const params = new URL(url, window.location.href).searchParams;
+        const sort = params.get("sort") || table.dataset.defaultSort;
+        const dir = params.get("dir") || "asc";
+
+        table.querySelectorAll("a.sort-link").forEach(link => {
+            const target = new URL(url, window.location.href);
+            target.searchParams.delete("after");
+            target.searchParams.delete("before");
+            target.searchParams.set("sort", link.dataset.sort);
+            target.searchParams.set("dir", link.dataset.sort === sort && dir === "asc" ? "desc" : "asc");
+            link.href = target.pathname + target.search;
+            link.querySelector(".sort-indicator").innerHTML =
+                link.dataset.sort === sort ? (dir === "desc" ? "&#9660;" : "&#9650;") : "";
+        });
+
+        const tbody = table.querySelector("tbody");
+        pager.querySelectorAll("a[data-page]").forEach(link => {
+            const target = tbody.dataset[`${link.dataset.page}Url`];
+            link.href = target || "#";
+            link.classList.toggle("disabled", !target);
+        });
+
+        if (filters) {
+            filters.elements.sort.value = sort;
+            filters.elements.dir.value = dir;
+        }
+    };
+
+    // Function to fetch the table body of a list URL and swap it in
+    const loadList = (url, push = true) => {
+        const fragmentUrl = new URL(url, window.location.href);
+        fragmentUrl.searchParams.set("fragment", "1");
+
+        return axios.get(fragmentUrl.toString(), { responseType: "text" })
+            .then(response => {
+                const template = document.createElement("template");
+                template.innerHTML = response.data.trim();
+                table.querySelector("tbody").replaceWith(template.content.querySelector("tbody"));
+                if (push) {
+                    history.pushState(null, "", url);
+                }
+                updateControls(url);
+            })
+            .catch(error => {
+                console.error("Error loading list:", error);
+                alert("Error loading list: " + (error.response ? error.response.data.error : error.message));
+            });
+    };
+
+    document.addEventListener("click", event => {
+        const link = event.target.closest("a.sort-link, .list-pager a[data-page]");
+        if (!link) {
+            return;
+        }
+        event.preventDefault();
+        if (!link.classList.contains("disabled")) {
+            loadList(link.href);
+        }
+    });
+
+    if (filters) {
+        filters.addEventListener("submit", event => {
+            event.preventDefault();
+            const params = new URLSearchParams();
+            for (const [name, value] of new FormData(filters)) {
+                if (value) {
+                    params.set(name, value);
+                }
+            }
+            loadList(`${window.location.pathname}?${params}`);
+        });
+    }
+
+    window.addEventListener("popstate", () => {
+        loadList(window.location.href, false);
+    });
+});
@@ -1,80 +1,60 @@
-// Function to filter loans based on search input
-const filterLoans = (searchTerm) => {
-    const tableRows = document.querySelectorAll('tbody tr');
-    tableRows.forEach(row => {
-        const customerName = row.querySelector('td:first-child').textContent.toLowerCase();
-        const bookName = row.querySelector('td:nth-child(2)').textContent.toLowerCase();
-        if (customerName.includes(searchTerm) || bookName.includes(searchTerm)) {
-            row.style.display = '';
-        } else {
-            row.style.display = 'none';
-        }
-    });
-};
+// Delay after the last keystroke before suggestions are requested
+const SUGGEST_DELAY_MS = 150;
 
 
-// Function to fetch and log book data
-const fetchBooks = () => {
-    return axios.get('/loans/books/json')
+// Function to fetch the names starting with what was typed into a loan form field
+const fetchSuggestions = (input) => {
+    const url = new URL(input.dataset.suggestUrl, window.location.href);
+    url.searchParams.set('prefix', input.value);
+    return axios.get(url.toString())
         .then(response => {
-            console.log('Books API response:', response.data.books);
-            return response.data.books;  // Return books for further processing
+            return response.data.books || response.data.customers;
         })
         .catch(error => {
-            console.error('Error fetching books:', error);
+            console.error('Error fetching suggestions:', error);
+            return [];
         });
 };
 
 
-// Function to fetch and log customer data
-const fetchCustomers = () => {
-    return axios.get('/loans/customers/json')
-        .then(response => {
-            console.log('Customers API response:', response.data.customers);
-            return response.data.customers;
-        })
-        .catch(error => {
-            console.error('Error fetching customers:', error);
-        });
-};
+// Function to populate the suggestion list of a field
+const populateSuggestions = (input, data) => {
+    const datalist = document.getElementById(input.getAttribute('list'));
 
+    datalist.innerHTML = '';
 
-// Function to fetch customer details based on customer name
-const fetchCustomerDetails = (customerName) => {
-    return axios.get(`/loans/customers/details/${customerName}`)
-        .then(response => {
-            return response.data.customer;
-        })
-        .catch(error => {
-            console.error('Error fetching customer details:', error);
-        });
+    data.forEach(item => {
+        const option = document.createElement('option');
+        option.value = item.name;
+        datalist.appendChild(option);
+    });
 };
 
 
-// Function to fetch book details based on book name
-const fetchBookDetails = (bookName) => {
-    return axios.get(`/loans/books/details/${bookName}`)
-        .then(response => {
-            return response.data.book;
-        })
-        .catch(error => {
-            console.error('Error fetching book details:', error);
+// Function to keep the suggestions of a field in step with its value, a few names at a time
+const setupSuggestions = (elementId) => {
+    const input = document.getElementById(elementId);
+    if (!input) {
+        return;
+    }
+    let timer = null;
+    let latest = 0;
+
+    const update = () => {
+        const request = ++latest;
+        fetchSuggestions(input).then(data => {
+            // Answers to older keystrokes can arrive late, only the latest one is shown
+            if (request === latest) {
+                populateSuggestions(input, data);
+            }
         });
-};
-
-
-// Function to populate dropdown options
-const populateDropdown = (elementId, data) => {
-    const dropdown = document.getElementById(elementId);
-
-    dropdown.innerHTML = '';
+    };
 
-    data.forEach(item => {
-        const option = document.createElement('option');
-        option.value = item.name;  
-        option.textContent = item.name;
-        dropdown.appendChild(option);
+    input.addEventListener('input', () => {
+        clearTimeout(timer);
+        timer = setTimeout(update, SUGGEST_DELAY_MS);
     });
+    input.addEventListener('focus', update, { once: true });
 };
 
 
@@ -91,12 +71,8 @@ const handleLoanSubmission = (event) => {
         csrf_token: document.getElementById('csrf_token').value
     };
 
-    fetchCustomerDetails(formData.customer_name)
-        .then(customerDetails => {
-            formData.customer_details = customerDetails;
-            // Use axios to make an AJAX POST request
-            return axios.post('/loans/create', formData);
-        })
+    // The server resolves the customer by name, so the form is posted as it is
+    axios.post('/loans/create', formData)
         .then(response => {
             console.log('Loan added successfully!');
         })
@@ -107,40 +83,10 @@ const handleLoanSubmission = (event) => {
 };
 
 
-// Function to fetch loan details based on loan ID
-const fetchLoanDetails = (loanId) => {
-    return axios.get(`/loans/${loanId}/details`)
-        .then(response => {
-            const loanDetails = response.data.loan;
-
-            // Fetch book details based on book name
-            return fetchBookDetails(loanDetails.book_name)
-                .then(bookDetails => {
-                    loanDetails.book_details = bookDetails;
-                    return loanDetails;
-                });
-        })
-        .catch(error => {
-            console.error('Error fetching loan details:', error);
-            throw error; 
-        });
-};
-
-
 // Function to handle deleting a loan
 const deleteLoan = (loanId) => {
-    fetchLoanDetails(loanId)
-        .then(loanDetails => {
-            const bookDetails = {
-                name: loanDetails.book_name,
-                author: loanDetails.original_author,
-                year_published: loanDetails.original_year_published,
-                book_type: loanDetails.original_book_type
-            };
-
-            // Delete the loan and return the book to the books database
-            return axios.post(`/loans/${loanId}/delete`, bookDetails);
-        })
+    // Delete the loan and return the book to the books database
+    axios.post(`/loans/${loanId}/delete`)
         .then(() => {
             alert('Loan deleted successfully.');
             const deletedLoanRow = document.getElementById(`loan-${loanId}`);
@@ -163,37 +109,19 @@ const setupEventListeners = () => {
         addLoanButton.addEventListener('click', handleLoanSubmission);
     }
 
-    const searchInput = document.getElementById('searchInput');
-    if (searchInput) {
-        searchInput.addEventListener('input', () => {
-            const searchTerm = searchInput.value.toLowerCase();
-            filterLoans(searchTerm);
-        });
-    }
-
-    const deleteButtons = document.querySelectorAll('.delete-button');
-    deleteButtons.forEach(button => {
-        button.addEventListener('click', () => {
+    // Delegated, so rows swapped in by a page change are handled as well
+    document.addEventListener('click', event => {
+        const button = event.target.closest('.delete-button');
+        if (button) {
             const loanId = button.dataset.loanId;
             console.log('Delete button clicked for loan ID:', loanId);
             deleteLoan(loanId);
-        });
+        }
     });
 };
 
 
-// Fetch books and populate the book dropdown
-fetchBooks()
-    .then(function (books) {
-        populateDropdown('book_name', books);
-    })
-    .then(function () {
-        return fetchCustomers();  // Fetch customers after books
-    })
-    .then(function (customers) {
-        populateDropdown('customer_name', customers);
-    })
-    .then(function () {
-        // Setup event listeners after fetching data
-        setupEventListeners();
-    });
+// Suggest books and customers as their names are typed
+setupSuggestions('book_name');
+setupSuggestions('customer_name');
+setupEventListeners();
@@ -1,21 +1,57 @@
-import pytest
+import hashlib
 import os
-from project import app, db
+import sqlite3
+import pytest
+from sqlalchemy.schema import CreateTable
+from project import create_app, db
+from project.core.cache import response_cache
+from project.core.compression import gzip_cache
+from project.core.engine import RoutingSession
+from project.core.templates import row_cache
 
+# Rows of the pre-seeded template database used by the `seeded_db` fixture
+SEEDED_ROWS = {'books': 2000, 'customers': 200, 'loans': 200}
 
-@pytest.fixture(scope='function')
-def test_app():
+
+@pytest.fixture(scope='session')
+def app():
     """Create application for testing"""
-    # Use in-memory SQLite database for testing
-    app.config['TESTING'] = True
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
-    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    app.config['WTF_CSRF_ENABLED'] = False
-    
+    # Use in-memory SQLite database for testing. Each process (and each pytest-xdist
+    # worker) gets its own database, kept for the whole session by a single connection.
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+        'WTF_CSRF_ENABLED': False,
+    })
     with app.app_context():
-        db.create_all()
-        yield app
-        db.drop_all()
+        db.create_all(bind_key=None)
+    return app
+
+
+@pytest.fixture(scope='function')
+def test_app(app):
+    """Run one test inside a transaction that is rolled back afterwards"""
+    # Commits made by the code under test only release a SAVEPOINT of the outer transaction
+    with app.app_context():
+        connection = db.engine.connect()
+        transaction = connection.begin()
+        session = db.session
+        db.session = db._make_scoped_session({
+            'class_': RoutingSession,
+            'bind': connection,
+            'join_transaction_mode': 'create_savepoint',
+        })
+        response_cache.clear()
+        gzip_cache.clear()
+        row_cache.clear()
+        try:
+            yield app
+        finally:
+            db.session.remove()
+            db.session = session
+            transaction.rollback()
+            connection.close()
 
 
 @pytest.fixture(scope='function')
@@ -23,3 +59,70 @@ def test_db(test_app):
     """Create database for testing"""
     return db
 
+
+
+@pytest.fixture(scope='function')
+def client(test_app):
+    """Create test client for the views"""
+    return test_app.test_client()
+
+
+# Function to name a template after everything its contents depend on: the schema, the
+# generator and the row counts
+def template_key():
+    from project.core import seed
+
+    key = hashlib.md5(repr(sorted(SEEDED_ROWS.items())).encode())
+    for table in db.metadata.sorted_tables:
+        key.update(str(CreateTable(table)).encode())
+    with open(seed.__file__, 'rb') as f:
+        key.update(f.read())
+    return key.hexdigest()[:12]
+
+
+@pytest.fixture(scope='session')
+def db_template(app, request, tmp_path_factory):
+    """Path of a pre-seeded template database, built once and kept in the pytest cache"""
+    from project.core.seed import seed_database
+
+    cache = getattr(request.config, 'cache', None)
+    directory = cache.mkdir('db-templates') if cache else tmp_path_factory.getbasetemp()
+    path = os.path.join(directory, f'seeded-{template_key()}.sqlite')
+    if not os.path.exists(path):
+        # Built under a temporary name and renamed, so parallel workers never read half a file
+        partial = f'{path}.{os.getpid()}'
+        template = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{partial}', 'DB_READ_ROUTING': False,
+                               'METRICS_ENABLED': False, 'SLOW_QUERY_THRESHOLD_MS': 0})
+        with template.app_context():
+            db.create_all(bind_key=None)
+            seed_database(**SEEDED_ROWS, seed=0)
+            db.session.remove()
+            for engine in db.engines.values():
+                engine.dispose()
+        os.replace(partial, path)
+    return path
+
+
+# Request seeded_db before test_app/client (or use seeded_client), so the data is copied in
+# before the test's transaction starts
+@pytest.fixture(scope='function')
+def seeded_db(app, db_template):
+    """Database filled from the template with the SQLite backup API, emptied again afterwards"""
+    with app.app_context():
+        connection = db.engine.raw_connection()
+        try:
+            source = sqlite3.connect(db_template)
+            source.backup(connection.driver_connection)
+            source.close()
+        finally:
+            connection.close()
+    yield db
+    with app.app_context():
+        db.drop_all(bind_key=None)
+        db.create_all(bind_key=None)
+
+
+@pytest.fixture(scope='function')
+def seeded_client(seeded_db, client):
+    """Create test client for the views, over the pre-seeded database"""
+    return client
@@ -0,0 +1,30 @@
+import os
+import subprocess
+import sys
+from project import create_app, db
+from project.books.models import Book
+
+
+class TestAppFactory:
+    """Testy fabryki aplikacji"""
+
+    def test_import_has_no_side_effects(self, tmp_path):
+        """Test importu pakietu bez tworzenia aplikacji i bazy danych"""
+        path = tmp_path / 'import.sqlite'
+        code = 'import project, project.books.models, project.loans.views; assert not hasattr(project, "app")'
+        env = dict(os.environ, DATABASE_URL=f'sqlite:///{path}')
+        subprocess.run([sys.executable, '-c', code], env=env, check=True,
+                       cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        assert not path.exists()
+
+    def test_config_overrides(self, tmp_path):
+        """Test nadpisywania konfiguracji i braku schematu po utworzeniu aplikacji"""
+        app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'app.sqlite'}", 'SLOW_QUERY_THRESHOLD_MS': 0})
+        assert app.config['SLOW_QUERY_THRESHOLD_MS'] == 0
+        assert app.config['SECRET_KEY']
+        with app.app_context():
+            assert not db.inspect(db.engine).has_table(Book.__tablename__)
+
+    def test_db_commands_registered(self, app):
+        """Test komend CLI"""
+        assert {'db', 'seed'} <= set(app.cli.commands)
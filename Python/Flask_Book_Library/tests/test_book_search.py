@@ -0,0 +1,57 @@
+from project.books.models import Book
+
+
+def add_book(test_db, name, author):
+    book = Book(name=name, author=author, year_published=2000, book_type="2days")
+    test_db.session.add(book)
+    test_db.session.commit()
+    return book
+
+
+class TestBookSearch:
+    """Testy wyszukiwania pełnotekstowego"""
+
+    def test_search_by_name_and_author(self, client, test_db):
+        """Test wyszukiwania po tytule i autorze, trafienia w tytule wyżej"""
+        add_book(test_db, "Pan Tadeusz", "Adam Mickiewicz")
+        add_book(test_db, "Solaris", "Stanislaw Lem")
+        add_book(test_db, "Lem Biography", "Someone")
+
+        names = [book['name'] for book in client.get('/books/search?q=lem').get_json()['books']]
+        assert names == ["Lem Biography", "Solaris"]
+
+    def test_prefix_and_diacritics(self, client, test_db):
+        """Test wyszukiwania po prefiksie i bez polskich znaków"""
+        add_book(test_db, "Zażółć gęślą jaźń", "Autor")
+        names = [book['name'] for book in client.get('/books/search?q=gesla jaz').get_json()['books']]
+        assert names == ["Zażółć gęślą jaźń"]
+
+    def test_index_follows_edit_and_delete(self, client, test_db):
+        """Test synchronizacji indeksu przy edycji i usuwaniu"""
+        book = add_book(test_db, "Old Title", "Author")
+        client.post(f'/books/{book.id}/edit', json={'name': "New Title"})
+        assert client.get('/books/search?q=old').get_json()['books'] == []
+        assert len(client.get('/books/search?q=new').get_json()['books']) == 1
+
+        client.post(f'/books/{book.id}/delete')
+        assert client.get('/books/search?q=new').get_json()['books'] == []
+
+    def test_pagination(self, client, test_db):
+        """Test stronicowania wyników"""
+        for i in range(5):
+            add_book(test_db, f"Saga part {i}", "Author")
+        first = client.get('/books/search?q=saga&limit=3').get_json()
+        assert len(first['books']) == 3
+        second = client.get(f"/books/search?q=saga&limit=3&offset={first['next_offset']}").get_json()
+        assert len(second['books']) == 2
+        assert second['next_offset'] is None
+
+    def test_fts_syntax_is_escaped(self, client, test_db):
+        """Test znaków specjalnych FTS5 w zapytaniu"""
+        add_book(test_db, "C++ Primer", "Author")
+        response = client.get('/books/search?q=c++ "primer OR')
+        assert response.status_code == 200
+
+    def test_missing_query(self, client, test_db):
+        """Test braku parametru q"""
+        assert client.get('/books/search').status_code == 400
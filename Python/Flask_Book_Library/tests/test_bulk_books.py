@@ -0,0 +1,91 @@
+import io
+import json
+from project import create_app, db
+from project.books.models import Book
+from project.books import bulk
+
+
+def book_row(i):
+    return {'name': f"Book {i}", 'author': "Author", 'year_published': 2000 + i, 'book_type': "2days"}
+
+
+class TestBulkBooks:
+    """Testy masowego dodawania książek"""
+
+    def test_json_array(self, client, test_db):
+        """Test dodawania książek z tablicy JSON"""
+        response = client.post('/books/bulk', json=[book_row(i) for i in range(3)])
+        assert response.status_code == 200
+        assert response.get_json() == {'inserted': 3, 'failed': 0, 'errors': []}
+        assert Book.query.count() == 3
+
+    def test_ndjson(self, client, test_db):
+        """Test dodawania książek z NDJSON, z błędną linią"""
+        body = '\n'.join([json.dumps(book_row(1)), 'not json', json.dumps(book_row(2))])
+        response = client.post('/books/bulk', data=body, content_type='application/x-ndjson')
+        data = response.get_json()
+        assert data['inserted'] == 2
+        assert data['errors'][0]['row'] == 2
+
+    def test_csv_upload(self, client, test_db):
+        """Test dodawania książek z pliku CSV"""
+        csv_data = "name,author,year_published,book_type\nCsv Book,Author,2001,5days\nBad Book,Author,abc,5days\n"
+        response = client.post('/books/bulk', data={'file': (io.BytesIO(csv_data.encode()), 'books.csv')},
+                               content_type='multipart/form-data')
+        data = response.get_json()
+        assert data['inserted'] == 1
+        assert data['errors'] == [{'row': 2, 'error': 'year_published must be an integer'}]
+        assert Book.query.filter_by(name="Csv Book").first().year_published == 2001
+
+    def test_duplicates_do_not_abort_batch(self, client, test_db, monkeypatch):
+        """Test duplikatów nazwy - reszta partii zostaje zapisana"""
+        monkeypatch.setattr(bulk, 'BULK_BATCH_SIZE', 2)
+        test_db.session.add(Book(**book_row(0)))
+        test_db.session.commit()
+
+        rows = [book_row(0), book_row(1), book_row(2), book_row(2), book_row(3)]
+        data = client.post('/books/bulk', json=rows).get_json()
+        assert data['inserted'] == 3
+        assert [error['row'] for error in data['errors']] == [1, 4]
+        assert Book.query.count() == 4
+
+    def test_failed_batch_rolls_back_on_file_database(self, tmp_path, monkeypatch):
+        """Test partii z duplikatem na bazie w pliku - zapis bez częściowych partii, błędy w kolejności wierszy"""
+        monkeypatch.setattr(bulk, 'BULK_BATCH_SIZE', 3)
+        app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'bulk.sqlite'}", 'SQLITE_PROFILE': 'production'})
+        with app.app_context():
+            db.create_all(bind_key=None)
+        client = app.test_client()
+
+        rows = [book_row(1), book_row(2), book_row(1), {'name': "No author"}, book_row(3)]
+        data = client.post('/books/bulk', json=rows).get_json()
+        assert data['inserted'] == 3
+        assert [error['row'] for error in data['errors']] == [3, 4]
+        with app.app_context():
+            assert sorted(name for (name,) in db.session.query(Book.name)) == ["Book 1", "Book 2", "Book 3"]
+            assert client.get('/stats').get_json()['books']['total'] == 3
+            db.session.remove()
+            for engine in db.engines.values():
+                engine.dispose()
+
+    def test_unreadable_stream_reports_committed_rows(self, client, test_db, monkeypatch):
+        """Test błędu kodowania w środku NDJSON - odpowiedź 400 z liczbą zapisanych wierszy i numerem wiersza błędu"""
+        monkeypatch.setattr(bulk, 'BULK_BATCH_SIZE', 50)
+        body = ''.join(json.dumps(book_row(i)) + '\n' for i in range(300)).encode() + b'\xff\xfe\n'
+        response = client.post('/books/bulk', data=body, content_type='application/x-ndjson')
+        data = response.get_json()
+        assert response.status_code == 400
+        assert 0 < data['inserted'] <= 300
+        assert data['errors'] == [{'row': data['inserted'] + 1, 'error': data['error']}]
+        assert Book.query.count() == data['inserted']
+
+    def test_unsupported_payload(self, client, test_db):
+        """Test niepoprawnego typu danych"""
+        assert client.post('/books/bulk', data='x', content_type='text/plain').status_code == 400
+        assert client.post('/books/bulk', json={'name': 'x'}).status_code == 400
+
+    def test_malformed_json(self, client, test_db):
+        """Test niepoprawnego JSON - błąd 400 z opisem błędu parsowania"""
+        response = client.post('/books/bulk', data='[{"name": "x",', content_type='application/json')
+        assert response.status_code == 400
+        assert response.get_json()['error'].startswith('Invalid JSON')
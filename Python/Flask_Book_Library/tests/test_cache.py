@@ -0,0 +1,64 @@
+from project.books.models import Book
+from project.core.cache import ResponseCache, response_cache
+
+
+def create_book(client, name):
+    return client.post('/books/create', json={'name': name, 'author': "Author", 'year_published': 2000, 'book_type': "2days"})
+
+
+class TestResponseCache:
+    """Testy pamięci podręcznej katalogu"""
+
+    def test_second_read_is_a_hit(self, client, test_db):
+        """Test drugiego odczytu z pamięci podręcznej"""
+        create_book(client, "Book 1")
+        assert client.get('/books/json').headers['X-Cache'] == 'MISS'
+        response = client.get('/books/json')
+        assert response.headers['X-Cache'] == 'HIT'
+        assert [book['name'] for book in response.get_json()['books']] == ["Book 1"]
+        assert response_cache.stats()['hits'] == 1
+
+    def test_write_invalidates(self, client, test_db):
+        """Test unieważnienia po dodaniu, edycji i usunięciu książki"""
+        create_book(client, "Book 1")
+        client.get('/books/json')
+        create_book(client, "Book 2")
+        response = client.get('/books/json')
+        assert response.headers['X-Cache'] == 'MISS'
+        assert len(response.get_json()['books']) == 2
+
+        book = Book.query.filter_by(name="Book 2").first()
+        client.post(f'/books/{book.id}/edit', json={'name': "Book 3"})
+        assert client.get('/books/json').get_json()['books'][1]['name'] == "Book 3"
+
+        client.post(f'/books/{book.id}/delete')
+        assert len(client.get('/books/json').get_json()['books']) == 1
+
+    def test_query_string_is_part_of_key(self, client, test_db):
+        """Test osobnych wpisów dla różnych parametrów"""
+        create_book(client, "Book 1")
+        client.get('/books/json')
+        assert client.get('/books/json?limit=1').headers['X-Cache'] == 'MISS'
+
+    def test_streamed_response_not_cached(self, client, test_db):
+        """Test odpowiedzi strumieniowej - nie trafia do pamięci podręcznej"""
+        client.get('/books/json?format=ndjson')
+        assert client.get('/books/json?format=ndjson').headers['X-Cache'] == 'MISS'
+
+    def test_memory_bound(self):
+        """Test limitu pamięci - najstarsze wpisy są usuwane"""
+        cache = ResponseCache(max_bytes=10)
+        cache.put('a', 1, b'12345', 'text/plain')
+        cache.put('b', 1, b'12345', 'text/plain')
+        cache.put('c', 1, b'12345', 'text/plain')
+        assert cache.get('a', 1) is None
+        assert cache.get('c', 1) is not None
+        assert cache.get('c', 2) is None
+        stats = cache.stats()
+        assert stats['evictions'] == 1
+        assert stats['size_bytes'] == 5
+
+    def test_stats_endpoint(self, client, test_db):
+        """Test endpointu ze statystykami"""
+        data = client.get('/cache/stats').get_json()
+        assert {'hits', 'misses', 'entries', 'size_bytes'} <= set(data)
@@ -0,0 +1,40 @@
+import pytest
+from project.core.pagination import encode_cursor
+
+
+def as_objects(data):
+    return [dict(zip(data['columns'], row)) for row in data['rows']]
+
+
+class TestColumnarShape:
+    """Testy kolumnowego formatu JSON (?shape=columnar)"""
+
+    @pytest.mark.parametrize('path,key', [('/books/json', 'books'), ('/customers/json', 'customers'), ('/loans/json', 'loans')])
+    def test_same_data_as_objects(self, seeded_client, path, key):
+        """Test zgodności formatu kolumnowego z listą obiektów"""
+        objects = seeded_client.get(path).get_json()[key]
+        data = seeded_client.get(f'{path}?shape=columnar').get_json()
+        assert list(data) == ['columns', 'next_cursor', 'rows']
+        assert sorted(data['columns']) == sorted(objects[0])
+        assert as_objects(data) == sorted(objects, key=lambda row: row['id'])
+        assert data['next_cursor'] is None
+
+    @pytest.mark.parametrize('query', ['limit=7', 'limit=7&after=20', 'limit=5&sort=name',
+                                       f"limit=5&sort=name&after={encode_cursor(['M', 0])}"])
+    def test_pages(self, seeded_client, query):
+        """Test stron formatu kolumnowego - te same wiersze i kursor co lista obiektów"""
+        objects = seeded_client.get(f'/books/json?{query}').get_json()
+        data = seeded_client.get(f'/books/json?{query}&shape=columnar').get_json()
+        assert as_objects(data) == objects['books']
+        assert data['next_cursor'] == objects['next_cursor']
+
+    def test_payload_smaller(self, seeded_client):
+        """Test mniejszego rozmiaru odpowiedzi bez powtarzanych kluczy"""
+        objects = seeded_client.get('/loans/json').get_data()
+        columnar = seeded_client.get('/loans/json?shape=columnar').get_data()
+        assert len(columnar) < len(objects) * 0.7
+
+    @pytest.mark.parametrize('query', ['shape=rows', 'shape=columnar&format=ndjson', 'shape=columnar&limit=0'])
+    def test_invalid_shape(self, client, test_db, query):
+        """Test niepoprawnego kształtu odpowiedzi"""
+        assert client.get(f'/customers/json?{query}').status_code == 400
@@ -0,0 +1,67 @@
+import gzip
+import json
+from project.core import streaming
+from project.core.compression import compress_static_files, gzip_cache
+
+GZIP = {'Accept-Encoding': 'gzip, deflate'}
+
+
+class TestCompression:
+    """Testy kompresji gzip odpowiedzi"""
+
+    def test_large_json_compressed(self, seeded_client):
+        """Test kompresji dużej odpowiedzi JSON dla klienta akceptującego gzip"""
+        plain = seeded_client.get('/books/json')
+        compressed = seeded_client.get('/books/json', headers=GZIP)
+        assert 'Content-Encoding' not in plain.headers
+        assert compressed.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in plain.headers['Vary'] and 'Accept-Encoding' in compressed.headers['Vary']
+        assert int(compressed.headers['Content-Length']) < len(plain.get_data()) / 3
+        assert gzip.decompress(compressed.get_data()) == plain.get_data()
+        assert seeded_client.get('/books/json', headers=GZIP).get_data() == compressed.get_data()
+        assert gzip_cache.stats()['hits'] == 1
+
+    def test_negotiation_and_threshold(self, client, test_db, monkeypatch):
+        """Test odrzuconego gzip (q=0) i odpowiedzi poniżej progu"""
+        client.post('/books/create', json={'name': "Solaris", 'author': "Stanislaw Lem", 'year_published': 1961, 'book_type': '5days'})
+        assert 'Content-Encoding' not in client.get('/books/json', headers=GZIP).headers
+        monkeypatch.setitem(client.application.config, 'COMPRESSION_MIN_SIZE', 10)
+        assert client.get('/books/json', headers=GZIP).headers['Content-Encoding'] == 'gzip'
+        assert client.get('/books/json', headers={'Accept-Encoding': '*'}).headers['Content-Encoding'] == 'gzip'
+        assert 'Content-Encoding' not in client.get('/books/json', headers={'Accept-Encoding': 'gzip;q=0, br'}).headers
+
+    def test_streamed_ndjson(self, client, test_db, monkeypatch):
+        """Test kompresji strumienia NDJSON porcja po porcji"""
+        monkeypatch.setattr(streaming, 'EXPORT_CHUNK_SIZE', 2)
+        for i in range(5):
+            client.post('/books/create', json={'name': f"Book {i}", 'author': "Author", 'year_published': 2000, 'book_type': '2days'})
+        response = client.get('/books/json?format=ndjson', headers=GZIP)
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Content-Length' not in response.headers
+        lines = gzip.decompress(response.get_data()).decode().splitlines()
+        assert [json.loads(line)['name'] for line in lines] == [f"Book {i}" for i in range(5)]
+
+    def test_weak_etag_revalidates(self, seeded_client):
+        """Test słabego ETag skompresowanej odpowiedzi i odpowiedzi 304"""
+        etag = seeded_client.get('/customers/json', headers=GZIP).headers['ETag']
+        assert etag.startswith('W/')
+        assert seeded_client.get('/customers/json', headers={**GZIP, 'If-None-Match': etag}).status_code == 304
+        assert seeded_client.get('/customers/json', headers={'If-None-Match': etag}).status_code == 304
+
+    def test_precompressed_static(self, client, test_db, tmp_path, monkeypatch):
+        """Test plików statycznych skompresowanych przy budowaniu"""
+        (tmp_path / 'js').mkdir()
+        script = b'function hello() { return "hello"; }\n' * 50
+        (tmp_path / 'js' / 'app.js').write_bytes(script)
+        (tmp_path / 'js' / 'tiny.js').write_bytes(b';')
+        assert [name for name, _, _ in compress_static_files(str(tmp_path))] == ['js/app.js']
+        monkeypatch.setattr(client.application, 'static_folder', str(tmp_path))
+
+        response = client.get('/static/js/app.js', headers=GZIP)
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert response.mimetype in ('text/javascript', 'application/javascript')
+        assert gzip.decompress(response.get_data()) == script
+        plain = client.get('/static/js/app.js')
+        assert 'Content-Encoding' not in plain.headers and plain.get_data() == script
+        assert 'Accept-Encoding' in plain.headers['Vary']
+        assert client.get('/static/js/tiny.js', headers=GZIP).get_data() == b';'
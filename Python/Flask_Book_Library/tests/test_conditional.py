@@ -0,0 +1,57 @@
+from project.customers.models import Customer
+
+
+def add_customer(test_db, name):
+    test_db.session.add(Customer(name=name, city="Krakow", age=30, pesel="90010112345", street="Main", appNo="1"))
+    test_db.session.commit()
+
+
+class TestConditionalRequests:
+    """Testy nagłówków ETag i Last-Modified"""
+
+    def test_etag_returns_304(self, client, test_db):
+        """Test odpowiedzi 304 dla aktualnego ETag"""
+        response = client.get('/books/json')
+        etag = response.headers['ETag']
+        response = client.get('/books/json', headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        assert response.get_data() == b''
+
+    def test_etag_changes_after_write(self, client, test_db):
+        """Test zmiany ETag po zapisie"""
+        etag = client.get('/customers/json').headers['ETag']
+        client.post('/customers/create', data={'name': "Jan", 'city': "Krakow", 'age': 30, 'pesel': "1", 'street': "Main", 'appNo': "1"})
+        response = client.get('/customers/json', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+        assert response.headers['Last-Modified']
+
+    def test_etag_depends_on_query(self, client, test_db):
+        """Test różnych ETag dla różnych stron"""
+        first = client.get('/customers/json?limit=1').headers['ETag']
+        second = client.get('/customers/json?limit=2').headers['ETag']
+        assert first != second
+
+    def test_if_modified_since_ignored(self, client, test_db):
+        """Test zapisu w tej samej sekundzie - If-Modified-Since nie daje 304, tylko ETag"""
+        client.post('/books/create', json={'name': "Book", 'author': "Author", 'year_published': 2000, 'book_type': "2days"})
+        response = client.get('/books/json')
+        last_modified, etag = response.headers['Last-Modified'], response.headers['ETag']
+        client.post('/books/create', json={'name': "Book 2", 'author': "Author", 'year_published': 2000, 'book_type': "2days"})
+        response = client.get('/books/json', headers={'If-Modified-Since': last_modified})
+        assert response.status_code == 200
+        assert len(response.get_json()['books']) == 2
+        assert client.get('/books/json', headers={'If-None-Match': etag, 'If-Modified-Since': last_modified}).status_code == 200
+
+    def test_loans_etag_follows_customer_rename(self, client, test_db):
+        """Test ETag wypożyczeń po zmianie nazwy klienta"""
+        add_customer(test_db, "Jan")
+        etag = client.get('/loans/json').headers['ETag']
+        customer = Customer.query.first()
+        client.post(f'/customers/{customer.id}/edit', data={'name': "Janek", 'city': "Krakow", 'age': 31})
+        assert client.get('/loans/json', headers={'If-None-Match': etag}).status_code == 200
+
+    def test_updated_at_is_set(self, client, test_db):
+        """Test ustawiania updated_at"""
+        add_customer(test_db, "Jan")
+        assert Customer.query.first().updated_at is not None
@@ -0,0 +1,76 @@
+import pytest
+from datetime import datetime
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.exc import IntegrityError
+from project import create_app, db
+from project.books.models import Book
+from project.customers.models import Customer
+from project.core.engine import apply_profile, READER_BIND
+from project.loans.models import Loan
+
+
+class TestEngineProfiles:
+    """Testy profili silnika SQLite i kierowania zapytań"""
+
+    def test_production_profile_pragmas(self, tmp_path):
+        """Test ustawień PRAGMA profilu produkcyjnego"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'test.sqlite'}")
+        apply_profile(engine, 'production')
+        with engine.connect() as connection:
+            assert connection.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+            assert connection.execute(text('PRAGMA synchronous')).scalar() == 1
+            assert connection.execute(text('PRAGMA busy_timeout')).scalar() == 5000
+
+    def test_read_only_engine(self, tmp_path):
+        """Test silnika tylko do odczytu"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'test.sqlite'}")
+        apply_profile(engine, 'default', read_only=True)
+        with engine.connect() as connection:
+            with pytest.raises(Exception):
+                connection.execute(text('CREATE TABLE t (id INTEGER)'))
+
+    @pytest.mark.parametrize('profile', ['default', 'production', 'testing'])
+    def test_loan_foreign_keys_enforced(self, tmp_path, profile):
+        """Test wymuszania kluczy obcych wypożyczeń w każdym profilu"""
+        app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.sqlite'}", 'SQLITE_PROFILE': profile})
+        with app.app_context():
+            db.create_all(bind_key=None)
+            customer = Customer(name="Jan Kowalski", city="Warszawa", age=30, pesel="90010112345", street="Prosta", appNo="1")
+            db.session.add(customer)
+            db.session.commit()
+            with pytest.raises(IntegrityError):
+                db.session.execute(insert(Loan).values(customer_id=customer.id, book_id=999,
+                                                       loan_date=datetime(2026, 1, 1), return_date=datetime(2026, 1, 3)))
+            db.session.rollback()
+
+    def test_unknown_profile(self):
+        """Test nieznanego profilu"""
+        with pytest.raises(ValueError):
+            apply_profile(create_engine('sqlite://'), 'fast')
+
+    def test_routing_by_method(self, tmp_path):
+        """Test kierowania zapytań GET do silnika odczytu, a POST do silnika zapisu"""
+        app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.sqlite'}", 'DB_READ_ROUTING': True})
+        with app.test_request_context('/books/', method='GET'):
+            assert db.session.get_bind() is db.engines[READER_BIND]
+        with app.test_request_context('/books/create', method='POST'):
+            assert db.session.get_bind() is db.engine
+
+    def test_writes_in_get_use_writer(self, tmp_path):
+        """Test zapisów wykonywanych w żądaniu GET - zawsze przez silnik zapisu"""
+        app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.sqlite'}", 'DB_READ_ROUTING': True})
+        with app.app_context():
+            db.create_all(bind_key=None)
+        with app.test_request_context('/books/', method='GET'):
+            assert db.session.get_bind(clause=db.update(Book).values(author='A')) is db.engine
+            db.session.add(Book(name="Solaris", author="Stanislaw Lem", year_published=1961, book_type='5days'))
+            assert db.session.get_bind() is db.engine
+            db.session.rollback()
+            assert db.session.get_bind() is db.engines[READER_BIND]
+
+        client = app.test_client()
+        assert client.get('/books/create').status_code == 405
+        assert client.get('/customers/create').status_code == 405
+        response = client.post('/books/create', json={'name': "Solaris", 'author': "Stanislaw Lem", 'year_published': 1961, 'book_type': '5days'})
+        assert response.status_code == 302
+        assert client.get('/books/json').get_json()['books'][0]['name'] == "Solaris"
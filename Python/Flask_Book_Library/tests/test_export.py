@@ -0,0 +1,31 @@
+import json
+from project.books.models import Book
+from project.core import streaming
+
+
+class TestNdjsonExport:
+    """Testy eksportu strumieniowego NDJSON"""
+
+    def test_books_ndjson(self, client, test_db, monkeypatch):
+        """Test eksportu książek - jedna linia na książkę, odczyt w porcjach"""
+        monkeypatch.setattr(streaming, 'EXPORT_CHUNK_SIZE', 2)
+        for i in range(5):
+            test_db.session.add(Book(name=f"Book {i}", author="Author", year_published=2000, book_type="2days"))
+        test_db.session.commit()
+
+        response = client.get('/books/json?format=ndjson')
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        lines = response.get_data(as_text=True).splitlines()
+        assert [json.loads(line)['name'] for line in lines] == [f"Book {i}" for i in range(5)]
+
+    def test_empty_ndjson(self, client, test_db):
+        """Test eksportu pustej tabeli"""
+        response = client.get('/customers/json?format=ndjson')
+        assert response.status_code == 200
+        assert response.get_data(as_text=True) == ''
+
+    def test_invalid_format(self, client, test_db):
+        """Test niepoprawnego formatu"""
+        response = client.get('/loans/json?format=xml')
+        assert response.status_code == 400
@@ -0,0 +1,41 @@
+from project.books.models import Book
+from project.customers.models import Customer
+from project.loans.models import Loan
+from tests.conftest import SEEDED_ROWS
+
+
+def new_book(name):
+    return {'name': name, 'author': 'Author', 'year_published': 2000, 'book_type': '2days'}
+
+
+class TestFixtures:
+    """Testy izolacji testów i bazy wzorcowej"""
+
+    def test_commit_inside_test(self, client, test_db):
+        """Test zapisu zatwierdzonego w trakcie testu"""
+        client.post('/books/create', json=new_book('Isolation'))
+        test_db.session.remove()
+        assert Book.query.filter_by(name='Isolation').count() == 1
+
+    def test_commit_rolled_back_after_test(self, client, test_db):
+        """Test wycofania zapisu z poprzedniego testu"""
+        assert Book.query.filter_by(name='Isolation').count() == 0
+
+    def test_seeded_database(self, seeded_client, test_db):
+        """Test bazy skopiowanej z bazy wzorcowej"""
+        assert Book.query.count() == SEEDED_ROWS['books']
+        assert Customer.query.count() == SEEDED_ROWS['customers']
+        assert Loan.query.count() == SEEDED_ROWS['loans']
+
+        ids, after = [], None
+        while True:
+            data = seeded_client.get('/books/json', query_string={'limit': 500, **({'after': after} if after else {})}).get_json()
+            ids += [book['id'] for book in data['books']]
+            after = data['next_cursor']
+            if after is None:
+                break
+        assert len(set(ids)) == SEEDED_ROWS['books']
+
+    def test_seeded_database_restored(self, test_db):
+        """Test pustej bazy po teście z bazą wzorcową"""
+        assert Book.query.count() == 0
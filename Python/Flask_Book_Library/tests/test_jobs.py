@@ -0,0 +1,108 @@
+import json
+from datetime import datetime, timedelta
+import pytest
+from project.core.jobs import JobRunner, claim_job, recover_stale_jobs, submit_job
+from project.core.models import Job, StatCounter
+
+
+@pytest.fixture
+def runner(test_app, tmp_path, monkeypatch):
+    monkeypatch.setitem(test_app.config, 'JOB_RESULTS_DIR', str(tmp_path))
+    return JobRunner(test_app, workers=1, executor='thread')
+
+
+def add_books(client, count):
+    for i in range(count):
+        client.post('/books/create', json={'name': f"Book {i}", 'author': "Author", 'year_published': 2000, 'book_type': '2days'})
+
+
+class TestJobs:
+    """Testy zadań w tle"""
+
+    def test_submit_returns_queued_job(self, client, test_db):
+        """Test zlecenia zadania - odpowiedź 202 i status w kolejce"""
+        response = client.post('/jobs', json={'kind': 'export_books'})
+        assert response.status_code == 202
+        job = response.get_json()['job']
+        assert job['status'] == 'queued' and job['progress'] == 0
+        assert response.headers['Location'] == job['url']
+        assert client.get(job['url']).get_json()['job']['status'] == 'queued'
+
+    @pytest.mark.parametrize('body', [{}, {'kind': 'drop_tables'}, {'kind': 'export_books', 'params': {'limit': 1}},
+                                      {'kind': 'overdue_report', 'params': ['as_of']}])
+    def test_invalid_jobs_rejected(self, client, test_db, body):
+        """Test odrzucenia nieznanego rodzaju zadania i nieznanych parametrów"""
+        assert client.post('/jobs', json=body).status_code == 400
+        assert Job.query.count() == 0
+
+    def test_export_job_result(self, client, test_db, runner):
+        """Test eksportu w tle - postęp, wynik NDJSON i pobranie pliku"""
+        add_books(client, 5)
+        url = client.post('/jobs', json={'kind': 'export_books'}).get_json()['job']['url']
+        assert client.get(f'{url}/result').status_code == 409
+
+        assert runner.drain() == 1
+        job = client.get(url).get_json()['job']
+        assert job['status'] == 'succeeded' and job['progress'] == 1 and job['attempts'] == 1
+        response = client.get(job['result_url'])
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        assert [json.loads(line)['name'] for line in response.get_data(as_text=True).splitlines()] == [f"Book {i}" for i in range(5)]
+
+    def test_report_and_reconcile_jobs(self, client, test_db, runner):
+        """Test raportu przeterminowanych i przeliczenia statystyk w tle"""
+        add_books(client, 2)
+        client.post('/customers/create', data={'name': "Jan Kowalski", 'city': "Krakow", 'age': 30, 'pesel': "90010112345",
+                                               'street': "Main", 'appNo': "1"})
+        client.post('/loans/create', data={'customer_name': "Jan Kowalski", 'book_name': "Book 0",
+                                           'loan_date': '2024-01-01', 'return_date': '2024-01-10'})
+        test_db.session.execute(StatCounter.__table__.update().values(value=0))
+        report = client.post('/jobs', json={'kind': 'overdue_report', 'params': {'as_of': '2024-02-01'}}).get_json()['job']
+        reconcile = client.post('/jobs', json={'kind': 'reconcile_stats'}).get_json()['job']
+
+        assert runner.drain() == 2
+        data = client.get(client.get(report['url']).get_json()['job']['result_url']).get_json()
+        assert data['total'] == 1 and data['counts'][0]['period'] == '2024-01-10'
+        assert client.get(client.get(reconcile['url']).get_json()['job']['result_url']).get_json()['corrected'] > 0
+        assert client.get('/stats').get_json()['books']['total'] == 2
+
+    def test_failed_job(self, client, test_db, runner):
+        """Test zadania zakończonego błędem"""
+        job = client.post('/jobs', json={'kind': 'overdue_report', 'params': {'as_of': 'yesterday'}}).get_json()['job']
+        runner.drain()
+        job = client.get(job['url']).get_json()['job']
+        assert job['status'] == 'failed' and 'yesterday' in job['error']
+        assert client.get(f"{job['url']}/result").status_code == 409
+
+    def test_missing_job_and_result(self, client, test_db, runner):
+        """Test nieistniejącego zadania i usuniętego pliku wyniku"""
+        assert client.get('/jobs/999').status_code == 404
+        assert client.get('/jobs/999/result').status_code == 404
+        url = client.post('/jobs', json={'kind': 'export_customers'}).get_json()['job']['url']
+        runner.drain()
+        job = test_db.session.get(Job, int(url.rsplit('/', 1)[1]))
+        job.result_path += '.gone'
+        test_db.session.commit()
+        assert client.get(f'{url}/result').status_code == 410
+
+    def test_claim_is_exclusive(self, test_app, test_db):
+        """Test pobrania zadania z kolejki - najstarsze i tylko raz"""
+        first = submit_job('export_books')
+        second = submit_job('export_customers')
+        assert claim_job('a') == first.id
+        assert claim_job('b') == second.id
+        assert claim_job('c') is None
+        assert test_db.session.get(Job, first.id).worker == 'a'
+
+    def test_stale_jobs_recovered(self, test_app, test_db):
+        """Test wznowienia zadania bez sygnału życia i porażki po wyczerpaniu prób"""
+        job_id = submit_job('export_books').id
+        for attempt in range(1, 4):
+            assert claim_job('crashed') == job_id
+            test_db.session.get(Job, job_id).heartbeat_at = datetime.utcnow() - timedelta(minutes=5)
+            test_db.session.commit()
+            assert recover_stale_jobs(60, 3) == ((1, 0) if attempt < 3 else (0, 1))
+        job = test_db.session.get(Job, job_id)
+        test_db.session.refresh(job)
+        assert job.status == 'failed' and job.attempts == 3
+        assert recover_stale_jobs(60, 3) == (0, 0)
@@ -0,0 +1,115 @@
+import re
+from datetime import datetime, timedelta
+import pytest
+from project.books.models import Book
+from project.customers.models import Customer
+from project.loans.models import Loan
+
+
+def add_books(test_db, count):
+    for i in range(count):
+        test_db.session.add(Book(name=f"Book {i:03d}", author=f"Author {i % 2}", year_published=2000 + i % 3, book_type="2days"))
+    test_db.session.commit()
+
+
+# Function to read the book names and the links to the neighbouring pages out of a rendered table body
+def read_page(response):
+    html = response.get_data(as_text=True)
+    names = re.findall(r'<td>(Book \d+)</td>', html)
+    links = dict(re.findall(r'data-(prev|next)-url="([^"]*)"', html))
+    return names, links.get('prev', '').replace('&amp;', '&'), links.get('next', '').replace('&amp;', '&')
+
+
+class TestListPages:
+    """Testy stronicowanych list HTML"""
+
+    def test_first_page_only(self, client, test_db):
+        """Test pierwszej strony - tylko limit wierszy i link do następnej"""
+        add_books(test_db, 5)
+        response = client.get('/books/?limit=2')
+        assert response.status_code == 200
+        names, prev_url, next_url = read_page(response)
+        assert names == ["Book 000", "Book 001"]
+        assert prev_url == ''
+        assert next_url.startswith('/books/?') and 'after=' in next_url
+
+    def test_pages_forward_and_back(self, client, test_db):
+        """Test przechodzenia po stronach w przód i z powrotem"""
+        add_books(test_db, 5)
+        pages = []
+        url = '/books/?limit=2&fragment=1'
+        while url:
+            names, prev_url, next_url = read_page(client.get(url))
+            pages.append(names)
+            url = next_url + '&fragment=1' if next_url else None
+        assert pages == [["Book 000", "Book 001"], ["Book 002", "Book 003"], ["Book 004"]]
+
+        names, prev_url, next_url = read_page(client.get(prev_url + '&fragment=1'))
+        assert names == ["Book 002", "Book 003"]
+        names, prev_url, next_url = read_page(client.get(prev_url + '&fragment=1'))
+        assert names == ["Book 000", "Book 001"]
+        assert prev_url == ''
+
+    def test_sort_descending_by_name(self, client, test_db):
+        """Test sortowania malejąco po indeksowanej kolumnie name"""
+        add_books(test_db, 4)
+        names, _, next_url = read_page(client.get('/books/?sort=name&dir=desc&limit=3'))
+        assert names == ["Book 003", "Book 002", "Book 001"]
+        assert 'sort=name' in next_url and 'dir=desc' in next_url
+        names, _, next_url = read_page(client.get(next_url))
+        assert names == ["Book 000"]
+        assert next_url == ''
+
+    def test_filters(self, client, test_db):
+        """Test filtrów kolumn - prefiks nazwy, autor i rok"""
+        add_books(test_db, 12)
+        names, _, _ = read_page(client.get('/books/?name=Book 01'))
+        assert names == ["Book 010", "Book 011"]
+        names, _, _ = read_page(client.get('/books/?author=Author 1&year=2000'))
+        assert names == ["Book 003", "Book 009"]
+
+    def test_fragment_renders_table_body_only(self, client, test_db):
+        """Test fragmentu - tylko <tbody> bez reszty strony"""
+        add_books(test_db, 1)
+        html = client.get('/books/?fragment=1').get_data(as_text=True).strip()
+        assert html.startswith('<tbody') and html.endswith('</tbody>')
+        assert '<html' not in html
+
+    def test_customers_page(self, client, test_db):
+        """Test listy klientów z filtrem miasta"""
+        for i, city in enumerate(["Warszawa", "Kraków", "Warszawa"]):
+            test_db.session.add(Customer(name=f"Customer {i}", city=city, age=30, pesel="1", street="Street", appNo="1"))
+        test_db.session.commit()
+        html = client.get('/customers/?city=Warszawa&sort=name&dir=desc').get_data(as_text=True)
+        assert re.findall(r'<td>(Customer \d)</td>', html) == ["Customer 2", "Customer 0"]
+
+    def test_loans_page_overdue_filter(self, client, test_db):
+        """Test listy wypożyczeń z filtrem przeterminowanych"""
+        customer = Customer(name="Jan", city="City", age=30, pesel="1", street="Street", appNo="1")
+        now = datetime.utcnow()
+        for i, days in enumerate([-3, 5]):
+            book = Book(name=f"Book {i:03d}", author="Author", year_published=2000, book_type="2days", status='loaned')
+            test_db.session.add(Loan(customer, book, now - timedelta(days=10), now + timedelta(days=days)))
+        test_db.session.commit()
+        names = re.findall(r'<td>(Book \d+)</td>', client.get('/loans/?overdue=1&fragment=1').get_data(as_text=True))
+        assert names == ["Book 000"]
+        names = re.findall(r'<td>(Book \d+)</td>', client.get('/loans/?book=Book&sort=return_date&dir=desc').get_data(as_text=True))
+        assert names == ["Book 001", "Book 000"]
+
+    @pytest.mark.parametrize("query", ["sort=author", "dir=up", "limit=0", "after=abc", "year=abc", "after=WzFd&before=WzFd"])
+    def test_invalid_list_args(self, client, test_db, query):
+        """Test niepoprawnych parametrów listy"""
+        response = client.get(f'/books/?{query}')
+        assert response.status_code == 400
+        assert 'error' in response.get_json()
+
+    def test_seeded_pages_sorted_by_name(self, seeded_client):
+        """Test kolejnych stron większej bazy sortowanej po nazwie - bez powtórzeń i luk"""
+        expected = [name for (name,) in Book.query.with_entities(Book.name).order_by(Book.name.desc()).limit(150)]
+        names = []
+        url = '/books/?sort=name&dir=desc&limit=50&fragment=1'
+        for _ in range(3):
+            html = seeded_client.get(url).get_data(as_text=True)
+            names.extend(re.findall(r'<tr>\s*<td>(.*?)</td>', html))
+            url = re.search(r'data-next-url="([^"]*)"', html).group(1).replace('&amp;', '&') + '&fragment=1'
+        assert names == expected
@@ -0,0 +1,204 @@
+from datetime import datetime
+import pytest
+from project.books.models import Book
+from project.customers.models import Customer
+from project.loans.models import Loan
+
+
+def setup_library(test_db):
+    customer = Customer(name="Jan Kowalski", city="Krakow", age=30, pesel="90010112345", street="Main", appNo="1")
+    book = Book(name="Solaris", author="Stanislaw Lem", year_published=1961, book_type="5days")
+    test_db.session.add_all([customer, book])
+    test_db.session.commit()
+    return customer, book
+
+
+def create_loan(client):
+    return client.post('/loans/create', data={
+        'customer_name': "Jan Kowalski",
+        'book_name': "Solaris",
+        'loan_date': '2024-01-01',
+        'return_date': '2024-01-10'
+    })
+
+
+class TestLoans:
+    """Testy wypożyczeń powiązanych kluczami obcymi"""
+
+    def test_create_loan_marks_book_loaned(self, client, test_db):
+        """Test wypożyczenia - książka zostaje w tabeli ze statusem loaned"""
+        customer, book = setup_library(test_db)
+        assert create_loan(client).status_code == 302
+
+        loan = Loan.query.one()
+        assert loan.customer_id == customer.id
+        assert loan.book_id == book.id
+        assert loan.book_name == "Solaris"
+        assert test_db.session.get(Book, book.id).status == 'loaned'
+
+    def test_book_cannot_be_loaned_twice(self, client, test_db):
+        """Test ponownego wypożyczenia tej samej książki"""
+        setup_library(test_db)
+        create_loan(client)
+        assert create_loan(client).status_code == 400
+        assert Loan.query.count() == 1
+
+    def test_delete_loan_returns_book(self, client, test_db):
+        """Test zakończenia wypożyczenia - książka znów dostępna"""
+        _, book = setup_library(test_db)
+        create_loan(client)
+        loan = Loan.query.one()
+
+        assert client.post(f'/loans/{loan.id}/delete').status_code == 302
+        assert Loan.query.count() == 0
+        assert test_db.session.get(Book, book.id).status == 'available'
+
+    def test_book_details_of_loaned_book(self, client, test_db):
+        """Test szczegółów wypożyczonej książki"""
+        _, book = setup_library(test_db)
+        create_loan(client)
+        data = client.get('/loans/books/details/Solaris').get_json()
+        assert data['book']['id'] == book.id
+        assert data['book']['status'] == 'loaned'
+
+    def test_loaned_book_and_customer_cannot_be_deleted(self, client, test_db):
+        """Test usuwania wypożyczonej książki i klienta z wypożyczeniem"""
+        customer, book = setup_library(test_db)
+        create_loan(client)
+        assert client.post(f'/books/{book.id}/delete').status_code == 400
+        assert client.post(f'/customers/{customer.id}/delete').status_code == 400
+
+    def test_loan_json(self, client, test_db):
+        """Test listy wypożyczeń w JSON z nazwami z tabel powiązanych"""
+        setup_library(test_db)
+        create_loan(client)
+        loans = client.get('/loans/json').get_json()['loans']
+        assert loans[0]['customer_name'] == "Jan Kowalski"
+        assert loans[0]['book_name'] == "Solaris"
+
+
+class TestSuggestions:
+    """Testy podpowiedzi nazw w formularzu wypożyczenia"""
+
+    def test_book_prefix(self, client, test_db):
+        """Test podpowiedzi książek po prefiksie, w kolejności alfabetycznej"""
+        for name in ["Solaris", "Sofia", "Eden", "Solaris 2"]:
+            test_db.session.add(Book(name=name, author="Stanislaw Lem", year_published=1961, book_type="5days"))
+        test_db.session.commit()
+        data = client.get('/loans/books/suggest?prefix=So').get_json()
+        assert [book['name'] for book in data['books']] == ["Sofia", "Solaris", "Solaris 2"]
+        data = client.get('/loans/books/suggest?prefix=So&limit=1').get_json()
+        assert [book['name'] for book in data['books']] == ["Sofia"]
+
+    def test_available_books_only(self, client, test_db):
+        """Test podpowiedzi tylko dostępnych książek"""
+        setup_library(test_db)
+        test_db.session.add(Book(name="Solaris 2", author="Stanislaw Lem", year_published=1961, book_type="5days"))
+        test_db.session.commit()
+        create_loan(client)
+        data = client.get('/loans/books/suggest?prefix=Sol&available=1').get_json()
+        assert [book['name'] for book in data['books']] == ["Solaris 2"]
+        data = client.get('/loans/books/suggest?prefix=Sol').get_json()
+        assert len(data['books']) == 2
+
+    def test_customer_prefix(self, client, test_db):
+        """Test podpowiedzi klientów po prefiksie"""
+        setup_library(test_db)
+        data = client.get('/loans/customers/suggest?prefix=Jan').get_json()
+        assert data['customers'] == [{'name': "Jan Kowalski"}]
+        assert client.get('/loans/customers/suggest?prefix=Ka').get_json()['customers'] == []
+
+    def test_invalid_limit(self, client, test_db):
+        """Test niepoprawnego limitu podpowiedzi"""
+        for query in ['limit=0', 'limit=abc', 'limit=1000']:
+            response = client.get(f'/loans/customers/suggest?prefix=J&{query}')
+            assert response.status_code == 400
+
+
+class TestDetailEndpoints:
+    """Testy złożonych i zbiorczych endpointów szczegółów"""
+
+    def test_loan_full(self, client, test_db):
+        """Test wypożyczenia razem z książką i klientem w jednym zapytaniu"""
+        customer, book = setup_library(test_db)
+        create_loan(client)
+        loan = Loan.query.one()
+        data = client.get(f'/loans/{loan.id}/full').get_json()['loan']
+        assert data['id'] == loan.id
+        assert data['book'] == {'id': book.id, 'name': "Solaris", 'author': "Stanislaw Lem", 'year_published': 1961,
+                                'book_type': "5days", 'status': 'loaned'}
+        assert data['customer']['name'] == "Jan Kowalski"
+        assert client.get('/loans/999/full').status_code == 404
+
+    def test_loans_details_batch(self, client, test_db):
+        """Test wielu wypożyczeń po ID - kolejność z zapytania i brakujące ID"""
+        setup_library(test_db)
+        test_db.session.add(Book(name="Eden", author="Stanislaw Lem", year_published=1959, book_type="5days"))
+        test_db.session.commit()
+        create_loan(client)
+        client.post('/loans/create', data={'customer_name': "Jan Kowalski", 'book_name': "Eden",
+                                           'loan_date': '2024-01-01', 'return_date': '2024-01-10'})
+        first, second = [loan.id for loan in Loan.query.order_by(Loan.id)]
+        data = client.get(f'/loans/details?ids={second},999,{first},{second}').get_json()
+        assert [loan['book_name'] for loan in data['loans']] == ["Eden", "Solaris"]
+        assert data['missing'] == [999]
+
+    def test_books_details_batch(self, client, test_db):
+        """Test wielu książek po nazwie jednym zapytaniem"""
+        setup_library(test_db)
+        data = client.get('/books/details?names=Nope,Solaris').get_json()
+        assert [book['name'] for book in data['books']] == ["Solaris"]
+        assert data['missing'] == ["Nope"]
+
+    def test_invalid_batch_keys(self, client, test_db):
+        """Test niepoprawnych kluczy zbiorczych"""
+        assert client.get('/loans/details?ids=1,abc').status_code == 400
+        assert client.get('/loans/details').status_code == 400
+        assert client.get('/books/details?names=').status_code == 400
+        assert client.get('/books/details?names=' + ','.join(str(i) for i in range(1001))).status_code == 400
+
+
+def add_loans(test_db, return_dates):
+    customer = Customer(name="Jan Kowalski", city="Krakow", age=30, pesel="90010112345", street="Main", appNo="1")
+    for i, return_date in enumerate(return_dates):
+        book = Book(name=f"Book {i}", author="Author", year_published=2000, book_type="5days", status='loaned')
+        test_db.session.add(Loan(customer, book, datetime(2024, 1, 1), return_date))
+    test_db.session.commit()
+
+
+class TestDueReports:
+    """Testy raportów terminów zwrotu"""
+
+    def test_overdue_pages(self, client, test_db):
+        """Test przeterminowanych wypożyczeń w kolejności terminu, stronami"""
+        add_loans(test_db, [datetime(2024, 3, day) for day in (5, 1, 9, 3)])
+        data = client.get('/loans/overdue?as_of=2024-03-06&limit=2').get_json()
+        assert [loan['book_name'] for loan in data['loans']] == ["Book 1", "Book 3"]
+        data = client.get(f"/loans/overdue?as_of=2024-03-06&limit=2&after={data['next_cursor']}").get_json()
+        assert [loan['book_name'] for loan in data['loans']] == ["Book 0"]
+        assert data['next_cursor'] is None
+
+    def test_overdue_counts_per_day_and_week(self, client, test_db):
+        """Test liczby przeterminowanych wypożyczeń na dzień i tydzień"""
+        add_loans(test_db, [datetime(2024, 3, 4, 10), datetime(2024, 3, 4, 18), datetime(2024, 3, 10), datetime(2024, 3, 11)])
+        data = client.get('/loans/overdue?as_of=2024-03-12&group=day').get_json()
+        assert data['counts'] == [{'period': '2024-03-04', 'loans': 2}, {'period': '2024-03-10', 'loans': 1},
+                                  {'period': '2024-03-11', 'loans': 1}]
+        data = client.get('/loans/overdue?as_of=2024-03-12&group=week').get_json()
+        assert data['counts'] == [{'period': '2024-03-04', 'loans': 3}, {'period': '2024-03-11', 'loans': 1}]
+        assert data['total'] == 4
+
+    def test_due_range_includes_end_day(self, client, test_db):
+        """Test zakresu terminów - ostatni dzień włącznie"""
+        add_loans(test_db, [datetime(2024, 3, 1), datetime(2024, 3, 2, 23), datetime(2024, 3, 3)])
+        data = client.get('/loans/due?from=2024-03-01&to=2024-03-02').get_json()
+        assert [loan['book_name'] for loan in data['loans']] == ["Book 0", "Book 1"]
+        data = client.get('/loans/due?from=2024-03-01&to=2024-03-02&group=day').get_json()
+        assert data['total'] == 2
+
+    @pytest.mark.parametrize("url", ['/loans/due?from=2024-03-01', '/loans/due?from=2024-03-05&to=2024-03-01',
+                                     '/loans/due?from=yesterday&to=2024-03-01', '/loans/overdue?group=month',
+                                     '/loans/overdue?as_of=soon'])
+    def test_invalid_report_args(self, client, test_db, url):
+        """Test niepoprawnych parametrów raportów"""
+        assert client.get(url).status_code == 400
@@ -0,0 +1,70 @@
+from project.books.models import Book
+from project.core.pagination import MAX_PAGE_SIZE
+from project.customers.models import Customer
+from project.loans.models import Loan
+
+
+def setup_library(test_db, book_count=3):
+    test_db.session.add(Customer(name="Jan Kowalski", city="Krakow", age=30, pesel="90010112345", street="Main", appNo="1"))
+    for i in range(book_count):
+        test_db.session.add(Book(name=f"Book {i}", author="Author", year_published=2000 + i, book_type="2days"))
+    test_db.session.commit()
+
+
+def checkout(client, book_names, customer_name="Jan Kowalski"):
+    return client.post('/loans/batch', json={
+        'customer_name': customer_name,
+        'book_names': book_names,
+        'loan_date': '2024-01-01',
+        'return_date': '2024-01-10'
+    })
+
+
+class TestBatchCheckout:
+    """Testy wypożyczenia wielu książek w jednym żądaniu"""
+
+    def test_checkout_many_books(self, client, test_db):
+        """Test wypożyczenia kilku książek naraz"""
+        setup_library(test_db)
+        response = checkout(client, ["Book 0", "Book 2"])
+        assert response.status_code == 201
+        assert [loan['book_name'] for loan in response.get_json()['loans']] == ["Book 0", "Book 2"]
+        assert Loan.query.count() == 2
+        assert [book.name for book in Book.query.filter_by(status='available')] == ["Book 1"]
+        assert {loan.book.status for loan in Loan.query.all()} == {'loaned'}
+
+    def test_unavailable_book_applies_nothing(self, client, test_db):
+        """Test niedostępnej książki - żadne wypożyczenie nie zostaje zapisane"""
+        setup_library(test_db)
+        response = checkout(client, ["Book 0", "Missing Book"])
+        assert response.status_code == 400
+        assert response.get_json()['unavailable'] == ["Missing Book"]
+        assert Loan.query.count() == 0
+        assert Book.query.filter_by(status='available').count() == 3
+
+    def test_unknown_customer(self, client, test_db):
+        """Test nieistniejącego klienta"""
+        setup_library(test_db)
+        assert checkout(client, ["Book 0"], customer_name="Nobody").status_code == 404
+
+    def test_invalid_request(self, client, test_db):
+        """Test niepoprawnych danych żądania"""
+        setup_library(test_db)
+        assert checkout(client, []).status_code == 400
+        response = client.post('/loans/batch', json={'customer_name': "Jan Kowalski", 'book_names': ["Book 0"], 'loan_date': 'x', 'return_date': 'y'})
+        assert response.status_code == 400
+
+    def test_book_names_must_be_strings(self, client, test_db):
+        """Test listy tytułów z obiektami i listami zamiast napisów"""
+        setup_library(test_db)
+        assert checkout(client, [{}]).status_code == 400
+        assert checkout(client, ["Book 0", ["Book 1"]]).status_code == 400
+        assert checkout(client, ["Book 0", 1]).status_code == 400
+        assert Loan.query.count() == 0
+
+    def test_too_many_book_names(self, client, test_db):
+        """Test limitu liczby tytułów w jednym żądaniu"""
+        setup_library(test_db)
+        response = checkout(client, [f"Book {i}" for i in range(MAX_PAGE_SIZE + 1)])
+        assert response.status_code == 400
+        assert Loan.query.count() == 0
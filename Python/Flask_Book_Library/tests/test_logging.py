@@ -0,0 +1,46 @@
+import json
+import logging
+import sys
+import time
+from flask import g
+from project.core.log import JsonFormatter, RequestContextFilter, StructuredQueueHandler
+
+
+def make_record(msg, *args, **extra):
+    record = logging.LogRecord('project.test', logging.INFO, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class TestStructuredLogging:
+    """Testy logowania strukturalnego"""
+
+    def test_json_fields(self):
+        """Test formatu JSON z polami dodatkowymi"""
+        record = make_record('Book %s added', 'X', entity_id=7, outcome='created')
+        data = json.loads(JsonFormatter().format(record))
+        assert data['message'] == 'Book X added'
+        assert data['entity_id'] == 7
+        assert data['outcome'] == 'created'
+        assert data['level'] == 'INFO'
+
+    def test_request_fields(self, test_app):
+        """Test uzupełniania trasy i metody w trakcie żądania"""
+        record = make_record('Books page accessed')
+        with test_app.test_request_context('/books/'):
+            g.log_request_started = time.perf_counter()
+            RequestContextFilter().filter(record)
+        assert record.route == 'books.list_books'
+        assert record.method == 'GET'
+        assert record.duration_ms >= 0
+
+    def test_exception_kept_separately(self):
+        """Test zachowania wyjątku jako osobnego pola po przejściu przez kolejkę"""
+        try:
+            raise ValueError('boom')
+        except ValueError:
+            record = logging.LogRecord('project.test', logging.ERROR, __file__, 1, 'Error', None, sys.exc_info())
+        prepared = StructuredQueueHandler(None).prepare(record)
+        data = json.loads(JsonFormatter().format(prepared))
+        assert data['message'] == 'Error'
+        assert 'ValueError: boom' in data['exception']
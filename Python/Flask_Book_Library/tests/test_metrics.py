@@ -0,0 +1,55 @@
+import pytest
+from project import create_app
+from project.config import Config
+from project.core.metrics import Histogram, labels, metrics
+
+
+metrics_enabled = pytest.mark.skipif(not Config.METRICS_ENABLED, reason='Metrics are disabled')
+
+
+class TestMetrics:
+    """Testy metryk w formacie Prometheus"""
+
+    def test_histogram_is_cumulative(self):
+        """Test skumulowanych kubełków histogramu"""
+        histogram = Histogram((0.1, 1.0))
+        for value in (0.05, 0.5, 0.7, 3.0):
+            histogram.observe(value)
+        assert list(histogram.cumulative()) == [(0.1, 1), (1.0, 3), (float('inf'), 4)]
+        assert histogram.count == 4
+
+    def test_label_escaping(self):
+        """Test escapowania wartości etykiet"""
+        assert labels(endpoint='a"b\\c') == '{endpoint="a\\"b\\\\c"}'
+
+    @metrics_enabled
+    def test_request_and_sql_metrics(self, client, test_db):
+        """Test zliczania żądań i zapytań SQL"""
+        metrics.reset()
+        client.get('/books/json?limit=5')
+        body = client.get('/metrics').get_data(as_text=True)
+        assert 'http_requests_total{endpoint="books.list_books_json",method="GET",status="200"} 1' in body
+        assert 'http_request_duration_seconds_count{endpoint="books.list_books_json",method="GET"} 1' in body
+        assert 'sql_statements_total{endpoint="books.list_books_json"}' in body
+        assert 'response_cache_misses' in body
+
+    @metrics_enabled
+    def test_metrics_content_type(self, client, test_db):
+        """Test typu treści odpowiedzi"""
+        assert client.get('/metrics').headers['Content-Type'].startswith('text/plain; version=0.0.4')
+
+    @metrics_enabled
+    def test_request_that_raises(self, tmp_path):
+        """Test zliczania żądania zakończonego wyjątkiem jako 500"""
+        app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'metrics.sqlite'}", 'TESTING': True})
+
+        @app.route('/boom')
+        def boom():
+            raise RuntimeError('boom')
+
+        metrics.reset()
+        with pytest.raises(RuntimeError):
+            app.test_client().get('/boom')
+        body = app.test_client().get('/metrics').get_data(as_text=True)
+        assert 'http_requests_total{endpoint="boom",method="GET",status="500"} 1' in body
+        assert 'http_request_duration_seconds_count{endpoint="boom",method="GET"} 1' in body
@@ -0,0 +1,97 @@
+import pytest
+from project.books.models import Book
+from project.customers.models import Customer
+from project.core.pagination import decode_cursor, seek_page
+
+
+def add_books(test_db, count):
+    for i in range(count):
+        test_db.session.add(Book(name=f"Book {i:03d}", author="Author", year_published=2000 + i, book_type="2days"))
+    test_db.session.commit()
+
+
+class TestKeysetPagination:
+    """Testy stronicowania kursorem"""
+
+    def test_full_list_without_page_args(self, client, test_db):
+        """Test listy bez parametrów stronicowania - zwraca wszystkie książki"""
+        add_books(test_db, 5)
+        data = client.get('/books/json').get_json()
+        assert len(data['books']) == 5
+        assert data['next_cursor'] is None
+
+    def test_pages_follow_cursor(self, client, test_db):
+        """Test przechodzenia po stronach za pomocą next_cursor"""
+        add_books(test_db, 7)
+        names = []
+        url = '/books/json?limit=3'
+        while url:
+            data = client.get(url).get_json()
+            assert len(data['books']) <= 3
+            names.extend(book['name'] for book in data['books'])
+            url = f"/books/json?limit=3&after={data['next_cursor']}" if data['next_cursor'] else None
+        assert names == [f"Book {i:03d}" for i in range(7)]
+
+    def test_last_page_has_no_cursor(self, client, test_db):
+        """Test ostatniej strony - brak next_cursor"""
+        add_books(test_db, 3)
+        data = client.get('/books/json?limit=3').get_json()
+        assert len(data['books']) == 3
+        assert data['next_cursor'] is None
+
+    def test_sort_by_name(self, client, test_db):
+        """Test stronicowania po indeksowanej kolumnie name"""
+        for name in ["Charlie", "Alpha", "Bravo"]:
+            test_db.session.add(Customer(name=name, city="City", age=30, pesel="1", street="Street", appNo="1"))
+        test_db.session.commit()
+        data = client.get('/customers/json?sort=name&limit=2').get_json()
+        assert [c['name'] for c in data['customers']] == ["Alpha", "Bravo"]
+        data = client.get(f"/customers/json?sort=name&limit=2&after={data['next_cursor']}").get_json()
+        assert [c['name'] for c in data['customers']] == ["Charlie"]
+        assert data['next_cursor'] is None
+
+    @pytest.mark.parametrize('shape', ['objects', 'columnar'])
+    def test_sort_by_name_with_null_names(self, client, test_db, shape):
+        """Test stronicowania po name z pustymi nazwami - strona kończąca się na NULL nie przerywa listy"""
+        for name in [None, "Bravo", None, "Alpha"]:
+            test_db.session.add(Book(name=name, author="Author", year_published=2000, book_type="2days"))
+        test_db.session.commit()
+        names = []
+        url = f'/books/json?sort=name&limit=1&shape={shape}'
+        while url:
+            data = client.get(url).get_json()
+            if shape == 'objects':
+                names.extend(book['name'] for book in data['books'])
+            else:
+                names.extend(row[data['columns'].index('name')] for row in data['rows'])
+            url = f"/books/json?sort=name&limit=1&shape={shape}&after={data['next_cursor']}" if data['next_cursor'] else None
+        assert names == [None, None, "Alpha", "Bravo"]
+
+    def test_seek_page_with_null_names(self, test_db):
+        """Test stron listy HTML po name z pustymi nazwami, w obu kierunkach"""
+        for name in [None, "Bravo", None, "Alpha"]:
+            test_db.session.add(Book(name=name, author="Author", year_published=2000, book_type="2days"))
+        test_db.session.commit()
+        for descending, expected in ((False, [None, None, "Alpha", "Bravo"]), (True, ["Bravo", "Alpha", None, None])):
+            names = []
+            after = None
+            while True:
+                rows, next_cursor, _ = seek_page(Book.query, [Book.name, Book.id], 1, descending, after=after)
+                names.extend(book.name for book in rows)
+                if next_cursor is None:
+                    break
+                after = decode_cursor(next_cursor, [Book.name, Book.id])
+            assert names == expected
+
+    @pytest.mark.parametrize("query", ["limit=0", "limit=abc", "limit=100000", "sort=author&limit=5", "after=abc"])
+    def test_invalid_page_args(self, client, test_db, query):
+        """Test niepoprawnych parametrów stronicowania"""
+        response = client.get(f'/books/json?{query}')
+        assert response.status_code == 400
+        assert 'error' in response.get_json()
+
+    def test_loans_page(self, client, test_db):
+        """Test stronicowania pustej listy wypożyczeń"""
+        data = client.get('/loans/json?limit=10').get_json()
+        assert data['loans'] == []
+        assert data['next_cursor'] is None
@@ -0,0 +1,100 @@
+from datetime import date
+import pytest
+from project.books.models import Book
+from project.customers.models import Customer
+from project.loans.models import Loan
+from project.core import seed
+from project.core.cache import current_version
+
+
+def pesel_is_valid(value):
+    digits = [int(digit) for digit in value]
+    return len(value) == 11 and (10 - sum(d * w for d, w in zip(digits, seed.PESEL_WEIGHTS)) % 10) % 10 == digits[10]
+
+
+def rows(model):
+    return [tuple(getattr(row, column.name) for column in model.__table__.columns if column.name != 'updated_at')
+            for row in model.query.order_by(model.id)]
+
+
+class TestSeed:
+    """Testy generatora danych syntetycznych"""
+
+    def test_pesel(self):
+        """Test sumy kontrolnej i kodowania stulecia w PESEL"""
+        assert seed.pesel(date(1990, 1, 1), 1234, female=True) == '90010123480'
+        assert seed.pesel(date(2005, 12, 31), 7, female=False)[2:4] == '32'
+        assert pesel_is_valid(seed.pesel(date(1944, 6, 15), 42, female=False))
+
+    def test_counts_and_loaned_books(self, test_db):
+        """Test liczby wierszy i statusu wypożyczonych książek"""
+        assert seed.seed_database(200, 20, 30, as_of=date(2026, 1, 1)) == {'books': 200, 'customers': 20, 'loans': 30}
+        assert (Book.query.count(), Customer.query.count(), Loan.query.count()) == (200, 20, 30)
+        loaned = {book.id for book in Book.query.filter_by(status='loaned')}
+        assert loaned == {loan.book_id for loan in Loan.query}
+        assert all(1 <= loan.customer_id <= 20 for loan in Loan.query)
+        assert all(pesel_is_valid(customer.pesel) for customer in Customer.query)
+        assert Book.query.filter_by(name=seed.book_name(0)).first().id == 1
+        assert current_version('books') == 1
+
+    def test_deterministic(self, test_db):
+        """Test powtarzalności danych dla tego samego ziarna"""
+        seed.seed_database(100, 10, 10, seed=7, as_of=date(2026, 1, 1))
+        first = [rows(model) for model in (Book, Customer, Loan)]
+        seed.truncate_tables()
+        seed.seed_database(100, 10, 10, seed=7, as_of=date(2026, 1, 1), batch_size=13)
+        assert [rows(model) for model in (Book, Customer, Loan)] == first
+
+    def test_search_index_rebuilt(self, client, test_db):
+        """Test indeksu wyszukiwania po załadowaniu danych"""
+        seed.seed_database(50, 5, 5)
+        response = client.get('/books/search?q=silent')
+        assert [book['name'] for book in response.get_json()['books']] == [seed.book_name(i) for i in (0, 20, 40)]
+
+    def test_stats_counters_rebuilt(self, client, test_db):
+        """Test liczników /stats po załadowaniu i usunięciu danych"""
+        seed.seed_database(100, 10, 10)
+        data = client.get('/stats').get_json()
+        assert (data['books']['total'], data['customers']['total'], data['loans']['active']) == (100, 10, 10)
+        assert data['books']['by_status'] == {'available': 90, 'loaned': 10}
+        versions = [current_version(name) for name in ('books', 'customers', 'loans')]
+        seed.truncate_tables()
+        assert client.get('/stats').get_json()['books']['total'] == 0
+        assert [current_version(name) for name in ('books', 'customers', 'loans')] == [v + 1 for v in versions]
+
+    def test_rejects_non_empty_tables(self, test_db):
+        """Test odmowy zapisu do niepustych tabel"""
+        seed.seed_database(10, 1, 1)
+        with pytest.raises(ValueError):
+            seed.seed_database(10, 1, 1)
+
+    def test_cli(self, test_app, test_db):
+        """Test komendy flask seed"""
+        runner = test_app.test_cli_runner()
+        result = runner.invoke(args=['seed', '--books', '30', '--seed', '3'])
+        assert result.exit_code == 0, result.output
+        assert 'Seeded 30 books, 3 customers and 3 loans' in result.output
+        result = runner.invoke(args=['seed', '--books', '30'])
+        assert result.exit_code != 0
+        assert 'not empty' in result.output
+        result = runner.invoke(args=['seed', '--books', '40', '--truncate'])
+        assert result.exit_code == 0
+        assert Book.query.count() == 40
+
+    def test_failed_truncate_keeps_rows(self, test_app, test_db, monkeypatch):
+        """Test nieudanego seed z --truncate - istniejące wiersze zostają"""
+        seed.seed_database(30, 3, 3)
+        runner = test_app.test_cli_runner()
+        result = runner.invoke(args=['seed', '--books', '10', '--loans', '20', '--truncate'])
+        assert result.exit_code != 0
+        assert 'Cannot loan more books' in result.output
+        assert Book.query.count() == 30
+
+        def broken_loans(*args):
+            raise RuntimeError('generator failed')
+            yield
+
+        monkeypatch.setattr(seed, 'generate_loans', broken_loans)
+        with pytest.raises(RuntimeError):
+            seed.seed_database(10, 1, 1, truncate=True)
+        assert (Book.query.count(), Customer.query.count(), Loan.query.count()) == (30, 3, 3)
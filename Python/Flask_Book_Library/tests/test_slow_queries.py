@@ -0,0 +1,62 @@
+import sqlite3
+import pytest
+from project import create_app
+from project.core import slow_queries
+from project.core.slow_queries import SlowQueryLog, statement_shape, redact, has_full_scan
+
+
+class TestSlowQueryLog:
+    """Testy dziennika wolnych zapytań"""
+
+    def test_statement_shape(self):
+        """Test normalizacji kształtu zapytania"""
+        shape = statement_shape("SELECT *\n  FROM books WHERE id IN (?, ?, ?)")
+        assert shape == "SELECT * FROM books WHERE id IN (?, ...)"
+        assert statement_shape("SELECT 1 WHERE x IN (?,?)") == statement_shape("SELECT 1 WHERE x IN (?, ?, ?, ?)")
+
+    def test_redaction(self):
+        """Test ukrywania wartości parametrów"""
+        assert redact(('90010112345', 7, None)) == ['<str:11>', '<int>', None]
+
+    def test_explain_flags_full_scan(self):
+        """Test wykrywania pełnego skanu tabeli w planie zapytania"""
+        connection = sqlite3.connect(':memory:')
+        connection.execute("CREATE TABLE books (id INTEGER PRIMARY KEY, name TEXT, status TEXT)")
+        connection.execute("CREATE UNIQUE INDEX ix_books_name ON books (name)")
+        log = SlowQueryLog(threshold_ms=0)
+        cursor = connection.cursor()
+
+        log.record(cursor, "SELECT * FROM books WHERE status = ?", ('available',), False, 0.2)
+        log.record(cursor, "SELECT * FROM books WHERE name = ?", ('Solaris',), False, 0.2)
+        log.record(cursor, "SELECT * FROM books WHERE status = ?", ('loaned',), False, 0.2)
+
+        report = log.report()
+        assert len(report['queries']) == 3
+        assert len(report['plans']) == 2
+        scans = {plan['statement']: plan['full_scan'] for plan in report['plans']}
+        assert scans == {"SELECT * FROM books WHERE status = ?": True, "SELECT * FROM books WHERE name = ?": False}
+        assert report['queries'][0]['parameters'] == ['<str:6>']
+
+    def test_plan_details(self):
+        """Test rozpoznawania pełnego skanu"""
+        assert has_full_scan(['SCAN books'])
+        assert not has_full_scan(['SCAN books USING COVERING INDEX ix_books_name'])
+        assert not has_full_scan(['SEARCH books USING INDEX ix_books_name (name=?)'])
+
+    def test_records_view(self, client, test_db, monkeypatch):
+        """Test zapisu widoku, z którego pochodzi zapytanie"""
+        if slow_queries.slow_query_log is None:
+            pytest.skip('Slow query log is disabled')
+        monkeypatch.setattr(slow_queries.slow_query_log, 'threshold', 0)
+        slow_queries.slow_query_log.clear()
+        client.get('/loans/books/json')
+        report = slow_queries.slow_query_log.report()
+        assert any(query['view'] == 'loans.list_books_json' and query['full_scan'] for query in report['queries'])
+
+    def test_report_route_off_by_default(self, client, test_db, tmp_path):
+        """Test trasy raportu - dostępna tylko w trybie debug lub z DEBUG_ENDPOINTS"""
+        assert client.get('/debug/slow-queries').status_code == 404
+        app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'debug.sqlite'}", 'DEBUG_ENDPOINTS': True})
+        response = app.test_client().get('/debug/slow-queries')
+        assert response.status_code == 200
+        assert 'queries' in response.get_json()
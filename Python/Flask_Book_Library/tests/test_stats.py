@@ -0,0 +1,76 @@
+from datetime import datetime
+from project.books.models import Book
+from project.core.models import StatCounter
+from project.core.stats import read_stats, rebuild_stats
+
+
+def add_library(client):
+    for name, book_type in [("Solaris", "5days"), ("Eden", "5days"), ("Fiasko", "2days")]:
+        client.post('/books/create', json={'name': name, 'author': "Stanislaw Lem", 'year_published': 1961, 'book_type': book_type})
+    for name, city in [("Jan Kowalski", "Krakow"), ("Anna Nowak", "Krakow"), ("Piotr Lis", "Gdansk")]:
+        client.post('/customers/create', data={'name': name, 'city': city, 'age': 30, 'pesel': "90010112345",
+                                               'street': "Main", 'appNo': "1"})
+
+
+def loan(client, book_name, return_date):
+    return client.post('/loans/create', data={'customer_name': "Jan Kowalski", 'book_name': book_name,
+                                              'loan_date': '2024-01-01', 'return_date': return_date})
+
+
+def set_counter(name, key, value):
+    return StatCounter.__table__.update().where(StatCounter.name == name, StatCounter.key == key).values(value=value)
+
+
+class TestStats:
+    """Testy liczników statystyk"""
+
+    def test_counters_follow_changes(self, client, test_db):
+        """Test liczników aktualizowanych razem z książkami, klientami i wypożyczeniami"""
+        add_library(client)
+        loan(client, "Solaris", '2024-01-10')
+        loan(client, "Eden", '2999-01-10')
+        data = client.get('/stats').get_json()
+        assert data['books'] == {'total': 3, 'by_type': {'5days': 2, '2days': 1}, 'by_status': {'available': 1, 'loaned': 2}}
+        assert data['customers'] == {'total': 3, 'by_city': {'Krakow': 2, 'Gdansk': 1}}
+        assert data['loans'] == {'active': 2, 'overdue': 1}
+
+        fiasko = Book.query.filter_by(name="Fiasko").one()
+        client.post(f'/books/{fiasko.id}/delete')
+        client.post('/loans/1/delete')
+        data = client.get('/stats').get_json()
+        assert data['books']['by_type'] == {'5days': 2}
+        assert data['books']['by_status'] == {'available': 1, 'loaned': 1}
+        assert data['loans'] == {'active': 1, 'overdue': 0}
+        assert rebuild_stats() == 0
+
+    def test_edits_and_bulk_import(self, client, test_db):
+        """Test liczników po edycji typu, zmianie miasta i imporcie zbiorczym"""
+        add_library(client)
+        solaris = Book.query.filter_by(name="Solaris").one()
+        client.post(f'/books/{solaris.id}/edit', json={'book_type': '10days'})
+        client.post('/customers/1/edit', data={'name': "Jan Kowalski", 'city': "Gdansk", 'age': 31})
+        client.post('/books/bulk', json=[{'name': f"Bulk {i}", 'author': "A", 'year_published': 2000, 'book_type': '2days'}
+                                         for i in range(5)] + [{'name': "Solaris", 'author': "A", 'year_published': 2000, 'book_type': '2days'}])
+        data = client.get('/stats').get_json()
+        assert data['books']['by_type'] == {'10days': 1, '5days': 1, '2days': 6}
+        assert data['customers']['by_city'] == {'Krakow': 1, 'Gdansk': 2}
+        assert rebuild_stats() == 0
+
+    def test_overdue_includes_earlier_today(self, test_app, client, test_db):
+        """Test przeterminowanych - dni wcześniejsze z liczników i dzisiejsze z indeksu"""
+        add_library(client)
+        loan(client, "Solaris", '2024-03-05')
+        loan(client, "Eden", '2024-03-06')
+        assert read_stats(datetime(2024, 3, 5, 12))['loans']['overdue'] == 1
+        assert read_stats(datetime(2024, 3, 7))['loans']['overdue'] == 2
+        assert read_stats(datetime(2024, 3, 4))['loans']['overdue'] == 0
+
+    def test_reconcile_command(self, test_app, client, test_db):
+        """Test komendy przebudowującej liczniki"""
+        add_library(client)
+        test_db.session.execute(set_counter('books.book_type', '5days', 40))
+        test_db.session.commit()
+        result = test_app.test_cli_runner().invoke(args=['reconcile-stats'])
+        assert result.exit_code == 0
+        assert '1 counters corrected' in result.output
+        assert client.get('/stats').get_json()['books']['by_type'] == {'5days': 2, '2days': 1}
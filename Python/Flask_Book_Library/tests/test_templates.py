@@ -0,0 +1,68 @@
+from project import create_app
+from project.books.models import Book
+from project.core.cache import response_cache
+from project.core.templates import row_cache
+
+
+def memory_app(**config):
+    return create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:', 'METRICS_ENABLED': False,
+                       'SLOW_QUERY_THRESHOLD_MS': 0, **config})
+
+
+class TestTemplateModes:
+    """Testy trybów renderowania szablonów"""
+
+    def test_development_mode(self):
+        """Test trybu deweloperskiego - przeładowanie szablonów, bez cache wierszy"""
+        app = memory_app(TEMPLATE_MODE='development')
+        assert app.jinja_env.auto_reload
+        assert app.jinja_env.bytecode_cache is None
+        assert not app.config['ROW_FRAGMENT_CACHE']
+
+    def test_production_mode(self, tmp_path):
+        """Test trybu produkcyjnego - szablony skompilowane raz, bytecode na dysku"""
+        app = memory_app(TEMPLATE_MODE='production', TEMPLATE_CACHE_DIR=str(tmp_path))
+        assert not app.jinja_env.auto_reload
+        assert app.jinja_env.bytecode_cache is not None
+        assert app.config['ROW_FRAGMENT_CACHE']
+        assert any(path.name.endswith('.cache') for path in tmp_path.iterdir())
+
+    def test_explicit_setting_wins(self, tmp_path):
+        """Test jawnego ustawienia TEMPLATES_AUTO_RELOAD w trybie produkcyjnym"""
+        app = memory_app(TEMPLATE_MODE='production', TEMPLATE_CACHE_DIR=str(tmp_path), TEMPLATES_AUTO_RELOAD=True)
+        assert app.jinja_env.auto_reload
+
+
+class TestRowFragmentCache:
+    """Testy cache wyrenderowanych wierszy"""
+
+    def test_unchanged_rows_are_reused(self, client, test_app, test_db, monkeypatch):
+        """Test ponownego użycia wierszy i renderowania zmienionego wiersza"""
+        monkeypatch.setitem(test_app.config, 'ROW_FRAGMENT_CACHE', True)
+        books = [Book(name=f"Book {i}", author="Author", year_published=2000, book_type="2days") for i in range(3)]
+        test_db.session.add_all(books)
+        test_db.session.commit()
+
+        client.get('/books/')
+        assert row_cache.stats()['misses'] == 3
+        client.get('/books/?sort=name')
+        assert row_cache.stats()['hits'] == 3
+
+        client.post(f'/books/{books[0].id}/edit', json={'name': 'Renamed'})
+        html = client.get('/books/').get_data(as_text=True)
+        assert 'Renamed' in html and 'Book 0' not in html
+        assert row_cache.stats()['hits'] == 5
+        assert row_cache.stats()['misses'] == 4
+
+    def test_rows_render_the_same_with_cache(self, client, test_app, test_db, monkeypatch):
+        """Test identycznego HTML z cache wierszy i bez niego"""
+        test_db.session.add(Book(name="Book", author="Author", year_published=2000, book_type="2days"))
+        test_db.session.commit()
+        plain = client.get('/books/?fragment=1').get_data(as_text=True)
+
+        monkeypatch.setitem(test_app.config, 'ROW_FRAGMENT_CACHE', True)
+        response_cache.clear()
+        client.get('/books/?fragment=1')
+        response_cache.clear()
+        assert client.get('/books/?fragment=1').get_data(as_text=True) == plain
+        assert row_cache.stats()['hits'] == 1